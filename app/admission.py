@@ -0,0 +1,242 @@
+"""
+Module: admission.py
+
+Admission control: per-route-class concurrency limits with a bounded wait
+queue, so one saturated class (bcrypt-heavy auth, slow DB queries) cannot
+drag down the others.
+
+Each request is classified by method and path (``classify``):
+
+- ``auth``: ``/users/login``, ``/users/register``
+- ``db_read``: GET/HEAD under ``/calculations``, ``/users/me``
+- ``db_write``: other methods under ``/calculations``
+- ``arithmetic``: ``/add``, ``/subtract``, ``/multiply``, ``/divide``,
+  ``/batch``, ``/evaluate``
+
+Everything else (pages, ``/metrics``, ``/ready``, ``/system``, WebSockets)
+is never limited. A class admits up to ``limit`` concurrent requests; up to
+``queue`` more wait (FIFO) for at most ``timeout`` seconds. A request that
+finds the queue full, or whose deadline passes, is shed immediately with
+``503`` and ``Retry-After``.
+
+With ``ADMISSION_ADAPTIVE=1`` each limit follows a latency gradient: the
+ratio of the best recent latency to the current smoothed latency shrinks
+the limit when queueing builds up in the handler and lets it grow (by
+``sqrt(limit)`` headroom) while latency stays flat, between ``min_limit``
+and the configured limit.
+
+Settings (environment): ``ADMISSION_CONTROL`` (``1``),
+``ADMISSION_<CLASS>_LIMIT`` / ``_QUEUE`` / ``_TIMEOUT`` (a limit of 0
+disables that class), ``ADMISSION_ADAPTIVE`` (``0``),
+``ADMISSION_RETRY_AFTER`` (1).
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+
+from app import metrics
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1").lower() in ("1", "true", "yes")
+ADMISSION_ADAPTIVE = os.getenv("ADMISSION_ADAPTIVE", "0").lower() in ("1", "true", "yes")
+ADMISSION_RETRY_AFTER = os.getenv("ADMISSION_RETRY_AFTER", "1")
+
+# class -> (limit, queue, timeout seconds)
+DEFAULT_LIMITS = {
+    "auth": (16, 64, 2.0),
+    "db_read": (64, 256, 1.0),
+    "db_write": (32, 128, 2.0),
+    "arithmetic": (256, 1024, 0.5),
+}
+
+ARITHMETIC_PATHS = frozenset({"/add", "/subtract", "/multiply", "/divide", "/batch", "/evaluate"})
+AUTH_PATHS = frozenset({"/users/login", "/users/register"})
+
+
+def classify(method: str, path: str):
+    """Route class of a request, or None when it is not limited."""
+    if path in AUTH_PATHS:
+        return "auth"
+    if path in ARITHMETIC_PATHS:
+        return "arithmetic"
+    if path.startswith("/calculations") or path == "/users/me":
+        return "db_read" if method in ("GET", "HEAD") else "db_write"
+    return None
+
+
+class Overloaded(Exception):
+    """Raised by ``ConcurrencyLimiter.acquire`` when a request is shed."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """Concurrency limit with a bounded FIFO wait queue (one event loop)."""
+
+    def __init__(self, name: str, limit: int, queue: int, timeout: float, adaptive: bool = False,
+                 min_limit: int = 1):
+        self.name = name
+        self.max_limit = limit
+        self.limit = float(limit)
+        self.min_limit = min(min_limit, limit)
+        self.queue_size = queue
+        self.timeout = timeout
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.shed = 0
+        self.timeouts = 0
+        # adaptive state: smoothed and best-recent latency
+        self._latency = None
+        self._min_latency = None
+        self._min_latency_reset = time.monotonic()
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    async def acquire(self):
+        """Take a slot, waiting in the queue if needed; raises Overloaded."""
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return 0.0
+        if len(self._waiters) >= self.queue_size:
+            self.shed += 1
+            raise Overloaded("queue_full")
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait([waiter], timeout=self.timeout)
+        except BaseException:
+            # cancelled (e.g. client went away): hand back a slot we were given
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        if not waiter.done():
+            self._discard(waiter)
+            self.shed += 1
+            self.timeouts += 1
+            raise Overloaded("timeout")
+        self.admitted += 1
+        return time.perf_counter() - started
+
+    def _discard(self, waiter):
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, latency: float | None = None):
+        self.in_flight -= 1
+        if self.adaptive and latency is not None:
+            self._update_limit(latency)
+        # hand freed slots straight to the oldest waiters
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _update_limit(self, latency: float):
+        now = time.monotonic()
+        # forget the best latency now and then so the baseline can rise
+        if self._min_latency is None or latency < self._min_latency or now - self._min_latency_reset > 60:
+            self._min_latency = latency
+            self._min_latency_reset = now
+        self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+        gradient = max(0.5, min(1.0, self._min_latency / self._latency)) if self._latency > 0 else 1.0
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = max(self.min_limit, min(self.max_limit, 0.8 * self.limit + 0.2 * target))
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "max_limit": self.max_limit,
+            "queue_limit": self.queue_size,
+            "timeout_seconds": self.timeout,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timeouts": self.timeouts,
+            "latency_seconds": self._latency or 0.0,
+        }
+
+
+def _limiters_from_env(adaptive: bool = ADMISSION_ADAPTIVE) -> dict:
+    limiters = {}
+    for name, (limit, queue, timeout) in DEFAULT_LIMITS.items():
+        prefix = f"ADMISSION_{name.upper()}_"
+        limit = int(os.getenv(prefix + "LIMIT", str(limit)))
+        if limit <= 0:
+            continue
+        limiters[name] = ConcurrencyLimiter(
+            name,
+            limit,
+            int(os.getenv(prefix + "QUEUE", str(queue))),
+            float(os.getenv(prefix + "TIMEOUT", str(timeout))),
+            adaptive=adaptive,
+        )
+    return limiters
+
+
+limiters = _limiters_from_env()
+
+
+def stats() -> dict:
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+_SHED_BODY = json.dumps({"error": "Server is overloaded, retry later"}).encode("utf-8")
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying the per-class limiters."""
+
+    def __init__(self, app, limiters_by_class: dict | None = None):
+        self.app = app
+        self.limiters = limiters_by_class
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_CONTROL:
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"])
+        limiter = (self.limiters if self.limiters is not None else limiters).get(route_class)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        labels = (("class", route_class),)
+        try:
+            waited = await limiter.acquire()
+        except Overloaded as exc:
+            metrics.inc("admission_shed_total", labels + (("reason", exc.reason),))
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_SHED_BODY)).encode("latin-1")),
+                    (b"retry-after", ADMISSION_RETRY_AFTER.encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _SHED_BODY})
+            return
+        metrics.inc("admission_admitted_total", labels)
+        metrics.observe("admission_queue_wait_seconds", labels, waited)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
@@ -0,0 +1,226 @@
+"""Async equivalents of every function in app.crud.
+
+Each function accepts either an ``AsyncSession`` (async mode, see
+``app.db.USE_ASYNC_DB``) or a plain sync ``Session``. Reads on async sessions
+are issued natively; writes reuse the single-statement ``app.crud`` functions
+through ``AsyncSession.run_sync``. Sync sessions fall back to running the
+matching ``app.crud`` function in the threadpool, so routers can be
+``async def`` in both modes.
+"""
+
+import sys
+
+from sqlalchemy import select
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app import crud
+from app.models import User, Calculation
+from app.schemas import UserCreate, CalculationCreate, CalculationUpdate, CalculationBulkUpdateItem
+from app.security import hash_password_async, verify_password_async
+
+
+def is_async(db) -> bool:
+    # sqlalchemy.ext.asyncio is imported lazily (see app.db); if it has not
+    # been imported there can be no AsyncSession to check against.
+    asyncio_ext = sys.modules.get("sqlalchemy.ext.asyncio")
+    return asyncio_ext is not None and isinstance(db, asyncio_ext.AsyncSession)
+
+
+async def run_sync(db, fn, *args):
+    """Run a sync ``app.crud`` function against either kind of session.
+
+    Async sessions use ``AsyncSession.run_sync`` (the function receives the
+    underlying sync Session); sync sessions run in the threadpool.
+    """
+    if is_async(db):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+async def close(db):
+    """Close either kind of session."""
+    if is_async(db):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+
+# ------------------------
+# USER CRUD
+# ------------------------
+
+async def get_user_by_email(db, email: str):
+    """Return a User or None for the given email."""
+    if not is_async(db):
+        return await run_in_threadpool(crud.get_user_by_email, db, email)
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+async def get_user_by_id(db, user_id: int):
+    """Return a User or None for the given id."""
+    if not is_async(db):
+        return await run_in_threadpool(crud.get_user_by_id, db, user_id)
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
+
+async def create_user(db, user: UserCreate, hashed_password: str | None = None) -> User:
+    """Create a new user; the password is hashed on the bcrypt pool if needed."""
+    hashed = hashed_password or await hash_password_async(user.password)
+    return await run_sync(db, crud.create_user, user, hashed)
+
+
+async def verify_user(db, email: str, password: str):
+    """Verify credentials; return the User on success or None on failure."""
+    user = await get_user_by_email(db, email)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
+
+# ------------------------
+# CALCULATION CRUD
+# ------------------------
+
+async def get_all_calculations(db):
+    if not is_async(db):
+        return await run_in_threadpool(crud.get_all_calculations, db)
+    result = await db.execute(select(Calculation))
+    return result.scalars().all()
+
+
+async def get_calculations_page(
+    db,
+    limit: int = crud.DEFAULT_PAGE_SIZE,
+    after_id: int | None = None,
+    operation: str | None = None,
+    user_id: int | None = None,
+    newest_first: bool = False,
+):
+    """Async ``crud.get_calculations_page``; returns ``(items, next_cursor)``."""
+    if not is_async(db):
+        return await run_in_threadpool(
+            crud.get_calculations_page, db, limit, after_id, operation, user_id, newest_first
+        )
+    stmt = crud.calculations_page_statement(limit, after_id, operation, user_id, newest_first)
+    result = await db.execute(stmt)
+    return crud.split_page(result.scalars().all(), limit)
+
+
+async def get_calculation_rows_page(
+    db,
+    limit: int = crud.DEFAULT_PAGE_SIZE,
+    after_id: int | None = None,
+    operation: str | None = None,
+    user_id: int | None = None,
+    newest_first: bool = False,
+):
+    """Async ``crud.get_calculation_rows_page``; returns ``(rows, next_cursor)``."""
+    if not is_async(db):
+        return await run_in_threadpool(
+            crud.get_calculation_rows_page, db, limit, after_id, operation, user_id, newest_first
+        )
+    stmt = crud.calculations_page_statement(
+        limit, after_id, operation, user_id, newest_first, columns=crud.ROW_PAGE_COLUMNS
+    )
+    result = await db.execute(stmt)
+    return crud.split_page(result.all(), limit)
+
+
+async def get_calculation_version(db, calc_id: int):
+    """Async ``crud.get_calculation_version``."""
+    if not is_async(db):
+        return await run_in_threadpool(crud.get_calculation_version, db, calc_id)
+    stmt = select(*(getattr(Calculation, name) for name in crud.VERSION_COLUMNS)).where(Calculation.id == calc_id)
+    result = await db.execute(stmt)
+    return result.first()
+
+
+async def get_calculation_versions_page(
+    db,
+    limit: int = crud.DEFAULT_PAGE_SIZE,
+    after_id: int | None = None,
+    operation: str | None = None,
+    user_id: int | None = None,
+    newest_first: bool = False,
+):
+    """Async ``crud.get_calculation_versions_page``; returns ``(rows, next_cursor)``."""
+    if not is_async(db):
+        return await run_in_threadpool(
+            crud.get_calculation_versions_page, db, limit, after_id, operation, user_id, newest_first
+        )
+    stmt = crud.calculations_page_statement(
+        limit, after_id, operation, user_id, newest_first, columns=("id", "version")
+    )
+    result = await db.execute(stmt)
+    return crud.split_page(result.all(), limit)
+
+
+async def iter_calculation_chunks(
+    db,
+    chunk_size: int = 1000,
+    operation: str | None = None,
+    user_id: int | None = None,
+):
+    """Async generator version of ``crud.iter_calculation_chunks``."""
+    if not is_async(db):
+        async for rows in iterate_in_threadpool(crud.iter_calculation_chunks(db, chunk_size, operation, user_id)):
+            yield rows
+        return
+    result = await db.stream(crud.export_statement(chunk_size, operation, user_id))
+    try:
+        async for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+    finally:
+        await result.close()
+
+
+async def get_calculation(db, calc_id: int):
+    if not is_async(db):
+        return await run_in_threadpool(crud.get_calculation, db, calc_id)
+    result = await db.execute(select(Calculation).where(Calculation.id == calc_id))
+    return result.scalars().first()
+
+
+async def get_user_calculation(db, user_id: int, calc_id: int):
+    if not is_async(db):
+        return await run_in_threadpool(crud.get_user_calculation, db, user_id, calc_id)
+    result = await db.execute(
+        select(Calculation).where(Calculation.user_id == user_id, Calculation.id == calc_id)
+    )
+    return result.scalars().first()
+
+
+async def create_calculation(db, calc: CalculationCreate, user_id: int | None = None):
+    return await run_sync(db, crud.create_calculation, calc, user_id)
+
+
+async def update_calculation(db, calc_id: int, updates: CalculationUpdate):
+    return await run_sync(db, crud.update_calculation, calc_id, updates)
+
+
+async def delete_calculation(db, calc_id: int):
+    return await run_sync(db, crud.delete_calculation, calc_id)
+
+
+async def get_calculation_stats(db, user_id: int | None = None):
+    return await run_sync(db, crud.get_calculation_stats, user_id)
+
+
+# ------------------------
+# BULK CALCULATION CRUD
+# ------------------------
+
+async def bulk_create_calculations(db, calcs: list[CalculationCreate], chunk_size: int = crud.BULK_CHUNK_SIZE):
+    return await run_sync(db, crud.bulk_create_calculations, calcs, chunk_size)
+
+
+async def bulk_update_calculations(db, items: list[CalculationBulkUpdateItem], chunk_size: int = crud.BULK_CHUNK_SIZE):
+    return await run_sync(db, crud.bulk_update_calculations, items, chunk_size)
+
+
+async def bulk_delete_calculations(db, ids: list[int], chunk_size: int = crud.BULK_CHUNK_SIZE):
+    return await run_sync(db, crud.bulk_delete_calculations, ids, chunk_size)
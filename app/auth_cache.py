@@ -0,0 +1,140 @@
+"""Caches used by ``get_current_user`` on authenticated hot paths.
+
+* ``token_cache`` maps a raw bearer token to the user id in its ``sub``
+  claim, so the HS256 signature is verified once per token. Entries never
+  outlive the token's ``exp``.
+* ``user_cache`` maps a user id to an ``AuthenticatedUser`` snapshot, so a
+  cached token needs no database round trip at all.
+
+Both are bounded LRUs with a TTL. Whenever this process runs an UPDATE or
+DELETE against the ``users`` table, through the ORM or as a Core
+``update()`` / ``delete()`` statement (bulk, RETURNING or not), the caches
+are cleared; the TTL bounds staleness for changes made elsewhere (other
+processes, raw SQL text).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import Delete, Update
+
+from app.models import User
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Immutable view of the authenticated user, safe to share across requests."""
+
+    id: int
+    email: str
+
+    @classmethod
+    def from_user(cls, user) -> "AuthenticatedUser":
+        return cls(id=user.id, email=user.email)
+
+
+class TTLCache:
+    """Thread-safe bounded LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl: float | None = None):
+        """Store ``value``; ``ttl`` may shorten (never extend) the default TTL."""
+        if self.maxsize <= 0:
+            return
+        lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+        if lifetime <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + lifetime)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+token_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+user_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+
+def cache_token(token: str, user_id: int, exp: float | None):
+    """Remember a verified token until the earlier of its ``exp`` and the TTL."""
+    ttl = None if exp is None else exp - time.time()
+    token_cache.set(token, user_id, ttl)
+
+
+def invalidate_token(token: str):
+    token_cache.pop(token)
+
+
+def invalidate_user(user_id: int):
+    """Drop the cached snapshot of a user (call whenever the user changes)."""
+    user_cache.pop(user_id)
+
+
+def clear():
+    token_cache.clear()
+    user_cache.clear()
+
+
+def stats() -> dict:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+
+@event.listens_for(Engine, "after_execute")
+def _invalidate_changed_users(conn, clauseelement, multiparams, params, execution_options, result):
+    # Covers ORM flushes as well as Core/bulk statements, which bypass the
+    # mapper-level after_update/after_delete events. Which rows a statement
+    # touched is not known here, so both caches are dropped; user writes
+    # are rare next to the reads they serve.
+    if isinstance(clauseelement, (Update, Delete)) and getattr(clauseelement.table, "name", None) == User.__tablename__:
+        clear()
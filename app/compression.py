@@ -0,0 +1,260 @@
+"""
+Module: compression.py
+
+Content codings for the precompressed pages (one-shot ``compress``) and for
+``CompressionMiddleware``, which compresses dynamic responses on the fly.
+
+gzip is always available; brotli ("br") and zstd are used when the
+``brotli`` / ``zstandard`` packages are installed. ``negotiate`` picks the
+best coding a client accepts.
+
+Middleware settings (environment):
+
+- ``COMPRESSION_ENABLED``: ``1`` (default) or ``0``.
+- ``COMPRESSION_CODINGS``: codings in preference order (default ``br,zstd,gzip``;
+  unavailable ones are skipped).
+- ``COMPRESSION_MIN_SIZE``: smallest body, in bytes, worth compressing
+  (default 1024).
+- ``COMPRESSION_TYPES``: comma-separated content-type prefixes to compress
+  (default ``application/json,application/x-ndjson,text/``).
+- ``COMPRESSION_GZIP_LEVEL`` / ``COMPRESSION_BR_LEVEL`` /
+  ``COMPRESSION_ZSTD_LEVEL``: levels (defaults 6 / 4 / 3, tuned for speed).
+"""
+
+import gzip
+import os
+import zlib
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    # mtime=0 keeps the output (and any ETag derived from it) deterministic
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+# coding -> (compress(data, level), default level, max level), best first
+ENCODERS: Dict[str, tuple] = {}
+if brotli is not None:
+    ENCODERS["br"] = (lambda data, level: brotli.compress(data, quality=level), 11, 11)
+ENCODERS["gzip"] = (_gzip, 9, 9)
+
+
+def compress(coding: str, data: bytes, level: Optional[int] = None) -> bytes:
+    fn, default_level, max_level = ENCODERS[coding]
+    return fn(data, min(max_level, default_level if level is None else level))
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(accept_encoding: Optional[str], available) -> Optional[str]:
+    """
+    Pick a coding from ``available`` (ordered by server preference) that the
+    ``Accept-Encoding`` header allows, preferring higher q-values. Returns
+    None for identity.
+
+    Example:
+    >>> negotiate("gzip;q=0.5, br", ["br", "gzip"])
+    'br'
+    >>> negotiate("deflate", ["br", "gzip"]) is None
+    True
+    """
+    if not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+# ---------------------------
+# Streaming compressors
+# ---------------------------
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        # sync flush so every chunk reaches the client without waiting for more
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.process(data) + self._obj.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+
+# coding -> (stream class, level)
+STREAM_ENCODERS: Dict[str, tuple] = {"gzip": (_GzipStream, int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")))}
+if brotli is not None:
+    STREAM_ENCODERS["br"] = (_BrotliStream, int(os.getenv("COMPRESSION_BR_LEVEL", "4")))
+if zstandard is not None:
+    STREAM_ENCODERS["zstd"] = (_ZstdStream, int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")))
+
+
+def _env_list(name: str, default: str) -> list:
+    return [item.strip().lower() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1").lower() in ("1", "true", "yes")
+COMPRESSION_CODINGS = [c for c in _env_list("COMPRESSION_CODINGS", "br,zstd,gzip") if c in STREAM_ENCODERS]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_TYPES = _env_list("COMPRESSION_TYPES", "application/json,application/x-ndjson,text/")
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing eligible responses with the best coding
+    the client accepts.
+
+    A response is compressed when its content type matches an allowed
+    prefix, it has no Content-Encoding yet (e.g. the precompressed pages)
+    and it is at least ``min_size`` bytes. Single-body responses are
+    compressed in one go; streaming responses (``more_body``) are compressed
+    chunk by chunk with a flush after each, so they are never buffered.
+    Strong ETags are weakened since the bytes on the wire change.
+    """
+
+    def __init__(self, app, codings=None, min_size: Optional[int] = None, types=None, levels: Optional[dict] = None):
+        self.app = app
+        self.codings = [c for c in (codings or COMPRESSION_CODINGS) if c in STREAM_ENCODERS]
+        self.min_size = COMPRESSION_MIN_SIZE if min_size is None else min_size
+        self.types = tuple(types or COMPRESSION_TYPES)
+        self.levels = {c: (levels or {}).get(c, STREAM_ENCODERS[c][1]) for c in self.codings}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        accept = None
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        coding = negotiate(accept, self.codings)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self, coding, send).run(scope, receive)
+
+
+class _CompressedResponse:
+    def __init__(self, middleware: CompressionMiddleware, coding: str, send):
+        self.middleware = middleware
+        self.coding = coding
+        self.send = send
+        self.start = None
+        self.passthrough = False
+        self.stream = None
+
+    async def run(self, scope, receive):
+        await self.middleware.app(scope, receive, self.wrapped_send)
+
+    def _eligible(self, headers) -> bool:
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        if not content_type.startswith(self.middleware.types):
+            return False
+        length = headers.get("content-length")
+        return length is None or int(length) >= self.middleware.min_size
+
+    def _compressed_start(self, length: Optional[int]):
+        headers = [(k, v) for k, v in self.start["headers"] if k.lower() not in (b"content-length", b"etag")]
+        for k, v in self.start["headers"]:
+            if k.lower() == b"etag":
+                headers.append((k, v if v.startswith(b"W/") else b"W/" + v))
+        headers.append((b"content-encoding", self.coding.encode("latin-1")))
+        vary = [v for k, v in headers if k.lower() == b"vary"]
+        if not vary:
+            headers.append((b"vary", b"Accept-Encoding"))
+        elif b"accept-encoding" not in vary[0].lower():
+            headers = [(k, v + b", Accept-Encoding" if k.lower() == b"vary" else v) for k, v in headers]
+        if length is not None:
+            headers.append((b"content-length", str(length).encode("latin-1")))
+        return {**self.start, "headers": headers}
+
+    async def wrapped_send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in message["headers"]}
+            self.passthrough = not self._eligible(headers)
+            if self.passthrough:
+                await self.send(message)
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        cls, level = STREAM_ENCODERS[self.coding][0], self.middleware.levels[self.coding]
+        if self.stream is None:
+            if not more_body:
+                # whole body in one message
+                if len(body) < self.middleware.min_size:
+                    self.passthrough = True
+                    await self.send(self.start)
+                    await self.send(message)
+                    return
+                compressed = cls(level).finish(body)
+                await self.send(self._compressed_start(len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            self.stream = cls(level)
+            await self.send(self._compressed_start(None))
+        data = self.stream.finish(body) if not more_body else self.stream.chunk(body)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,64 @@
+"""
+Module: conditional.py
+
+HTTP validators (``ETag`` / ``Last-Modified``) and evaluation of conditional
+GET requests, shared by the static pages and the calculations API.
+
+Per RFC 9110, ``If-None-Match`` uses weak comparison and takes precedence
+over ``If-Modified-Since``; a satisfied condition is answered with
+``304 Not Modified`` carrying the validators but no body.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi.responses import Response
+
+
+def etag_matches(header: Optional[str], etags) -> bool:
+    """True when an ``If-None-Match`` header matches any of ``etags``."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison: a W/ prefix (e.g. added by CompressionMiddleware) is ignored
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return bool(candidates & {tag.removeprefix("W/") for tag in etags})
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite returns naive CURRENT_TIMESTAMP values, which are UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    """Format a datetime as an HTTP date, e.g. ``Sat, 17 Oct 2026 19:36:31 GMT``."""
+    return format_datetime(_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def modified_since(header: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """False only when ``last_modified`` is no later than an ``If-Modified-Since`` date."""
+    if not header or last_modified is None:
+        return True
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return True  # invalid dates are ignored
+    return _utc(last_modified).replace(microsecond=0) > _utc(since)
+
+
+def not_modified(headers, etags, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate the request's conditional headers against the current validators."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etags)
+    if last_modified is not None and headers.get("if-modified-since"):
+        return not modified_since(headers["if-modified-since"], last_modified)
+    return False
+
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
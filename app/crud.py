@@ -1,7 +1,28 @@
+import os
+
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
+from app import stats
 from app.models import User, Calculation
 from app.security import hash_password, verify_password
-from app.schemas import UserCreate, CalculationCreate, CalculationUpdate
+from app.schemas import UserCreate, CalculationCreate, CalculationUpdate, CalculationBulkUpdateItem
+
+
+# Writes use INSERT/UPDATE/DELETE ... RETURNING so each mutation is a single
+# statement instead of SELECT + write + refresh SELECT. Backends without
+# RETURNING use the equivalent ORM unit-of-work path (the ``_orm`` helpers).
+
+def _supports(db: Session, feature: str) -> bool:
+    """``feature`` is one of insert_returning / update_returning / delete_returning."""
+    return bool(getattr(db.get_bind().dialect, feature, False))
+
+
+def _commit_detached(db: Session, obj):
+    # Detach before committing so the values RETURNING produced are not
+    # expired by the commit (which would cost a refresh SELECT on access).
+    db.expunge(obj)
+    db.commit()
+    return obj
 
 
 # ------------------------
@@ -10,22 +31,35 @@ from app.schemas import UserCreate, CalculationCreate, CalculationUpdate
 
 def get_user_by_email(db: Session, email: str):
     """Return a User or None for the given email."""
-    return db.query(User).filter(User.email == email).first()
+    return db.query(User).execution_options(replica_ok=True).filter(User.email == email).first()
 
 
 def get_user_by_id(db: Session, user_id: int):
     """Return a User or None for the given id."""
-    return db.query(User).filter(User.id == user_id).first()
+    return db.query(User).execution_options(replica_ok=True).filter(User.id == user_id).first()
 
 
-def create_user(db: Session, user: UserCreate) -> User:
-    """Create a new user with a bcrypt-hashed password."""
-    hashed = hash_password(user.password)
-    db_user = User(email=user.email, hashed_password=hashed)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+def create_user(db: Session, user: UserCreate, hashed_password: str | None = None) -> User:
+    """Create a new user with a bcrypt-hashed password.
+
+    Callers that already hashed the password off-thread (see
+    ``app.security.hash_password_async``) can pass it as ``hashed_password``.
+    """
+    hashed = hashed_password or hash_password(user.password)
+    if not _supports(db, "insert_returning"):
+        db_user = User(email=user.email, hashed_password=hashed)
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+        return db_user
+    try:
+        db_user = db.scalars(
+            insert(User).values(email=user.email, hashed_password=hashed).returning(User)
+        ).one()
+        return _commit_detached(db, db_user)
+    except Exception:
+        db.rollback()
+        raise
 
 
 def verify_user(db: Session, email: str, password: str):
@@ -42,46 +76,385 @@ def verify_user(db: Session, email: str, password: str):
 # CALCULATION CRUD
 # ------------------------
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
 def get_all_calculations(db: Session):
-    return db.query(Calculation).all()
+    return db.query(Calculation).execution_options(replica_ok=True).all()
+
+
+def calculations_page_statement(
+    limit: int = DEFAULT_PAGE_SIZE,
+    after_id: int | None = None,
+    operation: str | None = None,
+    user_id: int | None = None,
+    newest_first: bool = False,
+    columns: tuple[str, ...] | None = None,
+):
+    """Build the keyset page SELECT shared by the sync and async CRUD layers.
+
+    Pages run in ascending id order, or descending when ``newest_first`` is
+    set (``after_id`` then means "older than"). The statement asks for one
+    row more than ``limit`` so ``split_page`` can tell whether another page
+    exists. With ``columns`` it selects those plain columns instead of
+    Calculation entities. Pages may be served by a read replica (the
+    ``replica_ok`` execution option, see app.replicas).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if columns:
+        stmt = select(*(getattr(Calculation, name) for name in columns))
+    else:
+        stmt = select(Calculation)
+    if after_id is not None:
+        stmt = stmt.where(Calculation.id < after_id if newest_first else Calculation.id > after_id)
+    if operation is not None:
+        stmt = stmt.where(Calculation.operation == operation)
+    if user_id is not None:
+        stmt = stmt.where(Calculation.user_id == user_id)
+    order = Calculation.id.desc() if newest_first else Calculation.id
+    return stmt.order_by(order).limit(limit + 1).execution_options(replica_ok=True)
+
+
+def split_page(rows, limit: int):
+    """Trim the look-ahead row and return ``(items, next_cursor)``."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+def get_calculations_page(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after_id: int | None = None,
+    operation: str | None = None,
+    user_id: int | None = None,
+    newest_first: bool = False,
+):
+    """Return one keyset page of calculations ordered by id.
+
+    Returns a ``(items, next_cursor)`` tuple where ``next_cursor`` is the id to
+    pass as ``after_id`` for the following page, or None on the last page.
+    """
+    stmt = calculations_page_statement(limit, after_id, operation, user_id, newest_first)
+    return split_page(db.scalars(stmt).all(), limit)
+
+
+# Columns of CalculationRead, in order, for responses serialized straight
+# from row tuples. Row pages also carry ``version`` (for the page ETag) as a
+# trailing column, which ``responses.rows_response`` ignores.
+READ_COLUMNS = ("id", "operation", "number1", "number2", "result")
+ROW_PAGE_COLUMNS = READ_COLUMNS + ("version",)
+
+
+def get_calculation_rows_page(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after_id: int | None = None,
+    operation: str | None = None,
+    user_id: int | None = None,
+    newest_first: bool = False,
+):
+    """Like ``get_calculations_page`` but returns ``ROW_PAGE_COLUMNS`` row
+    tuples instead of ORM objects (no identity map or attribute
+    instrumentation)."""
+    stmt = calculations_page_statement(limit, after_id, operation, user_id, newest_first, columns=ROW_PAGE_COLUMNS)
+    return split_page(db.execute(stmt).all(), limit)
+
+
+# Columns a conditional GET needs: enough to build ETag / Last-Modified
+# without loading (or serializing) the calculation itself.
+VERSION_COLUMNS = ("id", "version", "updated_at")
+
+
+def get_calculation_version(db: Session, calc_id: int):
+    """Return the ``VERSION_COLUMNS`` row for ``calc_id``, or None."""
+    stmt = select(*(getattr(Calculation, name) for name in VERSION_COLUMNS)).where(Calculation.id == calc_id)
+    return db.execute(stmt.execution_options(replica_ok=True)).first()
+
+
+def get_calculation_versions_page(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after_id: int | None = None,
+    operation: str | None = None,
+    user_id: int | None = None,
+    newest_first: bool = False,
+):
+    """The ``(id, version)`` rows of a keyset page, as ``(rows, next_cursor)``."""
+    stmt = calculations_page_statement(limit, after_id, operation, user_id, newest_first, columns=("id", "version"))
+    return split_page(db.execute(stmt).all(), limit)
+
+
+EXPORT_COLUMNS = ("id", "operation", "number1", "number2", "result", "user_id")
+
+
+def export_statement(chunk_size: int = 1000, operation: str | None = None, user_id: int | None = None):
+    """Build the streaming export SELECT (plain columns, no ORM objects)."""
+    stmt = select(*(getattr(Calculation, name) for name in EXPORT_COLUMNS)).order_by(Calculation.id)
+    if operation is not None:
+        stmt = stmt.where(Calculation.operation == operation)
+    if user_id is not None:
+        stmt = stmt.where(Calculation.user_id == user_id)
+    return stmt.execution_options(yield_per=chunk_size)
+
+
+def iter_calculation_chunks(
+    db: Session,
+    chunk_size: int = 1000,
+    operation: str | None = None,
+    user_id: int | None = None,
+):
+    """Yield lists of calculation rows (tuples in EXPORT_COLUMNS order).
+
+    Rows are read with ``yield_per`` so the driver streams them through a
+    server-side cursor where supported and at most ``chunk_size`` rows are
+    held in memory at a time. No ORM objects are built.
+    """
+    result = db.execute(export_statement(chunk_size, operation, user_id))
+    try:
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+    finally:
+        result.close()
 
 
 def get_calculation(db: Session, calc_id: int):
-    return db.query(Calculation).filter(Calculation.id == calc_id).first()
+    return db.query(Calculation).execution_options(replica_ok=True).filter(Calculation.id == calc_id).first()
 
 
-def create_calculation(db: Session, calc: CalculationCreate):
-    db_calc = Calculation(
-        operation=calc.operation,
-        number1=calc.number1,
-        number2=calc.number2,
-        result=calc.result,
+def get_user_calculation(db: Session, user_id: int, calc_id: int):
+    """Return the calculation only if it belongs to ``user_id``."""
+    return (
+        db.query(Calculation)
+        .execution_options(replica_ok=True)
+        .filter(Calculation.user_id == user_id, Calculation.id == calc_id)
+        .first()
     )
+
+
+def _get_calculation_for_write(db: Session, calc_id: int):
+    # always read from the primary: the row is about to be changed and its
+    # current values feed the stats rollup
+    return db.query(Calculation).filter(Calculation.id == calc_id).first()
+
+
+def create_calculation(db: Session, calc: CalculationCreate, user_id: int | None = None):
+    values = {
+        "operation": calc.operation,
+        "number1": calc.number1,
+        "number2": calc.number2,
+        "result": calc.result,
+        "user_id": user_id,
+    }
+    if not _supports(db, "insert_returning"):
+        return _create_calculation_orm(db, values)
+    try:
+        db_calc = db.scalars(insert(Calculation).values(**values).returning(Calculation)).one()
+        stats.record_created(db, [stats.snapshot(values)])
+        return _commit_detached(db, db_calc)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def update_calculation(db: Session, calc_id: int, updates: CalculationUpdate):
+    update_data = updates.model_dump(exclude_unset=True) if hasattr(updates, 'model_dump') else updates.dict(exclude_unset=True)
+    if not update_data:
+        return get_calculation(db, calc_id)
+    if not _supports(db, "update_returning"):
+        return _update_calculation_orm(db, calc_id, update_data)
+    try:
+        old = None
+        # the rollup only needs the previous values when they can change
+        if update_data.keys() & {"operation", "result"}:
+            row = db.execute(
+                select(Calculation.operation, Calculation.user_id, Calculation.result)
+                .where(Calculation.id == calc_id)
+                .with_for_update()
+            ).first()
+            if row is None:
+                db.rollback()
+                return None
+            old = tuple(row)
+        calc = db.scalars(
+            update(Calculation)
+            .where(Calculation.id == calc_id)
+            .values(**update_data)
+            .returning(Calculation),
+            execution_options={"synchronize_session": False, "populate_existing": True},
+        ).first()
+        if calc is None:
+            db.rollback()
+            return None
+        if old is not None:
+            stats.record_updated(db, [(old, stats.snapshot(calc))])
+        return _commit_detached(db, calc)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def delete_calculation(db: Session, calc_id: int):
+    if not _supports(db, "delete_returning"):
+        return _delete_calculation_orm(db, calc_id)
+    try:
+        row = db.execute(
+            delete(Calculation)
+            .where(Calculation.id == calc_id)
+            .returning(Calculation.operation, Calculation.user_id, Calculation.result),
+            execution_options={"synchronize_session": False},
+        ).first()
+        if row is None:
+            db.rollback()
+            return False
+        stats.record_deleted(db, [tuple(row)])
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _create_calculation_orm(db: Session, values: dict):
+    db_calc = Calculation(**values)
     db.add(db_calc)
+    stats.record_created(db, [stats.snapshot(values)])
     db.commit()
     db.refresh(db_calc)
     return db_calc
 
 
-def update_calculation(db: Session, calc_id: int, updates: CalculationUpdate):
-    calc = get_calculation(db, calc_id)
+def _update_calculation_orm(db: Session, calc_id: int, update_data: dict):
+    calc = _get_calculation_for_write(db, calc_id)
     if not calc:
         return None
 
-    update_data = updates.model_dump(exclude_unset=True) if hasattr(updates, 'model_dump') else updates.dict(exclude_unset=True)
+    old = stats.snapshot(calc)
     for key, value in update_data.items():
         setattr(calc, key, value)
 
+    stats.record_updated(db, [(old, stats.snapshot(calc))])
     db.commit()
     db.refresh(calc)
     return calc
 
 
-def delete_calculation(db: Session, calc_id: int):
-    calc = get_calculation(db, calc_id)
+def _delete_calculation_orm(db: Session, calc_id: int):
+    calc = _get_calculation_for_write(db, calc_id)
     if not calc:
         return False
 
+    stats.record_deleted(db, [stats.snapshot(calc)])
     db.delete(calc)
     db.commit()
     return True
+
+
+def get_calculation_stats(db: Session, user_id: int | None = None):
+    """Per-operation rollup statistics (see app.stats)."""
+    return stats.get_stats(db, user_id)
+
+
+# ------------------------
+# BULK CALCULATION CRUD
+# ------------------------
+
+# Rows per INSERT/UPDATE/DELETE statement issued by the bulk functions.
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+
+def _chunks(items, size: int):
+    size = max(1, size)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _existing_snapshots(db: Session, ids) -> dict:
+    """Map each existing id to its rollup snapshot (operation, user_id, result)."""
+    rows = db.execute(
+        select(Calculation.id, Calculation.operation, Calculation.user_id, Calculation.result)
+        .where(Calculation.id.in_(ids))
+    )
+    return {row.id: (row.operation, row.user_id, row.result) for row in rows}
+
+
+def bulk_create_calculations(db: Session, calcs: list[CalculationCreate], chunk_size: int = BULK_CHUNK_SIZE):
+    """Insert many calculations in one transaction using multi-row INSERTs.
+
+    Returns the new ids in input order (None for every row when the backend
+    cannot return generated keys from a batched insert).
+    """
+    ids = []
+    supports_returning = db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order
+    try:
+        for chunk in _chunks(calcs, chunk_size):
+            rows = [calc.model_dump() for calc in chunk]
+            stats.record_created(db, [stats.snapshot(row) for row in rows])
+            if supports_returning:
+                stmt = insert(Calculation).returning(Calculation.id, sort_by_parameter_order=True)
+                ids.extend(db.scalars(stmt, rows).all())
+            else:
+                db.execute(insert(Calculation), rows)
+                ids.extend([None] * len(rows))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ids
+
+
+def bulk_update_calculations(db: Session, items: list[CalculationBulkUpdateItem], chunk_size: int = BULK_CHUNK_SIZE):
+    """Apply many partial updates in one transaction with executemany UPDATEs.
+
+    Returns a list of booleans aligned with ``items``: False when the id does
+    not exist.
+    """
+    found = []
+    try:
+        for chunk in _chunks(items, chunk_size):
+            existing = _existing_snapshots(db, [item.id for item in chunk])
+            rows = [item.model_dump(exclude_unset=True) for item in chunk if item.id in existing]
+            changes = []
+            for row in rows:
+                old = existing[row["id"]]
+                new = (row.get("operation", old[0]), old[1], row.get("result", old[2]))
+                changes.append((old, new))
+                existing[row["id"]] = new
+            stats.record_updated(db, changes)
+            # ORM bulk UPDATE by primary key; rows with different column sets
+            # are grouped into separate executemany batches by SQLAlchemy.
+            if rows:
+                db.execute(update(Calculation), rows)
+            found.extend(item.id in existing for item in chunk)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return found
+
+
+def bulk_delete_calculations(db: Session, ids: list[int], chunk_size: int = BULK_CHUNK_SIZE):
+    """Delete many calculations in one transaction with DELETE ... WHERE id IN.
+
+    Returns a list of booleans aligned with ``ids``: False when the id did not
+    exist.
+    """
+    found = []
+    try:
+        for chunk in _chunks(ids, chunk_size):
+            existing = _existing_snapshots(db, chunk)
+            if existing:
+                stats.record_deleted(db, existing.values())
+                db.execute(
+                    delete(Calculation).where(Calculation.id.in_(list(existing))),
+                    execution_options={"synchronize_session": False},
+                )
+            found.extend(calc_id in existing for calc_id in chunk)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return found
@@ -1,26 +1,175 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.requests import Request
 import os
+import threading
+import time
+
+from app import metrics
+from app.pool_stats import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from app.replicas import DATABASE_REPLICA_URLS, ReplicaSet, RoutingSession
 
 # Allow overriding the database URL via environment for CI or local runs.
 # Default to a file-based SQLite DB to avoid requiring Postgres to be running.
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
-engine_kwargs = {}
-if DATABASE_URL.startswith("sqlite"):
-	# sqlite needs this for multithreaded access in test scenarios
-	engine_kwargs["connect_args"] = {"check_same_thread": False}
+# Set USE_ASYNC_DB=1 to serve routes through an AsyncSession (aiosqlite for
+# SQLite, asyncpg for Postgres) instead of the threadpool-bound sync Session.
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "0").lower() in ("1", "true", "yes")
+
+
+
+def _env_bool(name: str, default: str) -> bool:
+	return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+# Connection pool tuning. Checkout waits and timeouts are recorded by the
+# instrumented pool classes and served at GET /system/db-pool.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "0")
+
+
+def pool_kwargs(url: str, async_: bool = False) -> dict:
+	"""Engine pool arguments for ``url`` built from the DB_POOL_* settings."""
+	kwargs = {"pool_pre_ping": POOL_PRE_PING, "pool_recycle": POOL_RECYCLE}
+	# in-memory SQLite relies on SQLAlchemy's single-connection pools
+	if ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+		return kwargs
+	kwargs.update({
+		"poolclass": InstrumentedAsyncQueuePool if async_ else InstrumentedQueuePool,
+		"pool_size": POOL_SIZE,
+		"max_overflow": POOL_MAX_OVERFLOW,
+		"pool_timeout": POOL_TIMEOUT,
+	})
+	return kwargs
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+	conn.info["query_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+	# Feeds db_query_duration_seconds and the per-request DB sub-timer
+	# served at /metrics. Registered on Engine so every engine (sync, the
+	# async engine's sync core, test engines) is covered.
+	metrics.record_db_time(time.perf_counter() - conn.info["query_start"])
+
+
+def engine_kwargs_for(url: str) -> dict:
+	"""``create_engine`` arguments for a sync URL (the primary or a replica)."""
+	kwargs = pool_kwargs(url)
+	if url.startswith("sqlite"):
+		# sqlite needs this for multithreaded access in test scenarios
+		kwargs["connect_args"] = {"check_same_thread": False}
+	return kwargs
+
+
+engine_kwargs = engine_kwargs_for(DATABASE_URL)
+
+# The engine is created on first use (get_engine(), get_db() or any access to
+# ``app.db.engine``) rather than at import, which keeps importing the app
+# cheap for fast cold starts. SessionLocal is bound at the same time.
+# With DATABASE_REPLICA_URLS set, sessions route replica-safe reads to the
+# replicas (see app.replicas); the replica engines are created with the
+# primary.
+SessionLocal = sessionmaker(
+	class_=RoutingSession if DATABASE_REPLICA_URLS else Session, autoflush=False, autocommit=False
+)
+replica_set = None
+_engine_lock = threading.Lock()
 
-engine = create_engine(DATABASE_URL, **engine_kwargs)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+def get_engine():
+	"""Return the process-wide sync engine, creating it on first call."""
+	global replica_set
+	engine = globals().get("engine")
+	if engine is None:
+		with _engine_lock:
+			engine = globals().get("engine")
+			if engine is None:
+				engine = create_engine(DATABASE_URL, **engine_kwargs)
+				if DATABASE_REPLICA_URLS:
+					replica_set = ReplicaSet(
+						[create_engine(url, **engine_kwargs_for(url)) for url in DATABASE_REPLICA_URLS]
+					)
+					SessionLocal.configure(bind=engine, replicas=replica_set)
+				else:
+					SessionLocal.configure(bind=engine)
+				globals()["engine"] = engine
+	return engine
+
+
+def __getattr__(name):
+	# module-level lazy attribute: ``app.db.engine`` / ``from app.db import engine``
+	if name == "engine":
+		return get_engine()
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 Base = declarative_base()
 
 
-def get_db():
-	"""FastAPI dependency that yields a SQLAlchemy Session and ensures it is closed."""
+def to_async_url(url: str) -> str:
+	"""Translate a sync database URL to the matching async driver URL."""
+	scheme, sep, rest = url.partition("://")
+	backend = scheme.split("+", 1)[0]
+	if backend == "sqlite":
+		return f"sqlite+aiosqlite{sep}{rest}"
+	if backend in ("postgres", "postgresql"):
+		return f"postgresql+asyncpg{sep}{rest}"
+	return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# The async engine is created on first use so the async driver (and
+# sqlalchemy.ext.asyncio itself) is only imported when async mode or an async
+# caller actually needs it.
+async_engine = None
+AsyncSessionLocal = None
+
+
+def get_async_engine():
+	"""Return the process-wide async engine, creating it on first call."""
+	global async_engine, AsyncSessionLocal
+	if async_engine is None:
+		from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+		async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_kwargs(ASYNC_DATABASE_URL, async_=True))
+		AsyncSessionLocal = async_sessionmaker(
+			bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+		)
+	return async_engine
+
+
+def get_db(request: Request = None):
+	"""FastAPI dependency that yields a SQLAlchemy Session and ensures it is closed.
+
+	With read replicas configured, a request carrying an
+	``X-Read-Your-Writes`` header is served entirely by the primary.
+	"""
+	get_engine()
 	db = SessionLocal()
+	if replica_set is not None and request is not None and request.headers.get("x-read-your-writes"):
+		db.primary_only = True
 	try:
 		yield db
 	finally:
 		db.close()
+
+
+async def get_async_db():
+	"""FastAPI dependency that yields an AsyncSession and ensures it is closed."""
+	get_async_engine()
+	async with AsyncSessionLocal() as db:
+		yield db
+
+
+# Dependency used by the routers; selected once from configuration. In sync
+# mode this is get_db itself, so existing dependency overrides keep working.
+get_session = get_async_db if USE_ASYNC_DB else get_db
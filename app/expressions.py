@@ -0,0 +1,202 @@
+"""
+Module: expressions.py
+
+Safe arithmetic expression evaluation.
+
+Expressions such as ``(a + b) * c / d`` are parsed with Python's ``ast``
+module (never ``eval``), checked against a small whitelist of node types and
+compiled into a postfix evaluation plan. Plans are cached in a bounded LRU
+keyed by the expression text, and a plan evaluates against many variable
+bindings in one column-wise pass using the kernels in ``app.operations``.
+
+Functions:
+- compile_expression(text) -> CompiledExpression: Parse and compile (cached).
+- evaluate(plan, columns, rows) -> (results, errors): Evaluate a plan over
+  columns of variable values.
+"""
+
+import ast
+import math
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.operations import NOT_FINITE_ERROR, OPERATIONS, Number, evaluate_columns
+
+EXPRESSION_CACHE_SIZE = int(os.getenv("EXPRESSION_CACHE_SIZE", "1024"))
+MAX_EXPRESSION_LENGTH = 1000
+MAX_EXPRESSION_DEPTH = 50
+
+_BINARY_OPS = {
+    ast.Add: "add",
+    ast.Sub: "subtract",
+    ast.Mult: "multiply",
+    ast.Div: "divide",
+}
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that are malformed or use unsupported syntax."""
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """A reusable evaluation plan.
+
+    ``instructions`` is a postfix program of ``("const", value)``,
+    ``("var", name)``, ``("neg", None)`` and ``(<operation>, None)`` steps,
+    where ``<operation>`` is a key of ``app.operations.OPERATIONS``.
+    """
+
+    text: str
+    instructions: Tuple[Tuple[str, object], ...]
+    variables: Tuple[str, ...]
+
+
+def _constant(value) -> float:
+    # Constants become floats here, so a literal (or a folded sub-expression)
+    # that does not fit in a finite float is rejected at compile time.
+    try:
+        value = float(value)
+    except OverflowError:
+        raise ExpressionError("Number in expression is too large") from None
+    if not math.isfinite(value):
+        raise ExpressionError("Number in expression is too large")
+    return ("const", value)
+
+
+def _compile_node(node, out: list, variables: list, depth: int):
+    # ``depth`` counts real nesting (parenthesised right operands and unary
+    # operators): a flat left-associative chain such as ``a + b + c`` is
+    # walked iteratively along its left spine and stays at one level.
+    if depth > MAX_EXPRESSION_DEPTH:
+        raise ExpressionError("Expression is nested too deeply")
+    chain = []
+    while isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        chain.append(node)
+        node = node.left
+    if chain:
+        _compile_node(node, out, variables, depth)
+        for binop in reversed(chain):
+            _compile_node(binop.right, out, variables, depth + 1)
+            op = _BINARY_OPS[type(binop.op)]
+            # fold constant sub-expressions at compile time (but leave x/0 to
+            # be reported per row at evaluation time)
+            if out[-1][0] == "const" and out[-2][0] == "const" and not (op == "divide" and out[-1][1] == 0):
+                b = out.pop()[1]
+                a = out.pop()[1]
+                out.append(_constant(OPERATIONS[op](a, b)))
+            else:
+                out.append((op, None))
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        _compile_node(node.operand, out, variables, depth + 1)
+        if isinstance(node.op, ast.USub):
+            if out[-1][0] == "const":
+                out.append(("const", -out.pop()[1]))
+            else:
+                out.append(("neg", None))
+    elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        out.append(_constant(node.value))
+    elif isinstance(node, ast.Name):
+        if node.id not in variables:
+            variables.append(node.id)
+        out.append(("var", node.id))
+    else:
+        raise ExpressionError(f"Unsupported syntax in expression: {type(node).__name__}")
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(text: str) -> CompiledExpression:
+    """
+    Parse and compile an arithmetic expression into a reusable plan.
+
+    Supported syntax: numbers, variable names, parentheses, unary +/- and the
+    binary operators + - * /. Results are cached by expression text.
+
+    Raises:
+    - ExpressionError: If the expression is empty, too long, nested too
+      deeply, unsupported or contains a number too large for a float.
+
+    Example:
+    >>> compile_expression("2 * 3 + x").instructions
+    (('const', 6.0), ('var', 'x'), ('add', None))
+    """
+    if not text or not text.strip():
+        raise ExpressionError("Expression is empty")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+    instructions: list = []
+    variables: list = []
+    _compile_node(tree.body, instructions, variables, 0)
+    return CompiledExpression(text=text, instructions=tuple(instructions), variables=tuple(variables))
+
+
+def evaluate(
+    plan: CompiledExpression, columns: Dict[str, Sequence[Number]], rows: int
+) -> Tuple[List[Optional[Number]], List[Optional[str]]]:
+    """
+    Evaluate a compiled plan over ``rows`` bindings in one column-wise pass.
+
+    Parameters:
+    - plan (CompiledExpression): The plan from compile_expression.
+    - columns (dict): Variable name -> column of ``rows`` values.
+    - rows (int): Number of bindings.
+
+    Returns:
+    - tuple: (results, errors) aligned with the bindings. A row whose
+      evaluation hit a division by zero or a non-finite value (overflow) has
+      a None result and an error.
+
+    Raises:
+    - ExpressionError: If a variable is missing or a column has the wrong length.
+
+    Example:
+    >>> evaluate(compile_expression("a / b"), {"a": [1, 1], "b": [2, 0]}, 2)
+    ([0.5, None], [None, 'Cannot divide by zero!'])
+    """
+    for name in plan.variables:
+        if name not in columns:
+            raise ExpressionError(f"Missing value for variable: {name}")
+        if len(columns[name]) != rows:
+            raise ExpressionError(f"Variable {name} must have {rows} values")
+
+    errors: List[Optional[str]] = [None] * rows
+    stack: List[List[Number]] = []
+    for op, arg in plan.instructions:
+        if op == "const":
+            stack.append([arg] * rows)
+        elif op == "var":
+            stack.append(list(columns[arg]))
+        elif op == "neg":
+            stack.append([-x for x in stack.pop()])
+        else:
+            b = stack.pop()
+            a = stack.pop()
+            results, step_errors = evaluate_columns(op, a, b)
+            for i, error in enumerate(step_errors):
+                if error is not None:
+                    # keep the first error and a placeholder value so
+                    # the rest of the column keeps flowing
+                    if errors[i] is None:
+                        errors[i] = error
+                    results[i] = 0.0
+            stack.append(results)
+
+    final = stack.pop()
+    for i, value in enumerate(final):
+        # e.g. a variable bound to inf, or the negation of one
+        if errors[i] is None and isinstance(value, float) and not math.isfinite(value):
+            errors[i] = NOT_FINITE_ERROR
+    return [None if error else value for value, error in zip(final, errors)], errors
+
+
+def cache_info() -> dict:
+    """Hit/miss statistics of the compiled-plan cache."""
+    info = compile_expression.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "maxsize": info.maxsize, "size": info.currsize}
+
@@ -0,0 +1,388 @@
+"""
+Module: idempotency.py
+
+``Idempotency-Key`` support for retried writes (``POST /calculations/`` and
+``POST /users/register``).
+
+The first request with a given key executes normally and its response
+(status, headers and body) is stored; retries with the same key and body get
+that response back, with ``Idempotent-Replayed: true``, without running the
+handler again (no second row, no second bcrypt hash). Responses are kept in
+a bounded in-process LRU (the fast path) and in the ``idempotency_keys``
+table, so retries that land on another replica, or arrive after a restart,
+are answered too.
+
+Concurrent duplicates wait for the execution already in flight: within a
+process they await it directly; across processes the table row acts as a
+lease (``IDEMPOTENCY_LOCK_TIMEOUT``) that other replicas poll until the
+response is stored, answering 409 after ``IDEMPOTENCY_WAIT_TIMEOUT``.
+
+Reusing a key with a different body is a 422. 5xx responses are not stored,
+so those requests can be retried.
+
+Nothing secret is stored: the request body is identified by an HMAC-SHA256
+fingerprint keyed with ``SECRET_KEY`` (a leaked row does not allow
+brute-forcing a registration password), and for ``TOKEN_ROUTES`` the access
+token in a stored response is replaced by its identity claims (user id and
+email); a replay mints a fresh token for the same user. Records expire after ``IDEMPOTENCY_TTL``
+seconds; expired rows are purged lazily.
+
+Settings (environment): ``IDEMPOTENCY_TTL`` (3600), ``IDEMPOTENCY_CACHE_SIZE``
+(10000), ``IDEMPOTENCY_DB`` (``1``), ``IDEMPOTENCY_LOCK_TIMEOUT`` (60),
+``IDEMPOTENCY_WAIT_TIMEOUT`` (30).
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.auth_cache import TTLCache
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "3600"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_DB = os.getenv("IDEMPOTENCY_DB", "1").lower() in ("1", "true", "yes")
+IDEMPOTENCY_LOCK_TIMEOUT = float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60"))
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "30"))
+
+IDEMPOTENT_ROUTES = frozenset({("POST", "/calculations/"), ("POST", "/users/register")})
+# routes answering {"access_token", "token_type"}; the token is never stored
+TOKEN_ROUTES = frozenset({("POST", "/users/register")})
+
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+PURGE_INTERVAL = 60.0
+
+# _try_reserve result: another process holds the lease
+_PENDING = object()
+
+
+class IdempotencyInProgress(RuntimeError):
+    """Raised when another replica is still executing the same key."""
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: tuple
+    body: bytes
+
+
+def _default_session_factory():
+    from app.db import SessionLocal, get_engine
+
+    get_engine()
+    return SessionLocal()
+
+
+class IdempotencyStore:
+    """In-memory LRU plus database table of completed idempotent responses."""
+
+    def __init__(
+        self,
+        ttl: float = IDEMPOTENCY_TTL,
+        cache_size: int = IDEMPOTENCY_CACHE_SIZE,
+        use_db: bool = IDEMPOTENCY_DB,
+        lock_timeout: float = IDEMPOTENCY_LOCK_TIMEOUT,
+        wait_timeout: float = IDEMPOTENCY_WAIT_TIMEOUT,
+        session_factory=None,
+    ):
+        self.ttl = ttl
+        self.cache = TTLCache(cache_size, ttl)
+        self.use_db = use_db
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.session_factory = session_factory or _default_session_factory
+        self._in_flight = {}
+        self._last_purge = 0.0
+        self.executions = 0
+        self.replays = 0
+        self.waits = 0
+        self.mismatches = 0
+
+    async def begin(self, key: str, fingerprint: str):
+        """Return the stored response for ``key``, or None when the caller
+        should execute the request (and then call ``complete``)."""
+        while True:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            # a duplicate of a request in flight in this process
+            self.waits += 1
+            await asyncio.shield(future)
+
+        self._in_flight[key] = asyncio.get_running_loop().create_future()
+        if not self.use_db:
+            return None
+        try:
+            stored = await self._reserve(key, fingerprint)
+        except BaseException:
+            self._finish(key, None)
+            raise
+        if stored is not None:
+            self.cache.set(key, stored)
+            self._finish(key, stored)
+        return stored
+
+    async def complete(self, key: str, stored: StoredResponse | None):
+        """Store the response (or, with None, give the key up for a retry)."""
+        try:
+            if stored is not None:
+                self.cache.set(key, stored)
+            if self.use_db:
+                await run_in_threadpool(self._store if stored is not None else self._release, key, stored)
+        except Exception as exc:
+            # the in-memory copy still answers retries reaching this process
+            logger.warning("Could not persist idempotency key %s: %s", key, exc)
+        finally:
+            self._finish(key, stored)
+
+    def _finish(self, key: str, stored):
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(stored)
+
+    async def _reserve(self, key: str, fingerprint: str):
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            result = await run_in_threadpool(self._try_reserve, key, fingerprint)
+            if result is not _PENDING:
+                return result
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress("A request with this Idempotency-Key is still in progress")
+            self.waits += 1
+            await asyncio.sleep(POLL_INTERVAL)
+
+    # ------------------------
+    # Database (sync, run in the threadpool)
+    # ------------------------
+
+    def _try_reserve(self, key: str, fingerprint: str):
+        now = time.time()
+        with self.session_factory() as db:
+            if now - self._last_purge >= PURGE_INTERVAL:
+                self._last_purge = now
+                db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+                db.commit()
+            for _ in range(2):
+                try:
+                    db.execute(insert(IdempotencyKey).values(
+                        key=key, fingerprint=fingerprint, expires_at=now + self.lock_timeout
+                    ))
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    db.rollback()
+                row = db.execute(select(IdempotencyKey).where(IdempotencyKey.key == key)).scalars().first()
+                if row is None:
+                    continue  # released in between; try to take it
+                if row.expires_at <= now:
+                    # an abandoned lease or an expired record
+                    db.execute(delete(IdempotencyKey).where(
+                        IdempotencyKey.key == key, IdempotencyKey.expires_at <= now
+                    ))
+                    db.commit()
+                    continue
+                if row.status_code is None:
+                    return _PENDING
+                return StoredResponse(
+                    row.fingerprint,
+                    row.status_code,
+                    tuple((k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(row.headers)),
+                    row.body,
+                )
+            return _PENDING
+
+    def _store(self, key: str, stored: StoredResponse):
+        headers = json.dumps([(k.decode("latin-1"), v.decode("latin-1")) for k, v in stored.headers])
+        with self.session_factory() as db:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(status_code=stored.status, headers=headers, body=stored.body,
+                        expires_at=time.time() + self.ttl)
+            )
+            db.commit()
+
+    def _release(self, key: str, _stored=None):
+        with self.session_factory() as db:
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+            ))
+            db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "replays": self.replays,
+            "waits": self.waits,
+            "mismatches": self.mismatches,
+            "cache": self.cache.stats(),
+        }
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _fingerprint(body: bytes) -> str:
+    """HMAC of a request body, so stored rows reveal nothing about it."""
+    from app.security import SECRET_KEY
+
+    return hmac.new(SECRET_KEY.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def _strip_token(body: bytes) -> bytes:
+    """Replace the access token in a token response with its identity claims."""
+    from app.security import decode_access_token
+
+    try:
+        payload = json.loads(body)
+        claims = decode_access_token(payload["access_token"])
+    except (TypeError, ValueError, KeyError):
+        return body
+    if not claims:
+        return body
+    claims = {k: v for k, v in claims.items() if k in ("sub", "email")}
+    return json.dumps({"token_claims": claims, "token_type": payload.get("token_type", "bearer")}).encode("utf-8")
+
+
+def _mint_token(body: bytes) -> bytes:
+    """Inverse of ``_strip_token``: issue a fresh token for the stored claims."""
+    from app.security import create_access_token
+
+    try:
+        payload = json.loads(body)
+        claims = payload["token_claims"]
+    except (TypeError, ValueError, KeyError):
+        return body
+    token = create_access_token(claims)
+    return json.dumps({"access_token": token, "token_type": payload["token_type"]}).encode("utf-8")
+
+
+def _error(status: int, message: str, headers=()):
+    body = json.dumps({"error": message}).encode("utf-8")
+    return StoredResponse("", status, ((b"content-type", b"application/json"), *headers), body)
+
+
+async def _send_response(send, response: StoredResponse, replayed: bool = False):
+    headers = [*response.headers, (b"content-length", str(len(response.body)).encode("latin-1"))]
+    if replayed:
+        headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": response.status, "headers": headers})
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    """
+    Pure ASGI middleware applying ``Idempotency-Key`` semantics to
+    ``routes`` (``(method, path)`` pairs). Requests without the header, or
+    to other routes, pass straight through.
+    """
+
+    def __init__(
+        self, app, routes=IDEMPOTENT_ROUTES, store: IdempotencyStore | None = None, token_routes=TOKEN_ROUTES
+    ):
+        self.app = app
+        self.routes = frozenset(routes)
+        self.store = store
+        self.token_routes = frozenset(token_routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        idempotency_key = None
+        for name, value in scope.get("headers", ()):
+            if name == b"idempotency-key":
+                idempotency_key = value.decode("latin-1").strip()
+                break
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_response(send, _error(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"))
+            return
+
+        store = self.store or idempotency_store
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        fingerprint = _fingerprint(body)
+        key = f'{scope["method"]} {scope["path"]} {idempotency_key}'
+        token_route = (scope["method"], scope["path"]) in self.token_routes
+
+        try:
+            stored = await store.begin(key, fingerprint)
+        except IdempotencyInProgress as exc:
+            await _send_response(send, _error(409, str(exc), ((b"retry-after", b"1"),)))
+            return
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                store.mismatches += 1
+                await _send_response(
+                    send, _error(422, "Idempotency-Key was already used with a different request body")
+                )
+                return
+            store.replays += 1
+            if token_route:
+                stored = StoredResponse(stored.fingerprint, stored.status, stored.headers, _mint_token(stored.body))
+            await _send_response(send, stored, replayed=True)
+            return
+
+        store.executions += 1
+        await self._execute(scope, body, send, store, key, fingerprint, token_route)
+
+    async def _execute(
+        self, scope, body: bytes, send, store: IdempotencyStore, key: str, fingerprint: str, token_route: bool
+    ):
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        start = None
+        response_body = []
+
+        async def capture_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if start is not None and start["status"] < 500:
+                headers = tuple((k, v) for k, v in start["headers"] if k.lower() != b"content-length")
+                response = b"".join(response_body)
+                if token_route:
+                    response = _strip_token(response)
+                stored = StoredResponse(fingerprint, start["status"], headers, response)
+        finally:
+            await store.complete(key, stored)
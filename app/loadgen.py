@@ -0,0 +1,372 @@
+"""
+Module: loadgen.py
+
+Reproducible load generator for the calculator API.
+
+Drives the app either in-process (through httpx's ASGI transport, no server
+needed) or against a running server (``--url``), with a weighted mix of
+request scenarios, and reports throughput, latency percentiles and error
+rates per scenario as text and optionally JSON.
+
+Two arrival models are supported:
+
+- closed loop (default): ``--concurrency`` workers each send the next
+  request as soon as the previous one completes.
+- open loop (``--rate N``): requests arrive on a fixed schedule of N per
+  second regardless of how fast responses come back, up to
+  ``--max-outstanding`` in flight (later arrivals are counted as dropped).
+  Latency is measured from the scheduled arrival time so queueing delay is
+  not hidden.
+
+Usage:
+
+    python -m app.loadgen --duration 10 --concurrency 20
+    python -m app.loadgen --rate 200 --mix add=5,calc_create=2,calc_get=3
+    python -m app.loadgen --url http://localhost:8000 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+DEFAULT_MIX = "add=3,subtract=1,multiply=1,divide=1,calc_create=2,calc_get=3,calc_list=1,calc_update=1,calc_delete=1"
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list (None if empty)."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(min(rank, len(sorted_values))) - 1]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse ``name=weight,...`` into a weight map, validating scenario names."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Weight for {name!r} must not be negative")
+    if not any(mix.values()):
+        raise ValueError("The request mix must have at least one positive weight")
+    return mix
+
+
+# ---------------------------
+# Scenarios
+# ---------------------------
+
+@dataclass
+class State:
+    """Shared between scenarios: ids of created rows and the test user."""
+
+    rng: random.Random
+    calc_ids: List[int] = field(default_factory=list)
+    email: str = ""
+    password: str = "loadgen-password"
+    token: str = ""
+
+
+def _arithmetic(route):
+    async def scenario(client, state):
+        return await client.post(route, json={"a": state.rng.uniform(-1e3, 1e3), "b": state.rng.uniform(1, 1e3)})
+    return scenario
+
+
+async def _calc_create(client, state):
+    a, b = state.rng.randint(0, 1000), state.rng.randint(0, 1000)
+    response = await client.post("/calculations/", json={"operation": "add", "number1": a, "number2": b, "result": a + b})
+    if response.status_code == 200:
+        state.calc_ids.append(response.json()["id"])
+    return response
+
+
+async def _calc_get(client, state):
+    if not state.calc_ids:
+        return await _calc_create(client, state)
+    return await client.get(f"/calculations/{state.rng.choice(state.calc_ids)}")
+
+
+async def _calc_list(client, state):
+    return await client.get("/calculations/", params={"limit": 50})
+
+
+async def _calc_update(client, state):
+    if not state.calc_ids:
+        return await _calc_create(client, state)
+    return await client.put(f"/calculations/{state.rng.choice(state.calc_ids)}", json={"result": state.rng.random()})
+
+
+async def _calc_delete(client, state):
+    if not state.calc_ids:
+        return await _calc_create(client, state)
+    calc_id = state.calc_ids.pop(state.rng.randrange(len(state.calc_ids)))
+    return await client.delete(f"/calculations/{calc_id}")
+
+
+async def _login(client, state):
+    return await client.post("/users/login", json={"email": state.email, "password": state.password})
+
+
+async def _register(client, state):
+    email = f"loadgen-{uuid.uuid4().hex[:12]}@example.com"
+    return await client.post("/users/register", json={"email": email, "password": state.password})
+
+
+async def _me(client, state):
+    return await client.get("/users/me", headers={"Authorization": f"Bearer {state.token}"})
+
+
+SCENARIOS = {
+    "add": _arithmetic("/add"),
+    "subtract": _arithmetic("/subtract"),
+    "multiply": _arithmetic("/multiply"),
+    "divide": _arithmetic("/divide"),
+    "calc_create": _calc_create,
+    "calc_get": _calc_get,
+    "calc_list": _calc_list,
+    "calc_update": _calc_update,
+    "calc_delete": _calc_delete,
+    "login": _login,
+    "register": _register,
+    "me": _me,
+}
+
+
+async def _setup(client, state):
+    """Register the user that login/me scenarios act as."""
+    state.email = f"loadgen-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/users/register", json={"email": state.email, "password": state.password})
+    if response.status_code != 200:
+        raise RuntimeError(f"Could not register load-test user: {response.status_code} {response.text}")
+    state.token = response.json()["access_token"]
+
+
+# ---------------------------
+# Runner
+# ---------------------------
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.dropped = 0
+
+    def record(self, name: str, latency: float, status: str, ok: bool):
+        self.latencies.setdefault(name, []).append(latency)
+        self.statuses.setdefault(name, {})
+        self.statuses[name][status] = self.statuses[name].get(status, 0) + 1
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+async def _issue(client, state, recorder: Recorder, name: str, started: float):
+    try:
+        response = await SCENARIOS[name](client, state)
+        status, ok = str(response.status_code), response.status_code < 400
+    except Exception as exc:  # transport errors count as failed requests
+        status, ok = type(exc).__name__, False
+    recorder.record(name, time.perf_counter() - started, status, ok)
+
+
+async def _closed_loop(client, state, recorder, names, weights, concurrency, deadline):
+    async def worker():
+        while time.perf_counter() < deadline:
+            name = state.rng.choices(names, weights)[0]
+            await _issue(client, state, recorder, name, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def _open_loop(client, state, recorder, names, weights, rate, max_outstanding, deadline):
+    interval = 1.0 / rate
+    tasks = set()
+    next_arrival = time.perf_counter()
+    while next_arrival < deadline:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_outstanding:
+            recorder.dropped += 1
+        else:
+            name = state.rng.choices(names, weights)[0]
+            task = asyncio.ensure_future(_issue(client, state, recorder, name, next_arrival))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_arrival += interval
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def _in_process_client():
+    import httpx
+
+    from app.db import Base, engine
+    from main import app
+
+    Base.metadata.create_all(bind=engine)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadgen")
+
+
+async def run(
+    mix: Dict[str, float],
+    duration: float = 10.0,
+    concurrency: int = 10,
+    rate: Optional[float] = None,
+    max_outstanding: int = 1000,
+    url: Optional[str] = None,
+    seed: int = 1,
+    timeout: float = 30.0,
+    client=None,
+) -> dict:
+    """Run one load test and return the report dict (see ``summarize``)."""
+    import httpx
+
+    owns_client = client is None
+    if client is None:
+        client = httpx.AsyncClient(base_url=url, timeout=timeout) if url else _in_process_client()
+    state = State(rng=random.Random(seed))
+    recorder = Recorder()
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    try:
+        if {"login", "me"} & set(names):
+            await _setup(client, state)
+        started = time.perf_counter()
+        deadline = started + duration
+        if rate:
+            await _open_loop(client, state, recorder, names, weights, rate, max_outstanding, deadline)
+        else:
+            await _closed_loop(client, state, recorder, names, weights, concurrency, deadline)
+        elapsed = time.perf_counter() - started
+    finally:
+        if owns_client:
+            await client.aclose()
+    config = {
+        "target": url or "in-process",
+        "mode": "open" if rate else "closed",
+        "duration_seconds": duration,
+        "concurrency": None if rate else concurrency,
+        "rate": rate,
+        "mix": mix,
+        "seed": seed,
+    }
+    return summarize(recorder, elapsed, config)
+
+
+def _latency_summary(latencies: List[float]) -> dict:
+    ordered = sorted(latencies)
+    summary = {f"p{pct:g}_ms": (percentile(ordered, pct) or 0.0) * 1000 for pct in PERCENTILES}
+    summary["mean_ms"] = sum(ordered) / len(ordered) * 1000 if ordered else 0.0
+    summary["max_ms"] = ordered[-1] * 1000 if ordered else 0.0
+    return summary
+
+
+def summarize(recorder: Recorder, elapsed: float, config: dict) -> dict:
+    scenarios = {}
+    all_latencies = []
+    for name, latencies in sorted(recorder.latencies.items()):
+        errors = recorder.errors.get(name, 0)
+        all_latencies.extend(latencies)
+        scenarios[name] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "error_rate": errors / len(latencies),
+            "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+            "statuses": recorder.statuses[name],
+            **_latency_summary(latencies),
+        }
+    total_errors = sum(recorder.errors.values())
+    total = {
+        "requests": len(all_latencies),
+        "errors": total_errors,
+        "error_rate": total_errors / len(all_latencies) if all_latencies else 0.0,
+        "dropped": recorder.dropped,
+        "throughput_rps": len(all_latencies) / elapsed if elapsed else 0.0,
+        "elapsed_seconds": elapsed,
+        **_latency_summary(all_latencies),
+    }
+    return {"config": config, "total": total, "scenarios": scenarios}
+
+
+def format_report(report: dict) -> str:
+    config, total = report["config"], report["total"]
+    load = f"rate {config['rate']}/s" if config["mode"] == "open" else f"concurrency {config['concurrency']}"
+    lines = [
+        f"target {config['target']}, {config['mode']} loop, {load}, {total['elapsed_seconds']:.1f}s",
+        f"{'scenario':<14}{'reqs':>8}{'err%':>7}{'rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'p99.9':>9}{'max':>9}",
+    ]
+    rows = list(report["scenarios"].items()) + [("TOTAL", total)]
+    for name, row in rows:
+        lines.append(
+            f"{name:<14}{row['requests']:>8}{row['error_rate'] * 100:>7.2f}{row['throughput_rps']:>9.1f}"
+            f"{row['p50_ms']:>9.2f}{row['p90_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['p99.9_ms']:>9.2f}{row['max_ms']:>9.2f}"
+        )
+    lines.append("latencies in ms")
+    if total["dropped"]:
+        lines.append(f"dropped arrivals (max outstanding reached): {total['dropped']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.loadgen", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", help="base URL of a running server (default: drive the app in-process)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to generate load")
+    parser.add_argument("--concurrency", type=int, default=10, help="workers in closed-loop mode")
+    parser.add_argument("--rate", type=float, help="arrivals per second; switches to open-loop mode")
+    parser.add_argument("--max-outstanding", type=int, default=1000, help="open-loop cap on in-flight requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted scenarios (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout against --url")
+    parser.add_argument("--json", dest="json_path", help="also write the report as JSON to this path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.concurrency < 1 or (args.rate is not None and args.rate <= 0) or args.duration <= 0:
+        parser.error("--concurrency, --rate and --duration must be positive")
+
+    report = asyncio.run(run(
+        mix,
+        duration=args.duration,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        max_outstanding=args.max_outstanding,
+        url=args.url,
+        seed=args.seed,
+        timeout=args.timeout,
+    ))
+    if not args.url:
+        from app.security import password_pool
+
+        password_pool.shutdown()
+
+    if args.json_path == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
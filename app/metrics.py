@@ -0,0 +1,261 @@
+"""Low-overhead request telemetry in Prometheus text format.
+
+Counters and histograms are kept in per-thread shards: a thread only ever
+writes to its own shard, so recording needs no locks. ``render()`` merges
+all shards when ``/metrics`` is scraped.
+
+Recorded series:
+
+* ``http_requests_total{method,route,status}``
+* ``http_requests_in_flight``
+* ``http_request_duration_seconds{method,route}`` (histogram)
+* ``http_request_db_seconds{method,route}`` / ``http_request_bcrypt_seconds``
+  (per-request sub-timers, histograms)
+* ``db_query_duration_seconds`` and ``bcrypt_duration_seconds{op}``
+  (histograms, fed by app.db and app.security)
+* ``recorder_lag_seconds`` / ``recorder_flush_seconds`` (histograms, fed by
+  the write-behind recorder in app.recorder)
+* ``admission_admitted_total{class}`` / ``admission_shed_total{class,reason}``
+  and ``admission_queue_wait_seconds{class}`` (app.admission)
+
+plus gauges for the password-hashing pool, connection pools and caches.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request accumulator of [db_seconds, bcrypt_seconds]. The list object is
+# shared with threadpool workers through context copying, so time recorded
+# there is attributed to the request that caused it.
+_request_timers: ContextVar = ContextVar("request_timers", default=None)
+
+
+class _Shard:
+    __slots__ = ("counters", "histograms", "gauges")
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+
+
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()
+
+
+def _shard() -> _Shard:
+    shard = getattr(_local, "shard", None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def inc(name: str, labels: tuple = (), value: float = 1):
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + value
+
+
+def add_gauge(name: str, labels: tuple = (), value: float = 1):
+    gauges = _shard().gauges
+    key = (name, labels)
+    gauges[key] = gauges.get(key, 0) + value
+
+
+def observe(name: str, labels: tuple, value: float):
+    histograms = _shard().histograms
+    key = (name, labels)
+    hist = histograms.get(key)
+    if hist is None:
+        # bucket counts (non-cumulative) + [sum, count]
+        hist = histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+    hist[bisect_left(LATENCY_BUCKETS, value)] += 1
+    hist[-2] += value
+    hist[-1] += 1
+
+
+def record_db_time(seconds: float):
+    observe("db_query_duration_seconds", (), seconds)
+    timers = _request_timers.get()
+    if timers is not None:
+        timers[0] += seconds
+
+
+def record_bcrypt_time(op: str, seconds: float):
+    observe("bcrypt_duration_seconds", (("op", op),), seconds)
+    timers = _request_timers.get()
+    if timers is not None:
+        timers[1] += seconds
+
+
+def reset():
+    """Drop all recorded values (used by tests)."""
+    with _shards_lock:
+        for shard in _shards:
+            shard.counters.clear()
+            shard.histograms.clear()
+            shard.gauges.clear()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts, status and latency."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        timers = [0.0, 0.0]
+        token = _request_timers.set(timers)
+        add_gauge("http_requests_in_flight", (), 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            add_gauge("http_requests_in_flight", (), -1)
+            _request_timers.reset(token)
+            route = scope.get("route")
+            # label by route template (not raw path) to bound cardinality
+            route_label = getattr(route, "path", None) or "unmatched"
+            labels = (("method", scope["method"]), ("route", route_label))
+            inc("http_requests_total", labels + (("status", str(status_holder[0])),))
+            observe("http_request_duration_seconds", labels, elapsed)
+            observe("http_request_db_seconds", labels, timers[0])
+            observe("http_request_bcrypt_seconds", labels, timers[1])
+
+
+# ---------------------------
+# Prometheus text rendering
+# ---------------------------
+
+_HELP = {
+    "http_requests_total": ("counter", "HTTP requests by route and status"),
+    "http_requests_in_flight": ("gauge", "HTTP requests currently being served"),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency"),
+    "http_request_db_seconds": ("histogram", "Database time spent per HTTP request"),
+    "http_request_bcrypt_seconds": ("histogram", "bcrypt time spent per HTTP request"),
+    "db_query_duration_seconds": ("histogram", "Database statement execution time"),
+    "bcrypt_duration_seconds": ("histogram", "bcrypt hash/verify CPU time"),
+    "recorder_lag_seconds": ("histogram", "Time from enqueue to commit of write-behind results"),
+    "recorder_flush_seconds": ("histogram", "Duration of write-behind batch inserts"),
+    "admission_admitted_total": ("counter", "Requests admitted by admission control"),
+    "admission_shed_total": ("counter", "Requests shed by admission control"),
+    "admission_queue_wait_seconds": ("histogram", "Time admitted requests waited for a slot"),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _merge():
+    counters, gauges, histograms = {}, {}, {}
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        for key, value in list(shard.counters.items()):
+            counters[key] = counters.get(key, 0) + value
+        for key, value in list(shard.gauges.items()):
+            gauges[key] = gauges.get(key, 0) + value
+        for key, hist in list(shard.histograms.items()):
+            merged = histograms.setdefault(key, [0] * len(hist))
+            for i, v in enumerate(list(hist)):
+                merged[i] += v
+    return counters, gauges, histograms
+
+
+def _component_gauges() -> dict:
+    """Point-in-time gauges from the hashing pool, DB pools and caches."""
+    from app import admission, auth_cache, db, expressions
+    from app.pool_stats import pool_status
+    from app.idempotency import idempotency_store
+    from app.recorder import result_recorder
+    from app.security import password_pool
+
+    values = {}
+    for key, value in password_pool.stats().items():
+        values[(f"password_hash_{key}", ())] = value
+    pools = {"sync": db.engine.pool}
+    if db.async_engine is not None:
+        pools["async"] = db.async_engine.pool
+    if db.replica_set is not None:
+        pools.update((replica.name, replica.engine.pool) for replica in db.replica_set.replicas)
+    for name, pool in pools.items():
+        for key, value in pool_status(pool).items():
+            if isinstance(value, (int, float)):
+                values[(f"db_pool_{key}", (("engine", name),))] = value
+    for cache, cache_stats in auth_cache.stats().items():
+        for key, value in cache_stats.items():
+            values[(f"auth_cache_{key}", (("cache", cache),))] = value
+    for key, value in expressions.cache_info().items():
+        values[(f"expression_cache_{key}", ())] = value
+    for key, value in result_recorder.stats().items():
+        if isinstance(value, (int, float)):
+            values[(f"recorder_{key}", ())] = value
+    for route_class, limiter_stats in admission.stats().items():
+        for key in ("limit", "in_flight", "queued"):
+            values[(f"admission_{key}", (("class", route_class),))] = limiter_stats[key]
+    for key, value in idempotency_store.stats().items():
+        if key != "cache":
+            values[(f"idempotency_{key}", ())] = value
+    return values
+
+
+def render() -> str:
+    counters, gauges, histograms = _merge()
+    gauges.update(_component_gauges())
+    lines = []
+    described = set()
+
+    def describe(name, kind=None, help_text=None):
+        if name in described:
+            return
+        described.add(name)
+        kind, help_text = _HELP.get(name, (kind or "gauge", help_text or name.replace("_", " ")))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name, "counter")
+        lines.append(f"{name}{_labels(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items(), key=lambda item: (item[0][0], item[0][1])):
+        describe(name)
+        lines.append(f"{name}{_labels(labels)} {float(value)}")
+    for (name, labels), hist in sorted(histograms.items()):
+        describe(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, hist):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(labels, (('le', '+Inf'),))} {hist[-1]}")
+        lines.append(f"{name}_sum{_labels(labels)} {hist[-2]}")
+        lines.append(f"{name}_count{_labels(labels)} {hist[-1]}")
+    return "\n".join(lines) + "\n"
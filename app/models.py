@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, func
+from sqlalchemy import (
+    Column, Integer, Float, String, DateTime, ForeignKey, Index, LargeBinary, Text, func, literal_column, text,
+)
 from sqlalchemy.orm import relationship
 from .db import Base
 
@@ -21,5 +23,56 @@ class Calculation(Base):
     operation = Column(String, nullable=False)
     result = Column(Float, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Row validators for conditional GETs (ETag / Last-Modified). The onupdate
+    # expressions are applied by every UPDATE issued through the table -- ORM
+    # flushes, update() statements and bulk updates by primary key alike;
+    # only raw SQL has to bump them itself.
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"),
+                     onupdate=literal_column("version") + 1)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
-    user = relationship("User", backref="calculations")
\ No newline at end of file
+    user = relationship("User", backref="calculations")
+
+    # Composite indexes let filtered keyset pages (WHERE col = ? AND id > ?
+    # ORDER BY id) be served as index range scans, in either direction.
+    # (user_id, operation, id) also serves plain (user_id, operation) lookups.
+    __table_args__ = (
+        Index("ix_calculations_operation_id", "operation", "id"),
+        Index("ix_calculations_user_id_id", "user_id", "id"),
+        Index("ix_calculations_user_id_operation_id", "user_id", "operation", "id"),
+    )
+
+
+class CalculationStat(Base):
+    """Incrementally maintained rollup of calculations per operation.
+
+    ``user_id`` 0 holds the totals across all calculations; other rows hold
+    per-user totals. Maintained by app.stats in the same transaction as every
+    calculation write.
+    """
+
+    __tablename__ = "calculation_stats"
+
+    operation = Column(String, primary_key=True)
+    user_id = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
+    result_count = Column(Integer, nullable=False, default=0)
+    result_sum = Column(Float, nullable=False, default=0.0)
+
+
+class IdempotencyKey(Base):
+    """Stored outcome of a request sent with an ``Idempotency-Key`` header.
+
+    A row with a NULL ``status_code`` is a lease held by the request that is
+    still executing. ``expires_at`` (epoch seconds) ends the lease or, once
+    the response is stored, the record itself. Maintained by app.idempotency.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    expires_at = Column(Float, nullable=False, index=True)
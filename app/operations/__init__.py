@@ -12,13 +12,19 @@ Functions:
 - subtract(a: Union[int, float], b: Union[int, float]) -> Union[int, float]: Returns the difference when b is subtracted from a.
 - multiply(a: Union[int, float], b: Union[int, float]) -> Union[int, float]: Returns the product of a and b.
 - divide(a: Union[int, float], b: Union[int, float]) -> float: Returns the quotient when a is divided by b. Raises ValueError if b is zero.
+- add_many / subtract_many / multiply_many / divide_many: Column-wise versions of the
+  above that evaluate two equally sized sequences in a single pass.
+- evaluate_batch(ops, a, b): Evaluates a mixed batch of operations, returning per-item
+  results and per-item errors (e.g. division by zero) without aborting the batch.
 
 Usage:
 These functions can be imported and used in other modules or integrated into APIs
 to perform arithmetic operations based on user input.
 """
 
-from typing import Union  # Import Union for type hinting multiple possible types
+import math
+import operator
+from typing import Dict, List, Optional, Sequence, Tuple, Union  # Import Union for type hinting multiple possible types
 
 # Define a type alias for numbers that can be either int or float
 Number = Union[int, float]
@@ -118,3 +124,144 @@ def divide(a: Number, b: Number) -> float:
     # Perform division of a by b and return the result as a float
     result = a / b
     return result
+
+
+# ---------------------------------------------
+# Vectorized (column-wise) kernels
+# ---------------------------------------------
+
+# Map of operation names (as used by the HTTP routes) to their scalar functions.
+OPERATIONS = {
+    "add": add,
+    "subtract": subtract,
+    "multiply": multiply,
+    "divide": divide,
+}
+
+DIVISION_BY_ZERO_ERROR = "Cannot divide by zero!"
+NOT_FINITE_ERROR = "Result is not finite"
+
+
+def add_many(a: Sequence[Number], b: Sequence[Number]) -> List[Number]:
+    """
+    Add two equally sized columns of numbers element by element.
+
+    Example:
+    >>> add_many([1, 2], [3, 4])
+    [4, 6]
+    """
+    return list(map(operator.add, a, b))
+
+
+def subtract_many(a: Sequence[Number], b: Sequence[Number]) -> List[Number]:
+    """
+    Subtract column b from column a element by element.
+
+    Example:
+    >>> subtract_many([5, 2], [3, 4])
+    [2, -2]
+    """
+    return list(map(operator.sub, a, b))
+
+
+def multiply_many(a: Sequence[Number], b: Sequence[Number]) -> List[Number]:
+    """
+    Multiply two equally sized columns of numbers element by element.
+
+    Example:
+    >>> multiply_many([2, 2.5], [3, 4])
+    [6, 10.0]
+    """
+    return list(map(operator.mul, a, b))
+
+
+def divide_many(a: Sequence[Number], b: Sequence[Number]) -> List[Optional[float]]:
+    """
+    Divide column a by column b element by element.
+
+    Unlike `divide`, a zero divisor does not raise: the corresponding slot in
+    the returned list is None so the rest of the column is still evaluated.
+
+    Example:
+    >>> divide_many([6, 5], [3, 0])
+    [2.0, None]
+    """
+    return [x / y if y != 0 else None for x, y in zip(a, b)]
+
+
+VECTOR_OPERATIONS = {
+    "add": add_many,
+    "subtract": subtract_many,
+    "multiply": multiply_many,
+    "divide": divide_many,
+}
+
+
+def evaluate_columns(
+    op: str, a: Sequence[Number], b: Sequence[Number]
+) -> Tuple[List[Optional[Number]], List[Optional[str]]]:
+    """
+    Evaluate a single operation over two columns in one pass.
+
+    Parameters:
+    - op (str): One of the keys of VECTOR_OPERATIONS.
+    - a, b (sequences of int or float): Operand columns of equal length.
+
+    Returns:
+    - tuple: (results, errors) lists aligned with the inputs. A failed item has
+      a None result and an error message; a successful item has a None error.
+      Division by zero and results that overflow to inf (or are NaN) fail
+      only their own item.
+
+    Raises:
+    - ValueError: If the operation is unknown or the columns differ in length.
+    """
+    kernel = VECTOR_OPERATIONS.get(op)
+    if kernel is None:
+        raise ValueError(f"Unknown operation: {op}")
+    if len(a) != len(b):
+        raise ValueError("Operand columns must have the same length")
+    results = kernel(a, b)
+    errors: List[Optional[str]] = [None] * len(results)
+    for i, r in enumerate(results):
+        if r is None:
+            errors[i] = DIVISION_BY_ZERO_ERROR
+        elif isinstance(r, float) and not math.isfinite(r):
+            results[i] = None
+            errors[i] = NOT_FINITE_ERROR
+    return results, errors
+
+
+def evaluate_batch(
+    ops: Sequence[str], a: Sequence[Number], b: Sequence[Number]
+) -> Tuple[List[Optional[Number]], List[Optional[str]]]:
+    """
+    Evaluate a mixed batch of (op, a, b) items.
+
+    Items are grouped by operation so each kernel runs once over its whole
+    column, then results are scattered back into the original item order.
+
+    Example:
+    >>> evaluate_batch(["add", "divide", "divide"], [1, 4, 1], [2, 2, 0])
+    ([3, 2.0, None], [None, None, 'Cannot divide by zero!'])
+    """
+    if not (len(ops) == len(a) == len(b)):
+        raise ValueError("ops, a and b must have the same length")
+    groups: Dict[str, List[int]] = {}
+    for index, op in enumerate(ops):
+        groups.setdefault(op, []).append(index)
+
+    results: List[Optional[Number]] = [None] * len(ops)
+    errors: List[Optional[str]] = [None] * len(ops)
+    for op, indexes in groups.items():
+        if op not in VECTOR_OPERATIONS:
+            for index in indexes:
+                errors[index] = f"Unknown operation: {op}"
+            continue
+        group_results, group_errors = evaluate_columns(
+            op, [a[i] for i in indexes], [b[i] for i in indexes]
+        )
+        for index, result, error in zip(indexes, group_results, group_errors):
+            results[index] = result
+            errors[index] = error
+    return results, errors
@@ -0,0 +1,83 @@
+"""
+Module: pages.py
+
+Static HTML pages rendered once and served from memory.
+
+The templates have no per-request content, so each is rendered a single
+time (at startup, or on first use) together with precompressed variants for
+every available content coding. Responses carry a strong ETag per variant,
+``Cache-Control`` and ``Vary: Accept-Encoding``; a matching
+``If-None-Match`` is answered with 304 and no body.
+"""
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app import compression, conditional
+
+PAGE_CACHE_CONTROL = os.getenv("PAGE_CACHE_CONTROL", "public, max-age=60")
+
+
+@dataclass(frozen=True)
+class Page:
+    body: bytes
+    etag: str
+    # coding -> (compressed body, etag)
+    variants: Dict[str, tuple] = field(default_factory=dict)
+    media_type: str = "text/html; charset=utf-8"
+
+    def etags(self):
+        return {self.etag, *(etag for _, etag in self.variants.values())}
+
+
+def build_page(body: bytes) -> Page:
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    variants = {}
+    for coding in compression.ENCODERS:
+        compressed = compression.compress(coding, body)
+        if len(compressed) < len(body):
+            variants[coding] = (compressed, f'"{digest}-{coding}"')
+    return Page(body=body, etag=f'"{digest}"', variants=variants)
+
+
+def page_response(request: Request, page: Page) -> Response:
+    coding = compression.negotiate(request.headers.get("accept-encoding"), list(page.variants))
+    body, etag = page.variants[coding] if coding else (page.body, page.etag)
+    headers = {"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if conditional.etag_matches(request.headers.get("if-none-match"), page.etags()):
+        return conditional.not_modified_response(headers)
+    if coding:
+        headers["Content-Encoding"] = coding
+    return Response(body, media_type=page.media_type, headers=headers)
+
+
+class PageCache:
+    """Render a directory's templates once and keep them in memory."""
+
+    def __init__(self, directory: str, names):
+        self.directory = directory
+        self.names = tuple(names)
+        self._pages: Optional[Dict[str, Page]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Page]:
+        if self._pages is None:
+            with self._lock:
+                if self._pages is None:
+                    from jinja2 import Environment, FileSystemLoader
+
+                    env = Environment(loader=FileSystemLoader(self.directory), autoescape=True)
+                    self._pages = {
+                        name: build_page(env.get_template(name).render().encode("utf-8"))
+                        for name in self.names
+                    }
+        return self._pages
+
+    def response(self, request: Request, name: str) -> Response:
+        return page_response(request, self.load()[name])
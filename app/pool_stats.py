@@ -0,0 +1,108 @@
+"""Connection pool instrumentation.
+
+``InstrumentedQueuePool`` / ``InstrumentedAsyncQueuePool`` time every
+connection checkout (including the wait for a free slot) and count checkout
+timeouts, so pools can be sized against real load.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger("app.db")
+
+# Upper bounds (seconds) of the checkout wait-time histogram buckets.
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Checkouts slower than this are logged as warnings.
+SLOW_CHECKOUT_SECONDS = float(os.getenv("DB_POOL_SLOW_CHECKOUT", "0.5"))
+
+
+class PoolStats:
+    """Checkout counters and a cumulative wait-time histogram."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_sum = 0.0
+        self.wait_seconds_max = 0.0
+        self.bucket_counts = [0] * len(WAIT_BUCKETS)
+
+    def record_checkout(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_sum += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if wait <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+        if wait >= SLOW_CHECKOUT_SECONDS:
+            logger.warning("Slow DB pool checkout: waited %.3fs", wait)
+
+    def record_timeout(self, wait: float):
+        with self._lock:
+            self.timeouts += 1
+        logger.warning("DB pool checkout timed out after %.3fs", wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative = 0
+            histogram = {}
+            for bound, count in zip(WAIT_BUCKETS, self.bucket_counts):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            histogram["+Inf"] = self.checkouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_sum": self.wait_seconds_sum,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_histogram": histogram,
+            }
+
+
+class _InstrumentedPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - start)
+            raise
+        self.stats.record_checkout(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool) -> dict:
+    """Live gauges plus checkout statistics for a pool."""
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "timeout_seconds": pool.timeout(),
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
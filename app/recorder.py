@@ -0,0 +1,352 @@
+"""
+Module: recorder.py
+
+Opt-in write-behind persistence of the stateless arithmetic routes
+(``/add``, ``/subtract``, ``/multiply``, ``/divide``).
+
+Routes push ``(operation, a, b, result)`` onto a bounded in-process queue and
+return immediately; a background task drains it into the ``calculations``
+table with multi-row INSERTs (``crud.bulk_create_calculations``, which also
+maintains the stats rollup) whenever ``RECORDER_BATCH_SIZE`` rows are
+waiting or ``RECORDER_FLUSH_INTERVAL`` seconds have passed. The lifespan
+flushes everything still queued on shutdown.
+
+When the queue is full ``RECORDER_OVERFLOW`` decides what happens:
+
+- ``drop`` (default): the row is discarded and counted.
+- ``block``: the request waits until the flusher makes room, for at most
+  twice ``RECORDER_FLUSH_INTERVAL``; after that the row is dropped and
+  counted (``block_timeouts``), so a stalled flusher cannot hang requests.
+- ``spill``: the row is appended to ``RECORDER_SPILL_PATH`` (NDJSON) and
+  inserted later, when the queue is idle or on shutdown. Rows from failed
+  flushes are spilled too, and a spill file left by a previous run is picked
+  up on start. Lines that cannot be parsed (e.g. truncated by a crash) are
+  moved to ``<RECORDER_SPILL_PATH>.bad`` instead of blocking the replay.
+  Spill file I/O runs in the threadpool, never on the event loop.
+
+An error inside the flusher loop is logged and the loop carries on after a
+short pause; if the task ends anyway it is logged, reported by ``stats()``
+and ``GET /ready`` (``healthy``), and restarted by the next ``record()``.
+
+Rows are persisted at most once but not guaranteed (a crash loses whatever
+is queued), which is the trade-off for keeping commits off the request path.
+Lag (enqueue to commit) is observed in the ``recorder_lag_seconds``
+histogram; counters are in ``stats()``.
+
+Settings (environment): ``RECORD_RESULTS`` (``0`` by default),
+``RECORDER_QUEUE_SIZE`` (10000), ``RECORDER_BATCH_SIZE`` (500),
+``RECORDER_FLUSH_INTERVAL`` (1.0), ``RECORDER_OVERFLOW``,
+``RECORDER_SPILL_PATH`` (``calculations-spill.ndjson``).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+
+logger = logging.getLogger(__name__)
+
+RECORD_RESULTS = os.getenv("RECORD_RESULTS", "0").lower() in ("1", "true", "yes")
+RECORDER_QUEUE_SIZE = int(os.getenv("RECORDER_QUEUE_SIZE", "10000"))
+RECORDER_BATCH_SIZE = int(os.getenv("RECORDER_BATCH_SIZE", "500"))
+RECORDER_FLUSH_INTERVAL = float(os.getenv("RECORDER_FLUSH_INTERVAL", "1.0"))
+RECORDER_OVERFLOW = os.getenv("RECORDER_OVERFLOW", "drop").lower()
+RECORDER_SPILL_PATH = os.getenv("RECORDER_SPILL_PATH", "calculations-spill.ndjson")
+
+OVERFLOW_POLICIES = ("drop", "block", "spill")
+
+
+def _default_session_factory():
+    from app.db import SessionLocal, get_engine
+
+    get_engine()
+    return SessionLocal()
+
+
+def _insert(session_factory, rows, chunk_size: int):
+    from app import crud
+    from app.schemas import CalculationCreate
+
+    calcs = [
+        CalculationCreate(operation=operation, number1=a, number2=b, result=result)
+        for operation, a, b, result, _ in rows
+    ]
+    with session_factory() as db:
+        crud.bulk_create_calculations(db, calcs, chunk_size)
+
+
+class ResultRecorder:
+    """Bounded queue plus background batch flusher for calculation results."""
+
+    def __init__(
+        self,
+        enabled: bool = RECORD_RESULTS,
+        max_queue: int = RECORDER_QUEUE_SIZE,
+        batch_size: int = RECORDER_BATCH_SIZE,
+        flush_interval: float = RECORDER_FLUSH_INTERVAL,
+        overflow: str = RECORDER_OVERFLOW,
+        spill_path: str = RECORDER_SPILL_PATH,
+        session_factory=None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, not {overflow!r}")
+        self.enabled = enabled
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.session_factory = session_factory or _default_session_factory
+        # how long a ``block`` producer may wait for room before dropping
+        self.block_timeout = max(2 * flush_interval, 0.1)
+        # serializes spill file appends, renames and rewrites across threads
+        self._spill_lock = threading.Lock()
+        self._queue = None
+        self._task = None
+        self._stopping = None
+        self.last_error = None
+        self.loop_errors = 0
+        self.restarts = 0
+        self.quarantined = 0
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.block_timeouts = 0
+        self.spilled = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.lag_seconds_max = 0.0
+        self.last_flush_at = None
+
+    # ------------------------
+    # Producer side
+    # ------------------------
+
+    async def record(self, operation: str, a: float, b: float, result: float):
+        """Queue one result for persistence; a no-op unless enabled."""
+        if not self.enabled:
+            return
+        if self._task is None or (self._task.done() and not self._stopping.is_set()):
+            self.start()
+        item = (operation, a, b, result, time.time())
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            if self.overflow == "block":
+                try:
+                    await asyncio.wait_for(self._queue.put(item), self.block_timeout)
+                except asyncio.TimeoutError:
+                    self.block_timeouts += 1
+                    self.dropped += 1
+                    return
+            elif self.overflow == "spill":
+                await self._spill([item])
+                return
+            else:
+                self.dropped += 1
+                return
+        self.enqueued += 1
+
+    async def _spill(self, rows):
+        await run_in_threadpool(self._write_spill, rows)
+
+    def _write_spill(self, rows):
+        # the file is only read back by the flusher after renaming it away
+        lines = [json.dumps(list(row)) + "\n" for row in rows]
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            self.spilled += len(rows)
+
+    # ------------------------
+    # Flusher
+    # ------------------------
+
+    def start(self):
+        """Start (or restart a dead) background flusher on the running event loop."""
+        if self._task is not None:
+            if not self._task.done():
+                return
+            # the flusher died; keep whatever is still queued
+            self.restarts += 1
+            logger.warning("Restarting the recorder flusher")
+        else:
+            self._queue = asyncio.Queue(self.max_queue)
+        self._stopping = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._task.add_done_callback(self._flusher_done)
+
+    def _flusher_done(self, task):
+        if self._stopping.is_set():
+            return
+        if task.cancelled():
+            exc, self.last_error = None, "flusher cancelled"
+        else:
+            exc = task.exception()
+            self.last_error = repr(exc) if exc is not None else "flusher exited"
+        logger.error("Recorder flusher stopped unexpectedly: %s", self.last_error, exc_info=exc)
+
+    @property
+    def healthy(self) -> bool:
+        """False while enabled but the flusher has died."""
+        if not self.enabled or self._task is None:
+            return True
+        return not self._task.done() or self._stopping.is_set()
+
+    async def stop(self):
+        """Flush everything queued (and spilled), then stop the flusher."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def _next_batch(self) -> list:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            if self._stopping.is_set():
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), min(remaining, 0.05)))
+            except asyncio.TimeoutError:
+                pass
+        return batch
+
+    async def _run(self):
+        while True:
+            try:
+                batch = await self._next_batch()
+                if batch:
+                    await self._flush(batch)
+                elif self.overflow == "spill":
+                    await self._replay_spill()
+            except Exception as exc:
+                # keep draining: a dead flusher would leave record() filling
+                # a queue nobody empties
+                self.loop_errors += 1
+                self.last_error = repr(exc)
+                logger.exception("Recorder flusher error")
+                if not self._stopping.is_set():
+                    await asyncio.sleep(min(self.flush_interval, 1.0))
+            if self._stopping.is_set() and self._queue.empty():
+                if self.overflow == "spill":
+                    try:
+                        await self._replay_spill()
+                    except Exception as exc:
+                        self.last_error = repr(exc)
+                        logger.exception("Recorder spill replay failed on shutdown")
+                return
+
+    async def _flush(self, rows, spill_on_error: bool = True) -> bool:
+        started = time.perf_counter()
+        try:
+            await run_in_threadpool(_insert, self.session_factory, rows, self.batch_size)
+        except Exception as exc:
+            self.flush_errors += 1
+            logger.warning("Recorder flush of %d rows failed: %s", len(rows), exc)
+            if not spill_on_error:
+                return False
+            if self.overflow == "spill":
+                await self._spill(rows)
+            else:
+                self.dropped += len(rows)
+            return False
+        now = time.time()
+        self.flushes += 1
+        self.flushed += len(rows)
+        self.last_flush_at = now
+        metrics.observe("recorder_flush_seconds", (), time.perf_counter() - started)
+        for row in rows:
+            lag = now - row[-1]
+            self.lag_seconds_max = max(self.lag_seconds_max, lag)
+            metrics.observe("recorder_lag_seconds", (), lag)
+        return True
+
+    def _read_spill(self, replay: str):
+        """Claim the spill file and parse it; unreadable lines go to ``.bad``.
+
+        Returns the parsed rows, or None when there is nothing to replay.
+        """
+        with self._spill_lock:
+            if not os.path.exists(replay):
+                if not os.path.exists(self.spill_path):
+                    return None
+                os.replace(self.spill_path, replay)
+        rows, bad = [], []
+        with open(replay, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = tuple(json.loads(line))
+                except (TypeError, ValueError):
+                    row = None
+                if row is None or len(row) != 5:
+                    bad.append(line if line.endswith("\n") else line + "\n")
+                else:
+                    rows.append(row)
+        if bad:
+            with self._spill_lock:
+                with open(self.spill_path + ".bad", "a", encoding="utf-8") as f:
+                    f.writelines(bad)
+                self.quarantined += len(bad)
+            logger.warning("Moved %d unreadable spill lines to %s.bad", len(bad), self.spill_path)
+        return rows
+
+    @staticmethod
+    def _rewrite_replay(replay: str, rows):
+        with open(replay, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(list(row)) + "\n" for row in rows)
+
+    async def _replay_spill(self):
+        replay = self.spill_path + ".replay"
+        rows = await run_in_threadpool(self._read_spill, replay)
+        if rows is None:
+            return
+        for start in range(0, len(rows), self.batch_size):
+            if not await self._flush(rows[start:start + self.batch_size], spill_on_error=False):
+                # keep what is left for the next attempt
+                await run_in_threadpool(self._rewrite_replay, replay, rows[start:])
+                return
+        await run_in_threadpool(os.remove, replay)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            "loop_errors": self.loop_errors,
+            "restarts": self.restarts,
+            "quarantined_spill_lines": self.quarantined,
+            "overflow": self.overflow,
+            "queue_limit": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "block_timeouts": self.block_timeouts,
+            "spilled": self.spilled,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "lag_seconds_max": self.lag_seconds_max,
+            "seconds_since_flush": time.time() - self.last_flush_at if self.last_flush_at else None,
+        }
+
+
+result_recorder = ResultRecorder()
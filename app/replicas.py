@@ -0,0 +1,189 @@
+"""
+Module: replicas.py
+
+Read-replica routing for the sync Session.
+
+With ``DATABASE_REPLICA_URLS`` set (comma-separated), ``app.db`` builds its
+sessions from ``RoutingSession``, whose ``get_bind`` sends a SELECT to a
+replica only when the statement opts in with the ``replica_ok`` execution
+option (set by the read-only CRUD functions such as ``get_calculation``,
+``get_user_by_email`` and the page readers). Everything else goes to the
+primary, and so does every statement of a session once it has written
+(read-your-writes within a request), or of a session created with
+``primary_only=True`` (``get_db`` does this for requests carrying an
+``X-Read-Your-Writes`` header, so a client can read back what it just
+wrote in an earlier request). A session keeps using the replica it picked
+first.
+
+A replica-safe read is just as safe on the primary, so a routed SELECT whose
+replica connection fails is retried on the next healthy replica, or on the
+primary when none is left, instead of failing the request.
+
+Replicas are chosen round-robin or by fewest checked-out connections
+(``DB_REPLICA_BALANCE``: ``round_robin`` | ``least_connections``). After
+``DB_REPLICA_MAX_FAILURES`` consecutive connection/operational errors a
+replica is ejected for ``DB_REPLICA_EJECT_SECONDS``, then tried again; with
+every replica ejected, reads fall back to the primary.
+
+The async engine (``USE_ASYNC_DB=1``) is not routed and always uses the
+primary.
+"""
+
+import itertools
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_BALANCE = os.getenv("DB_REPLICA_BALANCE", "round_robin").lower()
+DB_REPLICA_MAX_FAILURES = int(os.getenv("DB_REPLICA_MAX_FAILURES", "3"))
+DB_REPLICA_EJECT_SECONDS = float(os.getenv("DB_REPLICA_EJECT_SECONDS", "30"))
+
+BALANCE_STRATEGIES = ("round_robin", "least_connections")
+
+
+class Replica:
+    """One replica engine plus its health state."""
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.reads = 0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def checked_out(self) -> int:
+        checkedout = getattr(self.engine.pool, "checkedout", None)
+        return checkedout() if checkedout is not None else 0
+
+
+class ReplicaSet:
+    """Picks a healthy replica for each routed session."""
+
+    def __init__(self, engines, balance: str = DB_REPLICA_BALANCE, max_failures: int = DB_REPLICA_MAX_FAILURES,
+                 eject_seconds: float = DB_REPLICA_EJECT_SECONDS):
+        if balance not in BALANCE_STRATEGIES:
+            raise ValueError(f"balance must be one of {BALANCE_STRATEGIES}, not {balance!r}")
+        self.replicas = [Replica(f"replica{i}", engine) for i, engine in enumerate(engines)]
+        self.balance = balance
+        self.max_failures = max(1, max_failures)
+        self.eject_seconds = eject_seconds
+        self.fallbacks = 0
+        self._cycle = itertools.count()
+        self._lock = threading.Lock()
+        for replica in self.replicas:
+            self._watch(replica)
+
+    def _watch(self, replica: Replica):
+        @event.listens_for(replica.engine, "handle_error")
+        def _failed(context):
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+                self.record_failure(replica)
+
+        @event.listens_for(replica.engine, "after_cursor_execute")
+        def _succeeded(conn, cursor, statement, parameters, context, executemany):
+            if replica.failures:
+                replica.failures = 0
+
+    def record_failure(self, replica: Replica):
+        with self._lock:
+            replica.failures += 1
+            if replica.failures >= self.max_failures and replica.available(time.monotonic()):
+                replica.ejected_until = time.monotonic() + self.eject_seconds
+                replica.ejections += 1
+                # give it a fresh run of attempts once the ejection ends
+                replica.failures = 0
+
+    def choose(self, exclude=()):
+        """Return a healthy replica not in ``exclude``, or None to fall back to the primary."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.available(now) and replica not in exclude]
+            if not healthy:
+                self.fallbacks += 1
+                return None
+            if self.balance == "least_connections":
+                replica = min(healthy, key=Replica.checked_out)
+            else:
+                replica = healthy[next(self._cycle) % len(healthy)]
+            replica.reads += 1
+            return replica
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "balance": self.balance,
+            "fallbacks": self.fallbacks,
+            "replicas": {
+                replica.name: {
+                    "healthy": replica.available(now),
+                    "ejected_for_seconds": max(0.0, replica.ejected_until - now),
+                    "ejections": replica.ejections,
+                    "consecutive_failures": replica.failures,
+                    "sessions": replica.reads,
+                    "checked_out": replica.checked_out(),
+                }
+                for replica in self.replicas
+            },
+        }
+
+
+class RoutingSession(Session):
+    """Session routing ``replica_ok`` SELECTs to a ``ReplicaSet``."""
+
+    def __init__(self, *args, replicas: ReplicaSet | None = None, primary_only: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.primary_only = primary_only
+        self._replica = None
+        # replica that served the statement being executed, and replicas
+        # that failed during this session
+        self._routed = None
+        self._failed = set()
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if (clause is not None and getattr(clause, "is_dml", False)) or self._flushing:
+            # read-your-writes: this session stays on the primary from now on
+            self.primary_only = True
+        elif (
+            self.replicas is not None
+            and not self.primary_only
+            and clause is not None
+            and getattr(clause, "is_select", False)
+            and clause.get_execution_options().get("replica_ok")
+        ):
+            if self._replica is None or not self._replica.available(time.monotonic()):
+                self._replica = self.replicas.choose(exclude=self._failed)
+            if self._replica is not None:
+                self._routed = self._replica
+                return self._replica.engine
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def _is_replica_failure(error: exc.DBAPIError) -> bool:
+    return error.connection_invalidated or isinstance(error, exc.OperationalError)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _retry_failed_replica_reads(orm_execute_state):
+    session = orm_execute_state.session
+    if session.replicas is None or not orm_execute_state.is_select:
+        return None
+    while True:
+        session._routed = None
+        try:
+            return orm_execute_state.invoke_statement()
+        except exc.DBAPIError as error:
+            failed = session._routed
+            if failed is None or not _is_replica_failure(error):
+                raise
+            # the next attempt picks another replica, or the primary
+            session._failed.add(failed)
+            session._replica = None
@@ -0,0 +1,104 @@
+"""
+Module: responses.py
+
+Fast JSON response path.
+
+By default FastAPI validates a route's return value against its
+``response_model``, converts it with ``jsonable_encoder`` and then encodes it
+with ``json.dumps``. For large payloads (calculation pages, /batch results)
+that work dominates the request. In "fast" mode routes instead build plain
+dicts/lists (from row tuples or already-validated data) and return a
+``FastJSONResponse``, which encodes with orjson when it is installed.
+
+The mode is chosen per router from the environment:
+
+- ``JSON_RESPONSE_MODE``: ``default`` (the default) or ``fast`` for all
+  routers.
+- ``JSON_RESPONSE_MODE_<ROUTER>``: opt one router in (or out), e.g.
+  ``JSON_RESPONSE_MODE_CALCULATIONS=fast``. Router names are ``main``,
+  ``calculations``, ``users`` and ``system``.
+
+Like orjson and pydantic's JSON serializer, ``dumps`` encodes NaN and
+infinities as ``null``, so the output does not depend on whether orjson is
+installed.
+"""
+
+import json
+import math
+import os
+from typing import Iterable, Sequence
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency; fall back to the stdlib encoder
+    orjson = None
+
+JSON_RESPONSE_MODE = os.getenv("JSON_RESPONSE_MODE", "default").lower()
+
+
+def response_mode(router: str) -> str:
+    """Return ``"fast"`` or ``"default"`` for ``router``."""
+    mode = os.getenv(f"JSON_RESPONSE_MODE_{router.upper()}", JSON_RESPONSE_MODE).lower()
+    if mode not in ("fast", "default"):
+        raise ValueError(f"Unknown JSON response mode {mode!r} for router {router!r}")
+    return mode
+
+
+def use_fast_json(router: str) -> bool:
+    return response_mode(router) == "fast"
+
+
+def _finite(content):
+    if isinstance(content, float):
+        return content if math.isfinite(content) else None
+    if isinstance(content, dict):
+        return {key: _finite(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_finite(value) for value in content]
+    return content
+
+
+def dumps(content) -> bytes:
+    """Encode ``content`` (JSON-native types only) as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    try:
+        text = json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    except ValueError:
+        # NaN/inf somewhere: encode them as null, like orjson
+        text = json.dumps(_finite(content), ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes with orjson when available."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def response_class(router: str) -> type[JSONResponse]:
+    """Default response class for ``router`` according to its mode."""
+    return FastJSONResponse if use_fast_json(router) else JSONResponse
+
+
+def rows_response(columns: Sequence[str], rows: Iterable[Sequence], headers: dict | None = None) -> Response:
+    """Serialize row tuples as a JSON list of objects keyed by ``columns``."""
+    return FastJSONResponse([dict(zip(columns, row)) for row in rows], headers=headers)
+
+
+def rows_page_response(
+    columns: Sequence[str], rows: Iterable[Sequence], next_cursor, headers: dict | None = None
+) -> Response:
+    """Like ``rows_response`` but wrapped in a keyset page envelope
+    (``items``, ``next_cursor``, ``has_more``)."""
+    return FastJSONResponse(
+        {
+            "items": [dict(zip(columns, row)) for row in rows],
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        },
+        headers=headers,
+    )
@@ -1,42 +1,272 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import csv
+import hashlib
+import io
+import json
+from typing import Literal
 
-from app.db import get_db
-from app.schemas import CalculationCreate, CalculationRead, CalculationUpdate
-from app import crud
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-router = APIRouter(prefix="/calculations", tags=["Calculations"])
+from app.db import get_session
+from app.schemas import (
+    BulkResult,
+    CalculationBulkCreate,
+    CalculationBulkDelete,
+    CalculationBulkUpdate,
+    CalculationCreate,
+    CalculationPage,
+    CalculationRead,
+    CalculationStatRead,
+    CalculationUpdate,
+)
+from app import async_crud, conditional, crud, responses
+from app.routers.users import get_current_user
 
+# In fast mode list routes serialize row tuples directly (no ORM objects,
+# response_model validation or jsonable_encoder); see app.responses.
+FAST_JSON = responses.use_fast_json("calculations")
 
-@router.get("/", response_model=list[CalculationRead])
-def get_all(db: Session = Depends(get_db)):
-    return crud.get_all_calculations(db)
+router = APIRouter(
+    prefix="/calculations",
+    tags=["Calculations"],
+    default_response_class=responses.response_class("calculations"),
+)
+
+
+def _calculation_validators(row) -> dict:
+    """ETag / Last-Modified for one calculation (ORM object or version row)."""
+    return {"ETag": f'"{row.id}-{row.version}"', "Last-Modified": conditional.http_date(row.updated_at)}
+
+
+def _page_etag(rows, next_cursor) -> str:
+    # Changes whenever a row on the page is updated, added or removed. Pages
+    # get no Last-Modified: a deletion does not move the newest updated_at.
+    digest = hashlib.sha1(",".join(f"{row.id}:{row.version}" for row in rows).encode())
+    digest.update(f"|{next_cursor}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+async def _page_response(request: Request, response: Response, **page):
+    if "if-none-match" in request.headers:
+        # version-only lookup; a match skips loading and serializing the page
+        rows, next_cursor = await async_crud.get_calculation_versions_page(**page)
+        etag = _page_etag(rows, next_cursor)
+        if conditional.not_modified(request.headers, {etag}):
+            return conditional.not_modified_response({"ETag": etag})
+    if FAST_JSON:
+        rows, next_cursor = await async_crud.get_calculation_rows_page(**page)
+        headers = {"ETag": _page_etag(rows, next_cursor)}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = str(next_cursor)
+        return responses.rows_page_response(crud.READ_COLUMNS, rows, next_cursor, headers=headers)
+    items, next_cursor = await async_crud.get_calculations_page(**page)
+    response.headers["ETag"] = _page_etag(items, next_cursor)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return {"items": items, "next_cursor": next_cursor, "has_more": next_cursor is not None}
+
+
+@router.get("/", response_model=CalculationPage)
+async def get_all(
+    request: Request,
+    response: Response,
+    limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: int | None = Query(None, ge=0, description="Return calculations with id greater than this"),
+    operation: str | None = None,
+    user_id: int | None = None,
+    db=Depends(get_session),
+):
+    """Return one keyset page of calculations.
+
+    The body is ``{"items": [...], "next_cursor": ..., "has_more": ...}``;
+    while ``has_more`` is true, pass ``next_cursor`` as ``cursor`` to get the
+    next page (it is also sent in the ``X-Next-Cursor`` header). The page's
+    ETag can be sent back in ``If-None-Match`` to get a 304 while nothing on
+    it changed.
+    """
+    return await _page_response(
+        request, response, db=db, limit=limit, after_id=cursor, operation=operation, user_id=user_id
+    )
+
+
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _ndjson_encode(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(crud.EXPORT_COLUMNS, row)), separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def _csv_encode(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+async def _stream_export(db, fmt: str, chunk_size: int, operation: str | None, user_id: int | None):
+    # The response body is produced after the route returns, so the generator
+    # owns the session and closes it once streaming finishes (or is aborted).
+    try:
+        if fmt == "csv":
+            encode = _csv_encode
+            yield _csv_encode([crud.EXPORT_COLUMNS]).encode("utf-8")
+        else:
+            encode = _ndjson_encode
+        async for rows in async_crud.iter_calculation_chunks(db, chunk_size, operation=operation, user_id=user_id):
+            yield encode(rows).encode("utf-8")
+    finally:
+        await async_crud.close(db)
+
+
+@router.get("/export")
+async def export(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    chunk_size: int = Query(EXPORT_CHUNK_SIZE, ge=1, le=50_000),
+    operation: str | None = None,
+    user_id: int | None = None,
+    db=Depends(get_session),
+):
+    """Stream the full calculation history as NDJSON or CSV."""
+    return StreamingResponse(
+        _stream_export(db, format, chunk_size, operation, user_id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="calculations.{format}"'},
+    )
+
+
+@router.get("/mine", response_model=CalculationPage)
+async def get_mine(
+    request: Request,
+    response: Response,
+    limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: int | None = Query(None, ge=0, description="Return calculations older than this id"),
+    operation: str | None = None,
+    current_user=Depends(get_current_user),
+    db=Depends(get_session),
+):
+    """Return the authenticated user's calculations, newest first.
+
+    Served from the (user_id, id) / (user_id, operation, id) indexes; paged
+    like ``GET /calculations/``, with ``next_cursor`` pointing at the next
+    (older) page.
+    """
+    return await _page_response(
+        request, response, db=db, limit=limit, after_id=cursor, operation=operation, user_id=current_user.id,
+        newest_first=True,
+    )
+
+
+@router.post("/mine", response_model=CalculationRead)
+async def create_mine(calc: CalculationCreate, current_user=Depends(get_current_user), db=Depends(get_session)):
+    """Create a calculation owned by the authenticated user."""
+    return await async_crud.create_calculation(db, calc, user_id=current_user.id)
+
+
+@router.get("/mine/{calc_id}", response_model=CalculationRead)
+async def get_mine_one(calc_id: int, current_user=Depends(get_current_user), db=Depends(get_session)):
+    result = await async_crud.get_user_calculation(db, current_user.id, calc_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Calculation not found")
+    return result
+
+
+@router.get("/stats", response_model=list[CalculationStatRead])
+async def get_stats(user_id: int | None = None, db=Depends(get_session)):
+    """Count, result sum and average per operation, overall or for one user."""
+    return await async_crud.get_calculation_stats(db, user_id)
+
+
+MAX_BULK_ITEMS = 100_000
+
+BulkChunkSize = Query(crud.BULK_CHUNK_SIZE, ge=1, le=10_000, description="Rows per statement")
+
+
+def _check_bulk_size(count: int):
+    if count > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A bulk request may contain at most {MAX_BULK_ITEMS} items")
+
+
+def _bulk_result(ids, found, status: str):
+    return {
+        "items": [
+            {"id": calc_id, "status": status if ok else "not_found"}
+            for calc_id, ok in zip(ids, found)
+        ]
+    }
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create(body: CalculationBulkCreate, chunk_size: int = BulkChunkSize, db=Depends(get_session)):
+    """Insert many calculations in one transaction."""
+    _check_bulk_size(len(body.items))
+    ids = await async_crud.bulk_create_calculations(db, body.items, chunk_size)
+    return _bulk_result(ids, [True] * len(ids), "created")
+
+
+@router.put("/bulk", response_model=BulkResult)
+async def bulk_update(body: CalculationBulkUpdate, chunk_size: int = BulkChunkSize, db=Depends(get_session)):
+    """Apply many partial updates in one transaction."""
+    _check_bulk_size(len(body.items))
+    found = await async_crud.bulk_update_calculations(db, body.items, chunk_size)
+    return _bulk_result([item.id for item in body.items], found, "updated")
+
+
+@router.delete("/bulk", response_model=BulkResult)
+async def bulk_delete(body: CalculationBulkDelete, chunk_size: int = BulkChunkSize, db=Depends(get_session)):
+    """Delete many calculations in one transaction."""
+    _check_bulk_size(len(body.ids))
+    found = await async_crud.bulk_delete_calculations(db, body.ids, chunk_size)
+    return _bulk_result(body.ids, found, "deleted")
 
 
 @router.get("/{calc_id}", response_model=CalculationRead)
-def get_one(calc_id: int, db: Session = Depends(get_db)):
-    result = crud.get_calculation(db, calc_id)
+async def get_one(calc_id: int, request: Request, response: Response, db=Depends(get_session)):
+    """Return one calculation, with ETag / Last-Modified validators.
+
+    Conditional requests (``If-None-Match`` / ``If-Modified-Since``) are
+    checked against a version-only lookup and answered with 304 when the
+    calculation is unchanged.
+    """
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        row = await async_crud.get_calculation_version(db, calc_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Calculation not found")
+        validators = _calculation_validators(row)
+        if conditional.not_modified(request.headers, {validators["ETag"]}, row.updated_at):
+            return conditional.not_modified_response(validators)
+    result = await async_crud.get_calculation(db, calc_id)
     if not result:
         raise HTTPException(status_code=404, detail="Calculation not found")
+    response.headers.update(_calculation_validators(result))
     return result
 
 
 @router.post("/", response_model=CalculationRead)
-def create(calc: CalculationCreate, db: Session = Depends(get_db)):
-    return crud.create_calculation(db, calc)
+async def create(calc: CalculationCreate, response: Response, db=Depends(get_session)):
+    created = await async_crud.create_calculation(db, calc)
+    response.headers.update(_calculation_validators(created))
+    return created
 
 
 @router.put("/{calc_id}", response_model=CalculationRead)
-def update(calc_id: int, updates: CalculationUpdate, db: Session = Depends(get_db)):
-    updated = crud.update_calculation(db, calc_id, updates)
+async def update(calc_id: int, updates: CalculationUpdate, response: Response, db=Depends(get_session)):
+    updated = await async_crud.update_calculation(db, calc_id, updates)
     if not updated:
         raise HTTPException(status_code=404, detail="Calculation not found")
+    response.headers.update(_calculation_validators(updated))
     return updated
 
 
 @router.delete("/{calc_id}")
-def delete(calc_id: int, db: Session = Depends(get_db)):
-    success = crud.delete_calculation(db, calc_id)
+async def delete(calc_id: int, db=Depends(get_session)):
+    success = await async_crud.delete_calculation(db, calc_id)
     if not success:
         raise HTTPException(status_code=404, detail="Calculation not found")
     return {"message": "Deleted"}
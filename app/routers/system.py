@@ -0,0 +1,73 @@
+from fastapi import APIRouter
+
+from app import admission, auth_cache, db, expressions, responses
+from app.idempotency import idempotency_store
+from app.pool_stats import pool_status
+from app.recorder import result_recorder
+from app.routers import ws
+from app.security import password_pool
+
+router = APIRouter(prefix="/system", tags=["System"], default_response_class=responses.response_class("system"))
+
+
+@router.get("/password-hashing")
+def password_hashing_stats():
+    """Queue depth, wait time and throughput of the bcrypt hashing pool."""
+    return password_pool.stats()
+
+
+@router.get("/db-pool")
+def db_pool_stats():
+    """Checked-out connections, overflow and checkout wait times per engine."""
+    pools = {"sync": pool_status(db.engine.pool)}
+    if db.async_engine is not None:
+        pools["async"] = pool_status(db.async_engine.pool)
+    if db.replica_set is not None:
+        for replica in db.replica_set.replicas:
+            pools[replica.name] = pool_status(replica.engine.pool)
+    return pools
+
+
+@router.get("/auth-cache")
+def auth_cache_stats():
+    """Hit/miss counters of the token and user caches."""
+    return auth_cache.stats()
+
+
+@router.get("/expression-cache")
+def expression_cache_stats():
+    """Hit/miss counters of the compiled expression plan cache."""
+    return expressions.cache_info()
+
+
+@router.get("/websockets")
+def websocket_stats():
+    """Per-connection throughput of the WebSocket calculator channel."""
+    return ws.stats()
+
+
+@router.get("/recorder")
+def recorder_stats():
+    """Queue depth, throughput and lag of the write-behind result recorder."""
+    return result_recorder.stats()
+
+
+@router.get("/idempotency")
+def idempotency_stats():
+    """Executions, replays and waits of Idempotency-Key requests."""
+    return idempotency_store.stats()
+
+
+@router.get("/admission")
+def admission_stats():
+    """Limits, in-flight and queued requests and shed counts per route class."""
+    return admission.stats()
+
+
+@router.get("/replicas")
+def replica_stats():
+    """Health, ejections and routed sessions per read replica."""
+    db.get_engine()
+    if db.replica_set is None:
+        return {"replicas": {}}
+    return db.replica_set.stats()
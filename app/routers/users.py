@@ -1,39 +1,61 @@
 from fastapi import APIRouter, Depends, HTTPException, Header, status
-from sqlalchemy.orm import Session
 
-from app.db import get_db
+from app.db import get_session
 from app.schemas import UserCreate, UserLogin, UserRead
-from app import crud
+from app import async_crud, auth_cache, responses
 from app.schemas import Token
-from app.security import create_access_token, decode_access_token
+from app.security import (
+    PasswordHashingOverloaded,
+    create_access_token,
+    decode_access_token,
+    hash_password_async,
+)
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], default_response_class=responses.response_class("users"))
+
+
+def _hashing_unavailable(exc: PasswordHashingOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": "1"},
+    )
 
 
 @router.post("/register", response_model=Token)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    existing = crud.get_user_by_email(db, user.email)
+async def register_user(user: UserCreate, db=Depends(get_session)):
+    existing = await async_crud.get_user_by_email(db, user.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    created = crud.create_user(db, user)
+    try:
+        hashed = await hash_password_async(user.password)
+    except PasswordHashingOverloaded as exc:
+        raise _hashing_unavailable(exc)
+    created = await async_crud.create_user(db, user, hashed)
     # return a JWT containing the user id and email
     token = create_access_token({"sub": str(created.id), "email": created.email})
     return {"access_token": token, "token_type": "bearer"}
 
 
 @router.post("/login", response_model=Token)
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = crud.verify_user(db, user.email, user.password)
+async def login(user: UserLogin, db=Depends(get_session)):
+    try:
+        db_user = await async_crud.verify_user(db, user.email, user.password)
+    except PasswordHashingOverloaded as exc:
+        raise _hashing_unavailable(exc)
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_access_token({"sub": str(db_user.id), "email": db_user.email})
     return {"access_token": token, "token_type": "bearer"}
 
 
-def get_current_user(authorization: str | None = Header(None), db: Session = Depends(get_db)):
+async def get_current_user(authorization: str | None = Header(None), db=Depends(get_session)):
     """Simple dependency that extracts a Bearer token from the Authorization header,
-    decodes the JWT and returns the corresponding User from the database.
+    decodes the JWT and returns the corresponding user.
+
+    Verified tokens and user snapshots are served from ``app.auth_cache`` when
+    possible, so repeat requests skip both signature checks and the database.
     """
     if not authorization:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -41,22 +63,30 @@ def get_current_user(authorization: str | None = Header(None), db: Session = Dep
     if not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authorization header")
     token = authorization.split(" ", 1)[1]
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    sub = payload.get("sub")
-    if not sub:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    try:
-        user_id = int(sub)
-    except Exception:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user id in token")
-    user = crud.get_user_by_id(db, user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user_id = auth_cache.token_cache.get(token)
+    if user_id is None:
+        payload = decode_access_token(token)
+        if not payload:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        sub = payload.get("sub")
+        if not sub:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
+        try:
+            user_id = int(sub)
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user id in token")
+        auth_cache.cache_token(token, user_id, payload.get("exp"))
+
+    user = auth_cache.user_cache.get(user_id)
+    if user is None:
+        db_user = await async_crud.get_user_by_id(db, user_id)
+        if not db_user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = auth_cache.AuthenticatedUser.from_user(db_user)
+        auth_cache.user_cache.set(user_id, user)
     return user
 
 
 @router.get("/me", response_model=UserRead)
-def read_current_user(current_user=Depends(get_current_user)):
+async def read_current_user(current_user=Depends(get_current_user)):
     return current_user
@@ -0,0 +1,198 @@
+"""WebSocket calculator channel for high-frequency clients.
+
+Clients send text frames holding one ``{"id", "op", "a", "b"}`` message or a
+JSON array of them, and may keep sending without waiting for replies
+(pipelining). Every frame is answered, in order, with ``{"id", "result"}`` /
+``{"id", "error"}`` objects (an array for an array frame); ids are echoed
+back unchanged for correlation. ``{"id": ..., "op": "stats"}`` returns the
+connection's counters.
+
+Backpressure: up to ``WS_MAX_PENDING`` received frames are queued for
+evaluation; when the queue is full the server stops reading, so a client
+that outpaces the evaluator is throttled by the transport instead of growing
+server memory. Frames may carry at most ``WS_MAX_BATCH`` messages.
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+
+from app import metrics, responses
+from app.operations import VECTOR_OPERATIONS, evaluate_batch
+
+WS_MAX_PENDING = int(os.getenv("WS_MAX_PENDING", "64"))
+WS_MAX_BATCH = int(os.getenv("WS_MAX_BATCH", "1000"))
+
+router = APIRouter(tags=["WebSocket"])
+
+
+class ConnectionStats:
+    """Per-connection throughput counters."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.frames = 0
+        self.messages = 0
+        self.errors = 0
+        self.max_pending = 0
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "frames": self.frames,
+            "messages": self.messages,
+            "errors": self.errors,
+            "max_pending_frames": self.max_pending,
+            "seconds": elapsed,
+            "messages_per_second": self.messages / elapsed if elapsed else 0.0,
+        }
+
+
+# live connections, and totals folded in from closed ones
+_active: dict[int, ConnectionStats] = {}
+_closed = {"connections": 0, "frames": 0, "messages": 0, "errors": 0}
+
+
+def stats() -> dict:
+    """Active connection counters plus totals of closed connections."""
+    active = [s.snapshot() for s in list(_active.values())]
+    return {
+        "active_connections": len(active),
+        "active": active,
+        "closed": dict(_closed),
+        "max_pending_frames": WS_MAX_PENDING,
+        "max_batch": WS_MAX_BATCH,
+    }
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _finite_float(value):
+    """``value`` as a finite float, or None (e.g. a 400-digit integer)."""
+    try:
+        value = float(value)
+    except OverflowError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def evaluate_messages(messages: list) -> list[dict]:
+    """Evaluate a list of message dicts into reply dicts, in order.
+
+    Every message is validated before batching, so a malformed one only
+    fails its own reply.
+    """
+    replies: list = [None] * len(messages)
+    positions, ops, a, b = [], [], [], []
+    for index, message in enumerate(messages):
+        if not isinstance(message, dict):
+            replies[index] = {"id": None, "error": "Message must be an object"}
+            continue
+        msg_id = message.get("id")
+        op = message.get("op")
+        if not isinstance(op, str) or op not in VECTOR_OPERATIONS:
+            replies[index] = {"id": msg_id, "error": f"Unknown operation: {op}"}
+            continue
+        if not (_is_number(message.get("a")) and _is_number(message.get("b"))):
+            replies[index] = {"id": msg_id, "error": "Both a and b must be numbers."}
+            continue
+        value_a, value_b = _finite_float(message["a"]), _finite_float(message["b"])
+        if value_a is None or value_b is None:
+            replies[index] = {"id": msg_id, "error": "Both a and b must be finite numbers."}
+            continue
+        positions.append(index)
+        ops.append(op)
+        a.append(value_a)
+        b.append(value_b)
+
+    results, errors = evaluate_batch(ops, a, b)
+    for index, result, error in zip(positions, results, errors):
+        msg_id = messages[index].get("id")
+        # floats, like OperationResponse on the HTTP routes
+        replies[index] = {"id": msg_id, "error": error} if error else {"id": msg_id, "result": float(result)}
+    return replies
+
+
+def handle_frame(data, conn: ConnectionStats) -> bytes:
+    """Decode one frame, evaluate it and return the encoded reply."""
+    conn.frames += 1
+    try:
+        payload = json.loads(data)
+    except (TypeError, ValueError):
+        conn.errors += 1
+        return responses.dumps({"id": None, "error": "Invalid JSON"})
+
+    if isinstance(payload, dict) and payload.get("op") == "stats":
+        return responses.dumps({"id": payload.get("id"), "stats": conn.snapshot()})
+
+    if isinstance(payload, list):
+        if len(payload) > WS_MAX_BATCH:
+            conn.errors += 1
+            return responses.dumps({"id": None, "error": f"A frame may contain at most {WS_MAX_BATCH} messages"})
+        replies = reply = evaluate_messages(payload)
+    else:
+        replies = evaluate_messages([payload])
+        reply = replies[0]
+
+    failed = sum(1 for r in replies if "error" in r)
+    conn.messages += len(replies)
+    conn.errors += failed
+    metrics.inc("ws_messages_total", (), len(replies))
+    if failed:
+        metrics.inc("ws_errors_total", (), failed)
+    return responses.dumps(reply)
+
+
+@router.websocket("/ws/calculate")
+async def calculate_ws(websocket: WebSocket):
+    await websocket.accept()
+    conn = ConnectionStats()
+    _active[id(conn)] = conn
+    metrics.add_gauge("ws_connections", (), 1)
+    pending: asyncio.Queue = asyncio.Queue(maxsize=WS_MAX_PENDING)
+
+    async def reader():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                data = message.get("text")
+                if data is None:
+                    data = message.get("bytes")
+                # blocks while the queue is full: stop reading = backpressure
+                await pending.put(data)
+                conn.max_pending = max(conn.max_pending, pending.qsize())
+        finally:
+            # Never block here: after cancellation nobody may be draining the
+            # queue. If it is full, the sender sees the reader has finished
+            # once it has drained the queue.
+            try:
+                pending.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+    reader_task = asyncio.create_task(reader())
+    try:
+        while not (reader_task.done() and pending.empty()):
+            data = await pending.get()
+            if data is None or websocket.client_state == WebSocketState.DISCONNECTED:
+                break
+            await websocket.send_text(handle_frame(data, conn).decode("utf-8"))
+    except WebSocketDisconnect:
+        # the client went away mid-send; nothing left to answer
+        pass
+    finally:
+        reader_task.cancel()
+        del _active[id(conn)]
+        metrics.add_gauge("ws_connections", (), -1)
+        _closed["connections"] += 1
+        for key in ("frames", "messages", "errors"):
+            _closed[key] += getattr(conn, key)
@@ -54,9 +54,53 @@ class CalculationRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CalculationPage(BaseModel):
+    items: list[CalculationRead]
+    next_cursor: int | None
+    has_more: bool
+
+
+class CalculationStatRead(BaseModel):
+    operation: str
+    user_id: int | None
+    count: int
+    result_count: int
+    result_sum: float
+    result_avg: float | None
+
+
 class CalculationUpdate(BaseModel):
     operation: str | None = None
     number1: float | None = None
     number2: float | None = None
     result: float | None = None
 
+
+
+# --------------
+# BULK CALCULATIONS
+# --------------
+
+class CalculationBulkCreate(BaseModel):
+    items: list[CalculationCreate]
+
+
+class CalculationBulkUpdateItem(CalculationUpdate):
+    id: int
+
+
+class CalculationBulkUpdate(BaseModel):
+    items: list[CalculationBulkUpdateItem]
+
+
+class CalculationBulkDelete(BaseModel):
+    ids: list[int]
+
+
+class BulkItemResult(BaseModel):
+    id: int | None
+    status: str
+
+
+class BulkResult(BaseModel):
+    items: list[BulkItemResult]
@@ -1,11 +1,18 @@
 # app/security.py
+import asyncio
 import hashlib
 import bcrypt
+import multiprocessing
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import jwt
 
+from app import metrics
+
 # bcrypt has a 72-byte limit on the input. To safely support longer
 # passwords, we pre-hash the UTF-8 bytes with SHA-256 when the encoded
 # password exceeds 72 bytes. This behavior mirrors bcrypt_sha256 but
@@ -43,6 +50,143 @@ def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(pw, hashed.encode("utf-8"))
 
 
+# ---------------------------
+# Password hashing pool
+# ---------------------------
+
+# bcrypt is deliberately slow (~250 ms of CPU per call). Running it inline
+# pins a request worker for that long, so the async wrappers below hand the
+# work to a dedicated, bounded process pool instead. A worker count of 0 runs
+# hashing on a thread pool (useful on platforms where spawning processes is
+# undesirable).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "64"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+
+class PasswordHashingOverloaded(RuntimeError):
+    """Raised when the hashing queue is full or a job exceeds its timeout."""
+
+
+def _timed_call(fn, *args):
+    # Runs inside the worker: report when the job actually started and how
+    # long bcrypt took so the parent can separate queue wait from CPU time.
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time() - started
+
+
+class PasswordHasherPool:
+    """Bounded executor for bcrypt work with queue-depth and wait-time metrics."""
+
+    def __init__(self, workers: int, queue_limit: int, timeout: float):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.hash_seconds_total = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn avoids forking a process that already runs threads
+                    if self.workers > 0:
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(thread_name_prefix="password-hash")
+        return self._executor
+
+    def _release(self, job):
+        with self._lock:
+            self.in_flight -= 1
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` on the pool and await its result."""
+        with self._lock:
+            if self.in_flight >= self.queue_limit:
+                self.rejected += 1
+                raise PasswordHashingOverloaded("Password hashing queue is full")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        submitted = time.time()
+        try:
+            job = self._get_executor().submit(_timed_call, fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # A running job cannot be cancelled, so the slot is freed when the job
+        # itself finishes (or is cancelled while still queued), not when the
+        # caller stops waiting; in_flight then bounds the real backlog.
+        job.add_done_callback(self._release)
+        try:
+            result, started, elapsed = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordHashingOverloaded("Password hashing timed out")
+
+        wait = max(0.0, started - submitted)
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.hash_seconds_total += elapsed
+        metrics.record_bcrypt_time(getattr(fn, "__name__", "bcrypt"), elapsed)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "timeout_seconds": self.timeout,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - max(self.workers, 1)),
+                "max_in_flight": self.max_in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / self.completed if self.completed else 0.0,
+                "hash_seconds_total": self.hash_seconds_total,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordHasherPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT, PASSWORD_HASH_TIMEOUT)
+
+
+async def hash_password_async(password: str) -> str:
+    """Async-aware ``hash_password`` that runs on the hashing pool."""
+    _prepare_password_bytes(password)  # fail fast on bad input in the caller
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Async-aware ``verify_password`` that runs on the hashing pool."""
+    _prepare_password_bytes(password)
+    return await password_pool.run(verify_password, password, hashed)
+
+
 # ---------------------------
 # JWT helpers
 # ---------------------------
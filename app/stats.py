@@ -0,0 +1,202 @@
+"""Rollup statistics for calculations.
+
+Counts and result sums per operation (overall and per user) live in the
+``calculation_stats`` table and are adjusted by the CRUD write paths in the
+same transaction as the change itself, so reading them is a primary-key
+lookup instead of a scan of ``calculations``.
+
+Every function takes a sync Session first so async callers can use
+``AsyncSession.run_sync``.
+
+The startup warmup (``app.warmup``) calls ``ensure_table`` before serving: a missing
+``calculation_stats`` table (an existing deployment upgrading) is created and
+backfilled from ``calculations``. If that fails, ``GET /ready`` reports the
+table as missing. Recompute everything from scratch with::
+
+    python -m app.stats rebuild
+"""
+
+import logging
+import sys
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert, inspect, literal, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import Calculation, CalculationStat
+
+logger = logging.getLogger(__name__)
+
+# user_id of the rows holding totals across all users
+ALL_USERS = 0
+
+# "unchecked" until ensure_table has run, then "ok" or "missing: <error>"
+_table_status = "unchecked"
+
+
+def snapshot(calc) -> tuple:
+    """The fields the rollup depends on, from an ORM object or a mapping."""
+    if isinstance(calc, dict):
+        return calc.get("operation"), calc.get("user_id"), calc.get("result")
+    return calc.operation, calc.user_id, calc.result
+
+
+def _accumulate(deltas, snap: tuple, sign: int):
+    operation, user_id, result = snap
+    keys = [(operation, ALL_USERS)]
+    if user_id:
+        keys.append((operation, user_id))
+    for key in keys:
+        delta = deltas[key]
+        delta[0] += sign
+        if result is not None:
+            delta[1] += sign
+            delta[2] += sign * result
+
+
+def _apply(db: Session, deltas):
+    for (operation, user_id), (count, result_count, result_sum) in sorted(deltas.items()):
+        if not (count or result_count or result_sum):
+            continue
+        values = {
+            "count": CalculationStat.count + count,
+            "result_count": CalculationStat.result_count + result_count,
+            "result_sum": CalculationStat.result_sum + result_sum,
+        }
+        where = (CalculationStat.operation == operation) & (CalculationStat.user_id == user_id)
+        if db.execute(update(CalculationStat).where(where).values(values)).rowcount:
+            continue
+        try:
+            # savepoint so a concurrent insert of the same key doesn't abort
+            # the caller's transaction; fall back to the UPDATE in that case
+            with db.begin_nested():
+                db.execute(insert(CalculationStat).values(
+                    operation=operation,
+                    user_id=user_id,
+                    count=count,
+                    result_count=result_count,
+                    result_sum=result_sum,
+                ))
+        except IntegrityError:
+            db.execute(update(CalculationStat).where(where).values(values))
+
+
+def record_created(db: Session, snapshots):
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for snap in snapshots:
+        _accumulate(deltas, snap, 1)
+    _apply(db, deltas)
+
+
+def record_deleted(db: Session, snapshots):
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for snap in snapshots:
+        _accumulate(deltas, snap, -1)
+    _apply(db, deltas)
+
+
+def record_updated(db: Session, changes):
+    """``changes`` is an iterable of ``(old_snapshot, new_snapshot)`` pairs."""
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for old, new in changes:
+        if old != new:
+            _accumulate(deltas, old, -1)
+            _accumulate(deltas, new, 1)
+    _apply(db, deltas)
+
+
+def get_stats(db: Session, user_id: int | None = None):
+    """Rollup rows for all users (default) or a single user."""
+    rows = db.scalars(
+        select(CalculationStat)
+        .where(CalculationStat.user_id == (user_id or ALL_USERS), CalculationStat.count > 0)
+        .order_by(CalculationStat.operation)
+    ).all()
+    return [
+        {
+            "operation": row.operation,
+            "user_id": user_id,
+            "count": row.count,
+            "result_count": row.result_count,
+            "result_sum": row.result_sum,
+            "result_avg": row.result_sum / row.result_count if row.result_count else None,
+        }
+        for row in rows
+    ]
+
+
+def rebuild(db: Session):
+    """Recompute the whole rollup from the calculations table."""
+    columns = ["operation", "user_id", "count", "result_count", "result_sum"]
+    aggregates = (
+        func.count(),
+        func.count(Calculation.result),
+        func.coalesce(func.sum(Calculation.result), 0.0),
+    )
+    overall = select(Calculation.operation, literal(ALL_USERS), *aggregates).group_by(Calculation.operation)
+    per_user = (
+        select(Calculation.operation, Calculation.user_id, *aggregates)
+        .where(Calculation.user_id.is_not(None))
+        .group_by(Calculation.operation, Calculation.user_id)
+    )
+    try:
+        db.execute(delete(CalculationStat))
+        db.execute(insert(CalculationStat).from_select(columns, overall))
+        db.execute(insert(CalculationStat).from_select(columns, per_user))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _has_table(engine) -> bool:
+    return inspect(engine).has_table(CalculationStat.__tablename__)
+
+
+def ensure_table(engine) -> str:
+    """Create and backfill ``calculation_stats`` if it does not exist yet.
+
+    Returns (and remembers for ``table_status``) ``"ok"``, or
+    ``"missing: <error>"`` when the table could not be created.
+    """
+    global _table_status
+    try:
+        if not _has_table(engine):
+            try:
+                CalculationStat.__table__.create(bind=engine)
+            except SQLAlchemyError:
+                # another worker may have created it first
+                if not _has_table(engine):
+                    raise
+            else:
+                with Session(engine) as db:
+                    rebuild(db)
+                logger.info("Created and backfilled the calculation_stats table")
+        _table_status = "ok"
+    except SQLAlchemyError as exc:
+        logger.exception("calculation_stats table is missing and could not be created")
+        _table_status = f"missing: {type(exc).__name__}: {exc}"
+    return _table_status
+
+
+def table_status() -> str:
+    return _table_status
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["rebuild"]:
+        print("usage: python -m app.stats rebuild", file=sys.stderr)
+        return 2
+    from app.db import SessionLocal, engine
+
+    CalculationStat.__table__.create(bind=engine, checkfirst=True)
+    with SessionLocal() as db:
+        rebuild(db)
+        print(f"Rebuilt {db.query(CalculationStat).count()} calculation_stats rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
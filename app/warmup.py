@@ -0,0 +1,152 @@
+"""
+Module: warmup.py
+
+Startup warmup, run from the FastAPI lifespan before the app starts serving.
+
+Before the steps, the ``calculation_stats`` rollup table is created and
+backfilled if it is missing (``app.stats.ensure_table``); this runs even
+with ``WARMUP=0`` and its outcome is reported by ``status()``.
+
+Steps (each timed; failures are logged and recorded but do not block
+startup, since the app can still serve without them):
+
+- db_pool: open ``WARMUP_DB_CONNECTIONS`` pooled connections up front.
+- first_query: run the hot statements once so SQLAlchemy's compiled cache
+  is populated before the first request.
+- bcrypt: start every password-hashing worker with one real hash.
+- jwt: create and decode a token (PyJWT/crypto first-use cost).
+
+``status()`` backs the ``GET /ready`` readiness endpoint.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP", "1").lower() in ("1", "true", "yes")
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "0")) or None  # default: DB_POOL_SIZE
+
+_state = {"ready": False, "started_at": None, "seconds": None, "steps": {}, "errors": {}}
+
+
+def _prefill_pool(connections: int):
+    from app.db import get_engine
+
+    engine = get_engine()
+    held = []
+    try:
+        for _ in range(connections):
+            held.append(engine.connect())
+    finally:
+        for conn in held:
+            conn.close()
+
+
+async def _prefill_async_pool(connections: int):
+    from app.db import get_async_engine
+
+    engine = get_async_engine()
+    held = []
+    try:
+        for _ in range(connections):
+            held.append(await engine.connect())
+    finally:
+        for conn in held:
+            await conn.close()
+
+
+def _ensure_stats_table():
+    from app import stats
+    from app.db import get_engine
+
+    stats.ensure_table(get_engine())
+
+
+def _first_queries(db):
+    from app import crud, stats
+
+    crud.get_user_by_email(db, "warmup@invalid")
+    crud.get_calculation(db, 0)
+    crud.get_calculations_page(db, limit=1)
+    crud.get_calculation_rows_page(db, limit=1)
+    stats.get_stats(db)
+    db.rollback()
+
+
+def _first_queries_sync():
+    from app.db import SessionLocal, get_engine
+
+    get_engine()
+    with SessionLocal() as db:
+        _first_queries(db)
+
+
+async def _first_queries_async():
+    from app import db as app_db
+
+    app_db.get_async_engine()
+    async with app_db.AsyncSessionLocal() as db:
+        await db.run_sync(_first_queries)
+
+
+async def _warm_bcrypt():
+    from app.security import hash_password_async, password_pool
+
+    await asyncio.gather(*(hash_password_async("warmup") for _ in range(max(1, password_pool.workers))))
+
+
+def _warm_jwt():
+    from app.security import create_access_token, decode_access_token
+
+    decode_access_token(create_access_token({"sub": "warmup"}))
+
+
+async def _step(name: str, fn):
+    start = time.perf_counter()
+    try:
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+    except Exception as exc:
+        _state["errors"][name] = f"{type(exc).__name__}: {exc}"
+        logger.warning("Warmup step %s failed: %s", name, exc)
+    _state["steps"][name] = time.perf_counter() - start
+
+
+async def run():
+    """Run all warmup steps, then mark the app ready."""
+    from app.db import POOL_SIZE, USE_ASYNC_DB
+
+    _state.update(ready=False, started_at=time.time(), steps={}, errors={})
+    start = time.perf_counter()
+    await run_in_threadpool(_ensure_stats_table)
+    if WARMUP_ENABLED:
+        connections = WARMUP_DB_CONNECTIONS or POOL_SIZE
+        if USE_ASYNC_DB:
+            await _step("db_pool", lambda: _prefill_async_pool(connections))
+            await _step("first_query", _first_queries_async)
+        else:
+            await _step("db_pool", lambda: run_in_threadpool(_prefill_pool, connections))
+            await _step("first_query", lambda: run_in_threadpool(_first_queries_sync))
+        await _step("bcrypt", _warm_bcrypt)
+        await _step("jwt", _warm_jwt)
+    _state["seconds"] = time.perf_counter() - start
+    _state["ready"] = True
+    logger.info("Warmup finished in %.3fs: %s", _state["seconds"], _state["steps"])
+
+
+def status() -> dict:
+    from app import stats
+
+    return {
+        "ready": _state["ready"],
+        "warmup_seconds": _state["seconds"],
+        "steps": dict(_state["steps"]),
+        "errors": dict(_state["errors"]),
+        "calculation_stats": stats.table_status(),
+    }
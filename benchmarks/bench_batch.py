@@ -0,0 +1,77 @@
+# benchmarks/bench_batch.py
+
+"""
+Compare items/sec of the one-call-per-pair arithmetic routes against a single
+POST /batch request (both the {op, a, b} item form and the column form).
+
+Run from the project root:
+
+    python -m benchmarks.bench_batch --items 2000
+"""
+
+import argparse
+import random
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+OPS = ["add", "subtract", "multiply", "divide"]
+
+
+def make_pairs(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [(rng.choice(OPS), rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)) for _ in range(n)]
+
+
+def bench_per_pair(client: TestClient, pairs) -> float:
+    start = time.perf_counter()
+    for op, a, b in pairs:
+        client.post(f"/{op}", json={"a": a, "b": b})
+    return time.perf_counter() - start
+
+
+def bench_batch_items(client: TestClient, pairs) -> float:
+    payload = {"items": [{"op": op, "a": a, "b": b} for op, a, b in pairs]}
+    start = time.perf_counter()
+    response = client.post("/batch", json=payload)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.text
+    return elapsed
+
+
+def bench_batch_columns(client: TestClient, pairs) -> float:
+    columns = {}
+    for op, a, b in pairs:
+        col = columns.setdefault(op, {"a": [], "b": []})
+        col["a"].append(a)
+        col["b"].append(b)
+    start = time.perf_counter()
+    response = client.post("/batch", json={"columns": columns})
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.text
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000, help="number of (op, a, b) pairs")
+    args = parser.parse_args(argv)
+
+    pairs = make_pairs(args.items)
+    with TestClient(app) as client:
+        rows = [
+            ("per-pair routes", bench_per_pair(client, pairs)),
+            ("POST /batch items", bench_batch_items(client, pairs)),
+            ("POST /batch columns", bench_batch_columns(client, pairs)),
+        ]
+
+    baseline = rows[0][1]
+    print(f"{'mode':<22}{'seconds':>10}{'items/sec':>14}{'speedup':>10}")
+    for name, elapsed in rows:
+        print(f"{name:<22}{elapsed:>10.3f}{args.items / elapsed:>14.0f}{baseline / elapsed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_bulk.py
+
+"""
+Compare rows/sec of the single-row CRUD functions (one commit + refresh per
+row) against the set-based bulk functions, on a throwaway SQLite file.
+
+Run from the project root:
+
+    python -m benchmarks.bench_bulk --rows 5000 --chunk-size 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.models import Base
+from app.schemas import CalculationBulkUpdateItem, CalculationCreate, CalculationUpdate
+
+
+def make_session_factory(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def bench_single_row(Session, rows):
+    with Session() as db:
+        create_time, ids = timed(lambda: [crud.create_calculation(db, calc).id for calc in rows])
+        update_time, _ = timed(lambda: [crud.update_calculation(db, i, CalculationUpdate(result=0)) for i in ids])
+        delete_time, _ = timed(lambda: [crud.delete_calculation(db, i) for i in ids])
+    return create_time, update_time, delete_time
+
+
+def bench_bulk(Session, rows, chunk_size):
+    with Session() as db:
+        create_time, ids = timed(lambda: crud.bulk_create_calculations(db, rows, chunk_size))
+        items = [CalculationBulkUpdateItem(id=i, result=0) for i in ids]
+        update_time, _ = timed(lambda: crud.bulk_update_calculations(db, items, chunk_size))
+        delete_time, _ = timed(lambda: crud.bulk_delete_calculations(db, ids, chunk_size))
+    return create_time, update_time, delete_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=crud.BULK_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    rows = [CalculationCreate(operation="add", number1=i, number2=1, result=i + 1) for i in range(args.rows)]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session = make_session_factory(os.path.join(tmp, "single.db"))
+        single = bench_single_row(Session, rows)
+        engine.dispose()
+        engine, Session = make_session_factory(os.path.join(tmp, "bulk.db"))
+        bulk = bench_bulk(Session, rows, args.chunk_size)
+        engine.dispose()
+
+    print(f"{'operation':<10}{'single rows/s':>16}{'bulk rows/s':>16}{'speedup':>10}")
+    for name, s, b in zip(("create", "update", "delete"), single, bulk):
+        print(f"{name:<10}{args.rows / s:>16.0f}{args.rows / b:>16.0f}{s / b:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_json.py
+
+"""
+Serialization cost of a 10k-row calculation list, default vs fast path.
+
+- default: ORM objects -> response_model validation (from_attributes) ->
+  jsonable_encoder -> json.dumps, i.e. what FastAPI does for a route with
+  ``response_model=list[CalculationRead]``.
+- model_dump_json: the same validation, then pydantic-core encodes the
+  validated models directly (no jsonable_encoder).
+- fast rows: plain row tuples -> dicts -> FastJSONResponse (orjson when
+  installed), as the calculations router does in fast mode.
+
+Each variant is timed for serialization alone and for fetch + serialize
+from a scratch SQLite database.
+
+Run from the project root:
+
+    python -m benchmarks.bench_json --rows 10000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, responses
+from app.models import Base, Calculation
+from app.schemas import CalculationCreate, CalculationRead
+
+ADAPTER = TypeAdapter(list[CalculationRead])
+
+
+def encode_default(objects) -> bytes:
+    validated = ADAPTER.validate_python(objects, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def encode_model_dump_json(objects) -> bytes:
+    return ADAPTER.dump_json(ADAPTER.validate_python(objects, from_attributes=True))
+
+
+def encode_rows(rows) -> bytes:
+    return responses.rows_response(crud.READ_COLUMNS, rows).body
+
+
+def best_of(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'json.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            crud.bulk_create_calculations(db, [
+                CalculationCreate(operation="add", number1=i, number2=0.5, result=i + 0.5) for i in range(args.rows)
+            ])
+
+        orm_stmt = select(Calculation).order_by(Calculation.id)
+        rows_stmt = select(*(getattr(Calculation, c) for c in crud.READ_COLUMNS)).order_by(Calculation.id)
+
+        def fetch_objects():
+            with Session() as db:
+                return db.scalars(orm_stmt).all()
+
+        def fetch_rows():
+            with Session() as db:
+                return db.execute(rows_stmt).all()
+
+        objects, rows = fetch_objects(), fetch_rows()
+        assert len(encode_default(objects)) > 0
+        variants = {
+            "default": (lambda: encode_default(objects), lambda: encode_default(fetch_objects())),
+            "model_dump_json": (lambda: encode_model_dump_json(objects), lambda: encode_model_dump_json(fetch_objects())),
+            "fast rows": (lambda: encode_rows(rows), lambda: encode_rows(fetch_rows())),
+        }
+        timings = {name: (best_of(ser, args.repeats), best_of(full, args.repeats)) for name, (ser, full) in variants.items()}
+        engine.dispose()
+
+    encoder = "orjson" if responses.orjson is not None else "json (orjson not installed)"
+    print(f"{args.rows} rows, fast path encoder: {encoder}")
+    print(f"{'variant':<18}{'serialize ms':>14}{'speedup':>9}{'fetch+serialize ms':>20}{'speedup':>9}")
+    base_ser, base_full = timings["default"]
+    for name, (ser, full) in timings.items():
+        print(f"{name:<18}{ser * 1e3:>14.1f}{base_ser / ser:>8.1f}x{full * 1e3:>20.1f}{base_full / full:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_startup.py
+
+"""
+Cold-start cost of a new replica: import-time breakdown of ``main`` and the
+time until the lifespan warmup has finished and GET /ready answers 200.
+
+Each measurement runs in a fresh interpreter (so nothing is already
+imported), for the full app and for API_ONLY=1.
+
+Run from the project root:
+
+    python -m benchmarks.bench_startup --top 15 --runs 3
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READY_SCRIPT = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/ready").status_code == 200
+    ready = time.perf_counter()
+print(imported - start, ready - start)
+"""
+
+
+def _run(args, env_overrides) -> subprocess.CompletedProcess:
+    env = {**os.environ, **env_overrides}
+    return subprocess.run(
+        [sys.executable, *args], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def import_breakdown(env_overrides: dict, top: int):
+    """Top ``top`` modules by cumulative import time (ms) from ``-X importtime``."""
+    stderr = _run(["-X", "importtime", "-c", "import main"], env_overrides).stderr
+    rows = []
+    for line in stderr.splitlines():
+        # "import time:  <self us> | <cumulative us> | <indented module>"
+        parts = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2].rstrip()
+        rows.append((cumulative_us / 1000, self_us / 1000, name))
+    total = next((cum for cum, _, name in rows if name.strip() == "main"), 0.0)
+    return total, sorted(rows, reverse=True)[:top]
+
+
+def time_to_ready(env_overrides: dict, runs: int):
+    imports, readies = [], []
+    for _ in range(runs):
+        out = _run(["-c", READY_SCRIPT], env_overrides).stdout.strip().splitlines()[-1]
+        imported, ready = map(float, out.split())
+        imports.append(imported)
+        readies.append(ready)
+    return statistics.median(imports), statistics.median(readies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="modules to list in the import breakdown")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per time-to-ready measurement")
+    args = parser.parse_args(argv)
+
+    for label, env in (("full app", {"API_ONLY": "0"}), ("API_ONLY=1", {"API_ONLY": "1"})):
+        total, rows = import_breakdown(env, args.top)
+        print(f"== {label}: import main {total:.0f} ms")
+        print(f"{'cumulative ms':>14}{'self ms':>9}  module")
+        for cumulative, self_ms, name in rows:
+            print(f"{cumulative:>14.1f}{self_ms:>9.1f}  {name}")
+        imported, ready = time_to_ready(env, args.runs)
+        print(f"median of {args.runs}: import {imported * 1000:.0f} ms, ready (import + warmup) {ready * 1000:.0f} ms\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_write_path.py
+
+"""
+Round trips and latency per write operation, before (ORM unit of work:
+INSERT + COMMIT + refresh SELECT, SELECT + UPDATE/DELETE + COMMIT) and after
+(single INSERT/UPDATE/DELETE ... RETURNING statements).
+
+A round trip is any statement sent to the database plus each COMMIT. The
+calculation_stats rollup upkeep is included in both columns.
+
+Run from the project root:
+
+    python -m benchmarks.bench_write_path --rows 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.models import Base
+from app.schemas import CalculationCreate, CalculationUpdate
+
+
+class RoundTrips:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+
+    def _statement(self, *args):
+        self.count += 1
+
+    def _commit(self, conn):
+        self.count += 1
+
+
+def run(Session, counter, create, update, delete, rows):
+    results = {}
+    with Session() as db:
+        ids = []
+        for name, fn in (
+            ("create", lambda i: ids.append(create(db, rows[i]).id)),
+            ("update", lambda i: update(db, ids[i])),
+            ("delete", lambda i: delete(db, ids[i])),
+        ):
+            counter.count = 0
+            start = time.perf_counter()
+            for i in range(len(rows)):
+                fn(i)
+            elapsed = time.perf_counter() - start
+            results[name] = (counter.count / len(rows), elapsed / len(rows) * 1e6)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rows = [CalculationCreate(operation="add", number1=i, number2=1, result=i + 1) for i in range(args.rows)]
+    change = {"result": 0}
+
+    def before_create(db, calc):
+        return crud._create_calculation_orm(db, {**calc.model_dump(), "user_id": None})
+
+    variants = {
+        "before": (before_create,
+                   lambda db, i: crud._update_calculation_orm(db, i, change),
+                   crud._delete_calculation_orm),
+        "after": (crud.create_calculation,
+                  lambda db, i: crud.update_calculation(db, i, CalculationUpdate(**change)),
+                  crud.delete_calculation),
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (create, update, delete) in variants.items():
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, name + '.db')}")
+            Base.metadata.create_all(bind=engine)
+            counter = RoundTrips(engine)
+            results[name] = run(sessionmaker(bind=engine), counter, create, update, delete, rows)
+            engine.dispose()
+
+    print(f"{'operation':<10}{'round trips before':>20}{'after':>8}{'us/op before':>15}{'after':>10}")
+    for op in ("create", "update", "delete"):
+        (rt_b, us_b), (rt_a, us_a) = results["before"][op], results["after"][op]
+        print(f"{op:<10}{rt_b:>20.1f}{rt_a:>8.1f}{us_b:>15.0f}{us_a:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,679 @@
+# benchmarks/suite.py
+
+"""
+Micro-benchmarks for the hot paths: app.operations, CalculationFactory,
+password hashing, JWT helpers, every app.crud function against a scratch
+SQLite database, and the FastAPI routes through an in-process ASGI client.
+
+Each benchmark is calibrated so one repeat takes at least --min-time seconds,
+then timed --repeats times; the median time per call is what gets compared.
+Inputs are generated from fixed seeds and every run uses a fresh database,
+so two runs on the same machine measure the same work.
+
+Run from the project root:
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.suite --filter crud. --update-baseline
+    python -m benchmarks.suite compare bench.json benchmarks/baseline.json
+
+Every run also times a fixed pure-Python reference loop and stores it as
+``meta.calibration_ns``. When both result files carry it, the comparison is
+relative: each ratio is divided by the ratio of the two calibration timings,
+so a uniformly faster or slower machine does not show up as a change (pass
+--absolute to compare raw timings). Regenerate the stored baseline
+(--update-baseline) whenever a change is meant to move the numbers. The exit
+status is 1 when any benchmark is slower than the baseline by more than the
+threshold.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+SEED_ROWS = 1000
+
+
+@dataclass
+class Case:
+    """A benchmarked call. ``prepare(number)`` runs untimed before each repeat."""
+
+    fn: Callable[[], object]
+    prepare: Optional[Callable[[int], None]] = None
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+# ---------------------------
+# Timing and comparison
+# ---------------------------
+
+def _time_loop(case: Case, number: int) -> float:
+    if case.prepare is not None:
+        case.prepare(number)
+    fn = case.fn
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+def measure(case: Case, min_time: float = 0.05, repeats: int = 5, max_number: int = 1_000_000) -> dict:
+    """Calibrate the loop count, then return per-call timings in nanoseconds."""
+    number = 1
+    while True:
+        elapsed = _time_loop(case, number)
+        if elapsed >= min_time or number >= max_number:
+            break
+        # aim a little past min_time so the next probe usually suffices
+        number = min(max_number, max(number * 2, int(number * min_time * 1.2 / max(elapsed, 1e-9))))
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        samples = [_time_loop(case, number) / number * 1e9 for _ in range(repeats)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "median_ns": statistics.median(samples),
+        "min_ns": min(samples),
+        "stdev_ns": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeats": repeats,
+    }
+
+
+def calibrate(min_time: float = 0.05, repeats: int = 5) -> float:
+    """Fastest ns per call of a fixed pure-Python workload (machine speed).
+
+    The minimum is used because it is the least disturbed by other load.
+    """
+    def reference():
+        total = 0
+        for i in range(1000):
+            total += i * i % 7
+        return total
+
+    return measure(Case(reference), min_time=min_time, repeats=repeats)["min_ns"]
+
+
+def machine_factor(current: dict, baseline: dict) -> float:
+    """How much slower the current machine is than the baseline's (1.0 if unknown)."""
+    now = current.get("meta", {}).get("calibration_ns")
+    base = baseline.get("meta", {}).get("calibration_ns")
+    return now / base if now and base else 1.0
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD, relative: bool = True) -> dict:
+    """
+    Compare two result files by median time per call.
+
+    Returns a dict with ``rows`` (name, baseline_ns, current_ns, ratio,
+    status) plus the names that ``regressed``, ``improved`` or are only
+    present on one side (``added`` / ``missing``). A benchmark regresses when
+    its ratio > 1 + threshold and improves when it is below 1 / (1 +
+    threshold). With ``relative`` the ratio current / baseline is divided by
+    ``machine_factor`` (reported as ``machine_factor``).
+    """
+    current_results = current.get("results", {})
+    baseline_results = baseline.get("results", {})
+    factor = machine_factor(current, baseline) if relative else 1.0
+    report = {
+        "rows": [], "regressed": [], "improved": [], "added": [], "missing": [], "machine_factor": factor,
+    }
+    for name in sorted(set(current_results) | set(baseline_results)):
+        if name not in baseline_results:
+            report["added"].append(name)
+            continue
+        if name not in current_results:
+            report["missing"].append(name)
+            continue
+        base = baseline_results[name]["median_ns"]
+        now = current_results[name]["median_ns"]
+        ratio = now / base / factor if base else float("inf")
+        if ratio > 1 + threshold:
+            status = "regressed"
+        elif ratio < 1 / (1 + threshold):
+            status = "improved"
+        else:
+            status = "ok"
+        if status != "ok":
+            report[status].append(name)
+        report["rows"].append({"name": name, "baseline_ns": base, "current_ns": now, "ratio": ratio, "status": status})
+    return report
+
+
+def format_ns(ns: float) -> str:
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.0f} ns"
+
+
+def print_report(report: dict, threshold: float, out=None):
+    out = out or sys.stdout
+    print(f"{'benchmark':<40}{'baseline':>12}{'current':>12}{'ratio':>8}  status", file=out)
+    for row in report["rows"]:
+        print(
+            f"{row['name']:<40}{format_ns(row['baseline_ns']):>12}{format_ns(row['current_ns']):>12}"
+            f"{row['ratio']:>8.2f}  {row['status']}",
+            file=out,
+        )
+    for key in ("added", "missing"):
+        if report[key]:
+            print(f"{key}: {', '.join(report[key])}", file=out)
+    if report.get("machine_factor", 1.0) != 1.0:
+        print(f"ratios are relative to a machine factor of {report['machine_factor']:.2f}", file=out)
+    print(
+        f"{len(report['regressed'])} regressed, {len(report['improved'])} improved "
+        f"(threshold {threshold:.0%})",
+        file=out,
+    )
+
+
+# ---------------------------
+# Benchmark fixtures
+# ---------------------------
+
+class Context:
+    """Scratch database, seeded rows and an in-process ASGI client."""
+
+    def __init__(self, workdir: str):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+
+        from app import crud
+        from app.models import Base
+        from app.schemas import CalculationCreate, UserCreate
+        from app.security import hash_password
+
+        self.engine = create_engine(
+            f"sqlite:///{os.path.join(workdir, 'bench.db')}", connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine, autoflush=False)
+        self.db = self.Session()
+        self.rng = random.Random(1234)
+        self.counter = itertools.count()
+
+        self.password = "bench-password"
+        self.password_hash = hash_password(self.password)
+        self.user = crud.create_user(
+            self.db, UserCreate(email="bench@example.com", password=self.password), hashed_password=self.password_hash
+        )
+        self.calc_ids = crud.bulk_create_calculations(self.db, [
+            CalculationCreate(operation="add", number1=i, number2=1, result=i + 1) for i in range(SEED_ROWS)
+        ])
+        crud.bulk_create_calculations(self.db, [
+            CalculationCreate(operation="multiply", number1=i, number2=2, result=i * 2) for i in range(SEED_ROWS)
+        ], chunk_size=500)
+        for i in range(0, SEED_ROWS, 10):
+            crud.create_calculation(
+                self.db, CalculationCreate(operation="add", number1=i, number2=1, result=i + 1), user_id=self.user.id
+            )
+        self._loop = None
+        self._client = None
+
+    def unique_email(self) -> str:
+        return f"bench-{next(self.counter)}@example.com"
+
+    def fresh_ids(self, number: int) -> list:
+        """Create ``number`` throwaway rows (untimed) for delete benchmarks."""
+        from app import crud
+        from app.schemas import CalculationCreate
+
+        return crud.bulk_create_calculations(self.db, [
+            CalculationCreate(operation="scratch", number1=i, number2=1, result=i + 1) for i in range(number)
+        ])
+
+    @property
+    def client(self):
+        if self._client is None:
+            import logging
+
+            import httpx
+
+            from app.db import get_db
+            from main import app
+
+            def override_get_db():
+                db = self.Session()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            app.dependency_overrides[get_db] = override_get_db
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            self._loop = asyncio.new_event_loop()
+            self._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        return self._client
+
+    def request(self, method: str, url: str, **kwargs):
+        client = self.client
+        response = self._loop.run_until_complete(client.request(method, url, **kwargs))
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text}")
+        return response
+
+    def close(self):
+        if self._client is not None:
+            from app.db import get_db
+            from app.security import password_pool
+            from main import app
+
+            self._loop.run_until_complete(self._client.aclose())
+            self._loop.close()
+            app.dependency_overrides.pop(get_db, None)
+            password_pool.shutdown()
+        self.db.close()
+        self.engine.dispose()
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+
+@benchmark("operations.add")
+def _(ctx):
+    from app.operations import add
+    return Case(lambda: add(12.5, 7.25))
+
+
+@benchmark("operations.divide")
+def _(ctx):
+    from app.operations import divide
+    return Case(lambda: divide(12.5, 7.25))
+
+
+@benchmark("operations.evaluate_batch_1k")
+def _(ctx):
+    from app.operations import evaluate_batch
+    ops = [ctx.rng.choice(["add", "subtract", "multiply", "divide"]) for _ in range(1000)]
+    a = [ctx.rng.uniform(-100, 100) for _ in range(1000)]
+    b = [ctx.rng.uniform(-100, 100) for _ in range(1000)]
+    return Case(lambda: evaluate_batch(ops, a, b))
+
+
+@benchmark("factory.compute")
+def _(ctx):
+    from app.factory import CalculationFactory
+    return Case(lambda: CalculationFactory.compute("Multiply", 6, 7))
+
+
+@benchmark("security.hash_password")
+def _(ctx):
+    from app.security import hash_password
+    return Case(lambda: hash_password(ctx.password))
+
+
+@benchmark("security.verify_password")
+def _(ctx):
+    from app.security import verify_password
+    return Case(lambda: verify_password(ctx.password, ctx.password_hash))
+
+
+@benchmark("security.create_access_token")
+def _(ctx):
+    from app.security import create_access_token
+    return Case(lambda: create_access_token({"sub": str(ctx.user.id)}))
+
+
+@benchmark("security.decode_access_token")
+def _(ctx):
+    from app.security import create_access_token, decode_access_token
+    token = create_access_token({"sub": str(ctx.user.id)})
+    return Case(lambda: decode_access_token(token))
+
+
+@benchmark("crud.get_user_by_email")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.get_user_by_email(ctx.db, "bench@example.com"))
+
+
+@benchmark("crud.get_user_by_id")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.get_user_by_id(ctx.db, ctx.user.id))
+
+
+@benchmark("crud.create_user")
+def _(ctx):
+    from app import crud
+    from app.schemas import UserCreate
+    # hashing is benchmarked separately; pass a precomputed hash
+    return Case(lambda: crud.create_user(
+        ctx.db, UserCreate(email=ctx.unique_email(), password=ctx.password), hashed_password=ctx.password_hash
+    ))
+
+
+@benchmark("crud.verify_user")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.verify_user(ctx.db, "bench@example.com", ctx.password))
+
+
+@benchmark("crud.get_all_calculations")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.get_all_calculations(ctx.db))
+
+
+@benchmark("crud.get_calculations_page")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.get_calculations_page(ctx.db, limit=100, after_id=ctx.calc_ids[500], operation="add"))
+
+
+@benchmark("crud.get_calculation_rows_page")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.get_calculation_rows_page(ctx.db, limit=100, after_id=ctx.calc_ids[500], operation="add"))
+
+
+@benchmark("crud.get_calculation_versions_page")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.get_calculation_versions_page(ctx.db, limit=100, after_id=ctx.calc_ids[500]))
+
+
+@benchmark("crud.get_user_calculations_page")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.get_calculations_page(ctx.db, limit=50, user_id=ctx.user.id, newest_first=True))
+
+
+@benchmark("crud.iter_calculation_chunks")
+def _(ctx):
+    from app import crud
+    return Case(lambda: sum(len(rows) for rows in crud.iter_calculation_chunks(ctx.db, 500, operation="add")))
+
+
+@benchmark("crud.get_calculation")
+def _(ctx):
+    from app import crud
+    ids = ctx.calc_ids
+    return Case(lambda: crud.get_calculation(ctx.db, ids[next(ctx.counter) % len(ids)]))
+
+
+@benchmark("crud.get_calculation_version")
+def _(ctx):
+    from app import crud
+    ids = ctx.calc_ids
+    return Case(lambda: crud.get_calculation_version(ctx.db, ids[next(ctx.counter) % len(ids)]))
+
+
+@benchmark("crud.get_user_calculation")
+def _(ctx):
+    from app import crud
+    calc_id = crud.get_calculations_page(ctx.db, limit=1, user_id=ctx.user.id)[0][0].id
+    return Case(lambda: crud.get_user_calculation(ctx.db, ctx.user.id, calc_id))
+
+
+@benchmark("crud.create_calculation")
+def _(ctx):
+    from app import crud
+    from app.schemas import CalculationCreate
+    calc = CalculationCreate(operation="add", number1=1, number2=2, result=3)
+    return Case(lambda: crud.create_calculation(ctx.db, calc))
+
+
+@benchmark("crud.update_calculation")
+def _(ctx):
+    from app import crud
+    from app.schemas import CalculationUpdate
+    ids = ctx.calc_ids
+    return Case(lambda: crud.update_calculation(
+        ctx.db, ids[next(ctx.counter) % len(ids)], CalculationUpdate(result=float(next(ctx.counter)))
+    ))
+
+
+@benchmark("crud.delete_calculation")
+def _(ctx):
+    from app import crud
+    pending = []
+    return Case(
+        lambda: crud.delete_calculation(ctx.db, pending.pop()),
+        prepare=lambda number: pending.extend(ctx.fresh_ids(number)),
+    )
+
+
+@benchmark("crud.get_calculation_stats")
+def _(ctx):
+    from app import crud
+    return Case(lambda: crud.get_calculation_stats(ctx.db))
+
+
+@benchmark("crud.bulk_create_calculations_1k")
+def _(ctx):
+    from app import crud
+    from app.schemas import CalculationCreate
+    calcs = [CalculationCreate(operation="bulk", number1=i, number2=1, result=i + 1) for i in range(1000)]
+    return Case(lambda: crud.bulk_create_calculations(ctx.db, calcs))
+
+
+@benchmark("crud.bulk_update_calculations_1k")
+def _(ctx):
+    from app import crud
+    from app.schemas import CalculationBulkUpdateItem
+    items = [CalculationBulkUpdateItem(id=calc_id, result=0) for calc_id in ctx.calc_ids]
+    return Case(lambda: crud.bulk_update_calculations(ctx.db, items))
+
+
+@benchmark("crud.bulk_delete_calculations_1k")
+def _(ctx):
+    from app import crud
+    batches = []
+    return Case(
+        lambda: crud.bulk_delete_calculations(ctx.db, batches.pop()),
+        prepare=lambda number: batches.extend(ctx.fresh_ids(1000) for _ in range(number)),
+    )
+
+
+@benchmark("routes.post_add")
+def _(ctx):
+    return Case(lambda: ctx.request("POST", "/add", json={"a": 10, "b": 5}))
+
+
+@benchmark("routes.post_batch_1k")
+def _(ctx):
+    items = [{"op": "multiply", "a": i, "b": 2} for i in range(1000)]
+    return Case(lambda: ctx.request("POST", "/batch", json={"items": items}))
+
+
+@benchmark("routes.post_evaluate")
+def _(ctx):
+    bindings = [{"a": i, "b": 2, "c": 3} for i in range(100)]
+    return Case(lambda: ctx.request("POST", "/evaluate", json={"expression": "(a + b) * c", "bindings": bindings}))
+
+
+@benchmark("routes.get_calculations_page")
+def _(ctx):
+    return Case(lambda: ctx.request("GET", "/calculations/", params={"limit": 100}))
+
+
+@benchmark("routes.get_calculations_page_not_modified")
+def _(ctx):
+    params = {"limit": 100}
+    headers = {"If-None-Match": ctx.request("GET", "/calculations/", params=params).headers["etag"]}
+    return Case(lambda: ctx.request("GET", "/calculations/", params=params, headers=headers))
+
+
+@benchmark("routes.get_calculation")
+def _(ctx):
+    url = f"/calculations/{ctx.calc_ids[0]}"
+    return Case(lambda: ctx.request("GET", url))
+
+
+@benchmark("routes.get_calculation_not_modified")
+def _(ctx):
+    url = f"/calculations/{ctx.calc_ids[0]}"
+    headers = {"If-None-Match": ctx.request("GET", url).headers["etag"]}
+    return Case(lambda: ctx.request("GET", url, headers=headers))
+
+
+@benchmark("routes.create_calculation")
+def _(ctx):
+    body = {"operation": "add", "number1": 1, "number2": 2, "result": 3}
+    return Case(lambda: ctx.request("POST", "/calculations/", json=body))
+
+
+@benchmark("routes.bulk_create_calculations_100")
+def _(ctx):
+    body = {"items": [{"operation": "bulk", "number1": i, "number2": 1, "result": i + 1} for i in range(100)]}
+    return Case(lambda: ctx.request("POST", "/calculations/bulk", json=body))
+
+
+@benchmark("routes.get_stats")
+def _(ctx):
+    return Case(lambda: ctx.request("GET", "/calculations/stats"))
+
+
+@benchmark("routes.login")
+def _(ctx):
+    body = {"email": "bench@example.com", "password": ctx.password}
+    return Case(lambda: ctx.request("POST", "/users/login", json=body))
+
+
+@benchmark("routes.get_me")
+def _(ctx):
+    from app.security import create_access_token
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(ctx.user.id)})}"}
+    return Case(lambda: ctx.request("GET", "/users/me", headers=headers))
+
+
+# ---------------------------
+# Command line
+# ---------------------------
+
+def _metadata(calibration_ns: float | None = None) -> dict:
+    import sqlalchemy
+
+    return {
+        "calibration_ns": calibration_ns,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run(patterns=None, min_time: float = 0.05, repeats: int = 5, out=None) -> dict:
+    """Run the selected benchmarks and return a result document."""
+    out = out or sys.stdout
+    selected = [
+        name for name in BENCHMARKS
+        if not patterns or any(fnmatch.fnmatch(name, p) or name.startswith(p) for p in patterns)
+    ]
+    results = {}
+    calibration_ns = calibrate(min_time=min_time, repeats=repeats)
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = Context(workdir)
+        try:
+            for name in selected:
+                results[name] = measure(BENCHMARKS[name](ctx), min_time=min_time, repeats=repeats)
+                print(f"{name:<40}{format_ns(results[name]['median_ns']):>12}", file=out)
+        finally:
+            ctx.close()
+    # once more at the end, so a noisy start does not skew the factor
+    calibration_ns = min(calibration_ns, calibrate(min_time=min_time, repeats=repeats))
+    return {"meta": _metadata(calibration_ns), "results": results}
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write(path: str, document: dict):
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "compare":
+        parser = argparse.ArgumentParser(prog="python -m benchmarks.suite compare")
+        parser.add_argument("current")
+        parser.add_argument("baseline")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+        parser.add_argument("--absolute", action="store_true", help="compare raw timings (no machine factor)")
+        args = parser.parse_args(argv[1:])
+        report = compare(_load(args.current), _load(args.baseline), args.threshold, relative=not args.absolute)
+        print_report(report, args.threshold)
+        return 1 if report["regressed"] else 0
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", action="append", help="run benchmarks matching this prefix or glob (repeatable)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per timed repeat")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline median (default 0.25)")
+    parser.add_argument("--absolute", action="store_true", help="compare raw timings (no machine factor)")
+    parser.add_argument("--update-baseline", action="store_true", help="merge these results into the baseline")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    document = run(args.filter, min_time=args.min_time, repeats=args.repeats)
+    if args.output:
+        _write(args.output, document)
+
+    if args.update_baseline:
+        baseline = _load(args.baseline) if os.path.exists(args.baseline) else {"results": {}}
+        baseline["meta"] = document["meta"]
+        baseline["results"].update(document["results"])
+        _write(args.baseline, baseline)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    baseline = _load(args.baseline)
+    if args.filter:
+        # only compare what was selected
+        baseline["results"] = {
+            name: value for name, value in baseline["results"].items() if name in document["results"]
+        }
+    report = compare(document, baseline, args.threshold, relative=not args.absolute)
+    print()
+    print_report(report, args.threshold)
+    return 1 if report["regressed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,106 @@
 # main.py
 
+import time
+
+_import_started = time.perf_counter()
+
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
-from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel, Field, field_validator  # Use @validator for Pydantic 1.x
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Literal
+from pydantic import BaseModel, Field, field_validator, model_validator  # Use @validator for Pydantic 1.x
 from fastapi.exceptions import RequestValidationError
 from app.operations import add, subtract, multiply, divide  # Ensure correct import path
-import uvicorn
+from app.operations import evaluate_batch, evaluate_columns
+from app import expressions, metrics, responses, warmup
 import logging
+from app.security import password_pool
+from app.compression import CompressionMiddleware
+from app.recorder import result_recorder
+from app.idempotency import IdempotencyMiddleware
+from app.admission import AdmissionMiddleware
+
+# API_ONLY=1 skips the HTML pages (and importing Jinja2) for API replicas.
+API_ONLY = os.getenv("API_ONLY", "0").lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Prefill the pool, compile hot queries and start the bcrypt workers
+    # before the server starts accepting requests
+    if not API_ONLY:
+        site_pages.load()
+    await warmup.run()
+    # Write-behind persistence of /add etc. (opt-in, see app.recorder)
+    if result_recorder.enabled:
+        result_recorder.start()
+    yield
+    # Flush queued results, then stop the bcrypt worker processes
+    await result_recorder.stop()
+    password_pool.shutdown()
+
+
 # Create FastAPI app before importing routers so decorators and includes
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=responses.response_class("main"))
+# Idempotency-Key replay for POST /calculations/ and /users/register;
+# innermost, so stored responses are uncompressed
+app.add_middleware(IdempotencyMiddleware)
+# gzip/brotli/zstd response compression (settings in app.compression)
+app.add_middleware(CompressionMiddleware)
+# Per-route-class concurrency limits; sheds with 503 + Retry-After when a
+# class's wait queue is full (settings in app.admission)
+app.add_middleware(AdmissionMiddleware)
+# Per-route counts, status codes and latency histograms, served at /metrics
+# (added last so it is outermost and its timings include compression)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from app.routers import users, calculations
+from app.routers import users, calculations, system, ws
 
 app.include_router(users.router)
 app.include_router(calculations.router)
+app.include_router(system.router)
+app.include_router(ws.router)
 
-# Setup templates directory
-templates = Jinja2Templates(directory="templates")
+if not API_ONLY:
+    from app.pages import PageCache
 
+    # The templates have no dynamic content: render them once (in the
+    # lifespan, or on first hit) and serve them from memory with ETags and
+    # precompressed variants
+    site_pages = PageCache("templates", ["index.html", "login.html", "register.html"])
 
-@app.get("/register")
-async def register_page(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
+    @app.get("/register")
+    async def register_page(request: Request):
+        return site_pages.response(request, "register.html")
 
+    @app.get("/login")
+    async def login_page(request: Request):
+        return site_pages.response(request, "login.html")
 
-@app.get("/login")
-async def login_page(request: Request):
-    return templates.TemplateResponse("login.html", {"request": request})
+# In fast mode the arithmetic, /batch and /evaluate routes return their
+# already-typed payloads as FastJSONResponse instead of having FastAPI
+# re-validate them against response_model (see app.responses).
+FAST_JSON = responses.use_fast_json("main")
+
+
+def respond(payload: dict):
+    if FAST_JSON:
+        return responses.FastJSONResponse(payload)
+    return payload
+
+
+async def record_result(operation: str, a: float, b: float, result: float):
+    # Best-effort write-behind persistence: a recorder failure is logged but
+    # never changes the response of an arithmetic route
+    try:
+        await result_recorder.record(operation, a, b, result)
+    except Exception:
+        logger.exception("Could not record %s result", operation)
 
 # Pydantic model for request data
 class OperationRequest(BaseModel):
@@ -52,6 +121,53 @@ class OperationResponse(BaseModel):
 class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
 
+# Upper bound on the number of items evaluated by a single /batch request
+MAX_BATCH_ITEMS = 100_000
+
+OperationName = Literal["add", "subtract", "multiply", "divide"]
+
+# Pydantic models for batch requests
+class BatchItem(BaseModel):
+    op: OperationName = Field(..., description="The operation to apply")
+    a: float = Field(..., description="The first number")
+    b: float = Field(..., description="The second number")
+
+class BatchColumns(BaseModel):
+    a: list[float] = Field(..., description="Column of first operands")
+    b: list[float] = Field(..., description="Column of second operands")
+
+    @model_validator(mode="after")
+    def validate_lengths(self):
+        if len(self.a) != len(self.b):
+            raise ValueError("Columns a and b must have the same length.")
+        return self
+
+class BatchRequest(BaseModel):
+    items: list[BatchItem] = Field(default_factory=list, description="Individual {op, a, b} items")
+    columns: dict[OperationName, BatchColumns] = Field(
+        default_factory=dict, description="Per-operation operand columns"
+    )
+
+    @model_validator(mode="after")
+    def validate_size(self):
+        total = len(self.items) + sum(len(col.a) for col in self.columns.values())
+        if total > MAX_BATCH_ITEMS:
+            raise ValueError(f"A batch may contain at most {MAX_BATCH_ITEMS} items.")
+        return self
+
+# Pydantic models for batch responses
+class BatchItemResult(BaseModel):
+    result: float | None = Field(None, description="The result, or null if the item failed")
+    error: str | None = Field(None, description="Error message for a failed item")
+
+class BatchColumnResult(BaseModel):
+    results: list[float | None]
+    errors: list[str | None]
+
+class BatchResponse(BaseModel):
+    items: list[BatchItemResult] = Field(default_factory=list)
+    columns: dict[str, BatchColumnResult] = Field(default_factory=dict)
+
 # Custom Exception Handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -59,6 +175,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": exc.detail},
+        headers=getattr(exc, "headers", None),
     )
 
 @app.exception_handler(RequestValidationError)
@@ -71,12 +188,30 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"error": error_messages},
     )
 
-@app.get("/")
-async def read_root(request: Request):
-    """
-    Serve the index.html template.
-    """
-    return templates.TemplateResponse("index.html", {"request": request})
+@app.get("/metrics", include_in_schema=False)
+async def metrics_route():
+    """Prometheus text exposition of request, DB and bcrypt timings."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready", include_in_schema=False)
+async def ready_route():
+    """Readiness probe: 200 once the lifespan warmup has finished, the
+    calculation_stats table exists and the result recorder (when enabled)
+    has a live flusher, else 503."""
+    status = {**warmup.status(), "import_seconds": IMPORT_SECONDS, "api_only": API_ONLY}
+    status["recorder_healthy"] = result_recorder.healthy
+    ready = status["ready"] and status["recorder_healthy"] and status["calculation_stats"] == "ok"
+    return JSONResponse(status, status_code=200 if ready else 503)
+
+
+if not API_ONLY:
+    @app.get("/")
+    async def read_root(request: Request):
+        """
+        Serve the index.html template.
+        """
+        return site_pages.response(request, "index.html")
 
 @app.post("/add", response_model=OperationResponse, responses={400: {"model": ErrorResponse}})
 async def add_route(operation: OperationRequest):
@@ -85,10 +220,12 @@ async def add_route(operation: OperationRequest):
     """
     try:
         result = add(operation.a, operation.b)
-        return OperationResponse(result=result)
+        response = respond({"result": result})
     except Exception as e:
         logger.error(f"Add Operation Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    await record_result("add", operation.a, operation.b, result)
+    return response
 
 @app.post("/subtract", response_model=OperationResponse, responses={400: {"model": ErrorResponse}})
 async def subtract_route(operation: OperationRequest):
@@ -97,10 +234,12 @@ async def subtract_route(operation: OperationRequest):
     """
     try:
         result = subtract(operation.a, operation.b)
-        return OperationResponse(result=result)
+        response = respond({"result": result})
     except Exception as e:
         logger.error(f"Subtract Operation Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    await record_result("subtract", operation.a, operation.b, result)
+    return response
 
 @app.post("/multiply", response_model=OperationResponse, responses={400: {"model": ErrorResponse}})
 async def multiply_route(operation: OperationRequest):
@@ -109,10 +248,12 @@ async def multiply_route(operation: OperationRequest):
     """
     try:
         result = multiply(operation.a, operation.b)
-        return OperationResponse(result=result)
+        response = respond({"result": result})
     except Exception as e:
         logger.error(f"Multiply Operation Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    await record_result("multiply", operation.a, operation.b, result)
+    return response
 
 @app.post("/divide", response_model=OperationResponse, responses={400: {"model": ErrorResponse}})
 async def divide_route(operation: OperationRequest):
@@ -121,13 +262,93 @@ async def divide_route(operation: OperationRequest):
     """
     try:
         result = divide(operation.a, operation.b)
-        return OperationResponse(result=result)
+        response = respond({"result": result})
     except ValueError as e:
         logger.error(f"Divide Operation Error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Divide Operation Internal Error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    await record_result("divide", operation.a, operation.b, result)
+    return response
+
+@app.post("/batch", response_model=BatchResponse, responses={400: {"model": ErrorResponse}})
+async def batch_route(batch: BatchRequest):
+    """
+    Evaluate many operations in one request.
+
+    Items and columns are evaluated with the column-wise kernels from
+    app.operations; a failing item (e.g. division by zero) reports its own
+    error without aborting the rest of the batch.
+    """
+    items = []
+    if batch.items:
+        results, errors = evaluate_batch(
+            [item.op for item in batch.items],
+            [item.a for item in batch.items],
+            [item.b for item in batch.items],
+        )
+        items = [{"result": r, "error": e} for r, e in zip(results, errors)]
+
+    columns = {}
+    for op, col in batch.columns.items():
+        results, errors = evaluate_columns(op, col.a, col.b)
+        columns[op] = {"results": results, "errors": errors}
+
+    return respond({"items": items, "columns": columns})
+
+# Pydantic models for expression evaluation
+class ExpressionRequest(BaseModel):
+    expression: str = Field(..., description="Arithmetic expression, e.g. (a + b) * c / d")
+    bindings: list[dict[str, float]] = Field(
+        default_factory=list, description="One {variable: value} mapping per evaluation"
+    )
+    columns: dict[str, list[float]] = Field(
+        default_factory=dict, description="Variable name -> column of values (alternative to bindings)"
+    )
+
+class ExpressionResponse(BaseModel):
+    variables: list[str]
+    results: list[float | None]
+    errors: list[str | None]
+
+@app.post("/evaluate", response_model=ExpressionResponse, responses={400: {"model": ErrorResponse}})
+async def evaluate_route(request: ExpressionRequest):
+    """
+    Evaluate an arithmetic expression against many variable bindings.
+
+    The expression is compiled once (and cached by its text) and evaluated
+    over all bindings in a single column-wise pass.
+    """
+    try:
+        plan = expressions.compile_expression(request.expression)
+        if request.bindings:
+            rows = len(request.bindings)
+            columns = {
+                name: [binding.get(name) for binding in request.bindings]
+                for name in plan.variables
+            }
+            missing = [name for name, col in columns.items() if None in col]
+            if missing:
+                raise expressions.ExpressionError(f"Missing value for variable: {missing[0]}")
+        else:
+            columns = request.columns
+            # the row count comes from the columns the expression uses
+            lengths = {len(columns[name]) for name in plan.variables if name in columns}
+            if len(lengths) > 1:
+                raise expressions.ExpressionError("All variable columns must have the same length")
+            rows = lengths.pop() if lengths else 1
+        if rows > MAX_BATCH_ITEMS:
+            raise expressions.ExpressionError(f"At most {MAX_BATCH_ITEMS} bindings may be evaluated at once.")
+        results, errors = expressions.evaluate(plan, columns, rows)
+    except expressions.ExpressionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respond({"variables": list(plan.variables), "results": results, "errors": errors})
+
+# Time spent importing this module (FastAPI, routers, models, ...), reported at /ready
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="127.0.0.1", port=8000)
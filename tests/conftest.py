@@ -1,12 +1,23 @@
 # tests/e2e/conftest.py
 
+import atexit
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
 import time
 import pytest
 from playwright.sync_api import sync_playwright
 import requests
 
+# Keep the app's default database (used by the lifespan warmup, unmocked
+# routes and the e2e server) out of the repository root.
+if "DATABASE_URL" not in os.environ:
+    _db_dir = tempfile.mkdtemp(prefix="calculator-tests-")
+    atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/app.db"
+
 @pytest.fixture(scope='session')
 def fastapi_server():
     """
@@ -86,3 +97,49 @@ def page(browser):
     page = browser.new_page()
     yield page
     page.close()
+
+
+@pytest.fixture(scope="module")
+def db_session_factory(tmp_path_factory):
+    """
+    Fixture providing a sessionmaker bound to a fresh SQLite file with all
+    tables created, for tests that need an isolated database.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.models import Base
+
+    db_path = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def db_client(db_session_factory):
+    """
+    Fixture providing a TestClient whose get_db dependency is bound to the
+    isolated database from `db_session_factory`. The previous override (if
+    any) is restored afterwards.
+    """
+    from fastapi.testclient import TestClient
+    from main import app
+    from app.db import get_db
+
+    def override_get_db():
+        db = db_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app)
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
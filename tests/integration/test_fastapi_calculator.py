@@ -152,3 +152,147 @@ def test_divide_by_zero_api(client):
     # Assert that the 'error' field contains the correct error message
     assert "Cannot divide by zero!" in response.json()['error'], \
         f"Expected error message 'Cannot divide by zero!', got '{response.json()['error']}'"
+
+# ---------------------------------------------
+# Test Function: test_batch_api
+# ---------------------------------------------
+
+def test_batch_api(client):
+    """
+    Test the Batch API Endpoint.
+
+    This test verifies that the `/batch` endpoint evaluates both individual items
+    and per-operation columns in one request, and that a division by zero only
+    fails the affected item.
+    """
+    response = client.post('/batch', json={
+        'items': [
+            {'op': 'add', 'a': 10, 'b': 5},
+            {'op': 'divide', 'a': 10, 'b': 0},
+            {'op': 'multiply', 'a': 10, 'b': 5},
+        ],
+        'columns': {
+            'subtract': {'a': [10, 20], 'b': [5, 5]},
+            'divide': {'a': [10, 1], 'b': [2, 0]},
+        },
+    })
+
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    data = response.json()
+
+    assert data['items'] == [
+        {'result': 15, 'error': None},
+        {'result': None, 'error': 'Cannot divide by zero!'},
+        {'result': 50, 'error': None},
+    ]
+    assert data['columns']['subtract'] == {'results': [5, 15], 'errors': [None, None]}
+    assert data['columns']['divide'] == {'results': [5, None], 'errors': [None, 'Cannot divide by zero!']}
+
+# ---------------------------------------------
+# Test Function: test_batch_api_overflow_fails_only_its_item
+# ---------------------------------------------
+
+def test_batch_api_overflow_fails_only_its_item(client):
+    """
+    Test that a result overflowing to infinity is reported as an error for
+    that item (items mode and columns mode) instead of failing the batch.
+    """
+    response = client.post('/batch', json={
+        'items': [
+            {'op': 'multiply', 'a': 1e308, 'b': 10},
+            {'op': 'add', 'a': 1, 'b': 2},
+        ],
+        'columns': {'multiply': {'a': [1e308, 2], 'b': [10, 3]}},
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['items'] == [
+        {'result': None, 'error': 'Result is not finite'},
+        {'result': 3, 'error': None},
+    ]
+    assert data['columns']['multiply'] == {'results': [None, 6], 'errors': ['Result is not finite', None]}
+
+# ---------------------------------------------
+# Test Function: test_batch_api_validation
+# ---------------------------------------------
+
+def test_batch_api_validation(client):
+    """
+    Test that the `/batch` endpoint rejects unknown operations and mismatched
+    column lengths with a 400 error response.
+    """
+    response = client.post('/batch', json={'items': [{'op': 'power', 'a': 1, 'b': 2}]})
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+    response = client.post('/batch', json={'columns': {'add': {'a': [1, 2], 'b': [1]}}})
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+# ---------------------------------------------
+# Test Function: test_evaluate_api
+# ---------------------------------------------
+
+def test_evaluate_api(client):
+    """
+    Test the Expression Evaluation API Endpoint.
+
+    This test verifies that `/evaluate` evaluates one expression against many
+    bindings (row form and column form) and reports per-row division errors.
+    """
+    response = client.post('/evaluate', json={
+        'expression': '(a + b) * c / d',
+        'bindings': [{'a': 1, 'b': 3, 'c': 2, 'd': 4}, {'a': 1, 'b': 1, 'c': 1, 'd': 0}],
+    })
+    assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
+    assert response.json() == {
+        'variables': ['a', 'b', 'c', 'd'],
+        'results': [2.0, None],
+        'errors': [None, 'Cannot divide by zero!'],
+    }
+
+    response = client.post('/evaluate', json={'expression': 'x * 2', 'columns': {'x': [1, 2, 3]}})
+    assert response.json()['results'] == [2, 4, 6]
+
+# ---------------------------------------------
+# Test Function: test_evaluate_api_rejects_invalid_expression
+# ---------------------------------------------
+
+def test_evaluate_api_rejects_invalid_expression(client):
+    """
+    Test that `/evaluate` returns 400 for unsupported syntax and missing variables.
+    """
+    response = client.post('/evaluate', json={'expression': '__import__("os")'})
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+    response = client.post('/evaluate', json={'expression': 'a + b', 'bindings': [{'a': 1}]})
+    assert response.status_code == 400
+    assert 'b' in response.json()['error']
+
+    response = client.post('/evaluate', json={'expression': '9' * 400 + ' * x', 'columns': {'x': [1]}})
+    assert response.status_code == 400
+    assert 'too large' in response.json()['error']
+
+# ---------------------------------------------
+# Test Function: test_evaluate_api_overflow_and_column_lengths
+# ---------------------------------------------
+
+def test_evaluate_api_overflow_and_column_lengths(client):
+    """
+    Test that `/evaluate` reports overflow per row and sizes the evaluation
+    from the columns the expression actually uses.
+    """
+    response = client.post('/evaluate', json={'expression': 'x * 10', 'columns': {'x': [1e308, 1]}})
+    assert response.status_code == 200
+    assert response.json()['results'] == [None, 10]
+    assert response.json()['errors'] == ['Result is not finite', None]
+
+    # the row count comes from the columns the expression uses
+    response = client.post('/evaluate', json={'expression': 'x + 1', 'columns': {'unused': [1, 2, 3], 'x': [1]}})
+    assert response.status_code == 200
+    assert response.json()['results'] == [2]
+
+    response = client.post('/evaluate', json={'expression': 'x + y', 'columns': {'x': [1, 2], 'y': [1]}})
+    assert response.status_code == 400
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionMiddleware, ConcurrencyLimiter, Overloaded, classify
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("POST", "/users/login", "auth"),
+    ("POST", "/users/register", "auth"),
+    ("GET", "/calculations/", "db_read"),
+    ("GET", "/users/me", "db_read"),
+    ("PUT", "/calculations/3", "db_write"),
+    ("POST", "/add", "arithmetic"),
+    ("GET", "/metrics", None),
+    ("GET", "/", None),
+])
+def test_classify(method, path, expected):
+    assert classify(method, path) == expected
+
+
+def test_limiter_queues_then_sheds():
+    limiter = ConcurrencyLimiter("test", limit=1, queue=1, timeout=0.2)
+
+    async def scenario():
+        await limiter.acquire()
+        queued = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await limiter.acquire()
+        assert full.value.reason == "queue_full"
+        limiter.release()  # the slot goes to the queued request
+        await queued
+        assert limiter.in_flight == 1
+        # nothing releases now, so the next waiter runs out of time
+        with pytest.raises(Overloaded) as late:
+            await limiter.acquire()
+        assert late.value.reason == "timeout"
+
+    asyncio.run(scenario())
+    assert limiter.stats()["admitted"] == 2
+    assert limiter.stats()["shed"] == 2
+    assert limiter.stats()["queued"] == 0
+
+
+def test_adaptive_limit_follows_latency():
+    limiter = ConcurrencyLimiter("test", limit=50, queue=10, timeout=1, adaptive=True)
+    for _ in range(20):
+        limiter.in_flight += 1
+        limiter.release(0.01)
+    assert limiter.stats()["limit"] == 50
+    for _ in range(50):
+        limiter.in_flight += 1
+        limiter.release(0.2)
+    assert limiter.stats()["limit"] < 50
+
+
+def test_saturated_auth_does_not_block_arithmetic():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def app(scope, receive, send):
+            if scope["path"] == "/users/login":
+                await gate.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = AdmissionMiddleware(app, {
+            "auth": ConcurrencyLimiter("auth", limit=1, queue=0, timeout=1),
+            "arithmetic": ConcurrencyLimiter("arithmetic", limit=4, queue=4, timeout=1),
+        })
+
+        async def call(path):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+            await middleware(scope, None, send)
+            return messages[0]
+
+        slow_login = asyncio.ensure_future(call("/users/login"))
+        await asyncio.sleep(0)
+        shed = await call("/users/login")
+        add = await call("/add")
+        gate.set()
+        return shed, add, await slow_login
+
+    shed, add, slow_login = asyncio.run(scenario())
+    assert shed["status"] == 503
+    assert (b"retry-after", b"1") in shed["headers"]
+    assert add["status"] == 200
+    assert slow_login["status"] == 200
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from main import app
+from app import async_crud
+from app.db import get_db, to_async_url
+from app.models import Base
+from app.schemas import CalculationCreate, CalculationUpdate, UserCreate
+
+
+@pytest.fixture(scope="module")
+def async_session_factory(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("async") / "test_async.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def async_client(async_session_factory):
+    """TestClient whose routes receive an AsyncSession instead of a Session."""
+
+    async def override_get_db():
+        async with async_session_factory() as db:
+            yield db
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app)
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("sqlite:///./test.db", "sqlite+aiosqlite:///./test.db"),
+        ("postgresql://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+        ("postgres://u:p@db:5432/app", "postgresql+asyncpg://u:p@db:5432/app"),
+        ("postgresql+psycopg2://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+        ("mysql://u:p@db/app", "mysql://u:p@db/app"),
+    ],
+)
+def test_to_async_url(url, expected):
+    assert to_async_url(url) == expected
+
+
+def test_async_crud_calculation_lifecycle(async_session_factory):
+    async def scenario():
+        async with async_session_factory() as db:
+            created = await async_crud.create_calculation(
+                db, CalculationCreate(operation="add", number1=1, number2=2, result=3)
+            )
+            fetched = await async_crud.get_calculation(db, created.id)
+            assert fetched.result == 3
+
+            updated = await async_crud.update_calculation(db, created.id, CalculationUpdate(result=4))
+            assert updated.result == 4
+
+            items, _ = await async_crud.get_calculations_page(db, limit=10, operation="add")
+            assert created.id in [item.id for item in items]
+
+            chunks = [rows async for rows in async_crud.iter_calculation_chunks(db, chunk_size=1)]
+            assert all(len(rows) == 1 for rows in chunks)
+
+            assert await async_crud.delete_calculation(db, created.id)
+            assert await async_crud.get_calculation(db, created.id) is None
+            assert not await async_crud.delete_calculation(db, created.id)
+            assert await async_crud.update_calculation(db, created.id, CalculationUpdate(result=1)) is None
+
+    asyncio.run(scenario())
+
+
+def test_async_crud_users(async_session_factory):
+    async def scenario():
+        async with async_session_factory() as db:
+            user = await async_crud.create_user(db, UserCreate(email="async@example.com", password="password123"))
+            assert (await async_crud.get_user_by_id(db, user.id)).email == "async@example.com"
+            assert await async_crud.verify_user(db, "async@example.com", "password123")
+            assert await async_crud.verify_user(db, "async@example.com", "wrongpassword") is None
+            assert await async_crud.verify_user(db, "missing@example.com", "password123") is None
+
+    asyncio.run(scenario())
+
+
+def test_routes_with_async_session(async_client):
+    response = async_client.post("/calculations/", json={
+        "operation": "multiply", "number1": 3, "number2": 4, "result": 12
+    })
+    assert response.status_code == 200
+    calc_id = response.json()["id"]
+
+    assert async_client.get(f"/calculations/{calc_id}").json()["result"] == 12
+    assert async_client.put(f"/calculations/{calc_id}", json={"result": 13}).json()["result"] == 13
+    assert calc_id in [item["id"] for item in async_client.get("/calculations/").json()["items"]]
+
+    export = async_client.get("/calculations/export", params={"format": "csv", "operation": "multiply"})
+    assert export.status_code == 200
+    assert export.text.startswith("id,operation")
+
+    assert async_client.delete(f"/calculations/{calc_id}").status_code == 200
+
+    response = async_client.post("/users/register", json={"email": "asyncroute@example.com", "password": "password123"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    me = async_client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["email"] == "asyncroute@example.com"
+
+
+def test_bulk_routes_with_async_session(async_client):
+    response = async_client.post("/calculations/bulk", json={"items": [
+        {"operation": "bulk-async", "number1": i, "number2": 1} for i in range(3)
+    ]})
+    ids = [item["id"] for item in response.json()["items"]]
+    assert len(ids) == 3
+
+    response = async_client.put("/calculations/bulk", json={"items": [{"id": ids[0], "result": 9}]})
+    assert response.json()["items"] == [{"id": ids[0], "status": "updated"}]
+
+    response = async_client.request("DELETE", "/calculations/bulk", json={"ids": ids})
+    assert [item["status"] for item in response.json()["items"]] == ["deleted"] * 3
+
+
+def test_stats_route_with_async_session(async_client):
+    async_client.post("/calculations/", json={"operation": "stats-async", "number1": 1, "number2": 1, "result": 2})
+    rows = {row["operation"]: row for row in async_client.get("/calculations/stats").json()}
+    assert rows["stats-async"]["count"] == 1
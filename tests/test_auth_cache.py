@@ -0,0 +1,85 @@
+import time
+
+import pytest
+from sqlalchemy import delete, update
+
+from app import auth_cache
+from app.auth_cache import TTLCache
+from app.models import User
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    auth_cache.clear()
+    yield
+    auth_cache.clear()
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_ttl_cache_expiry_and_ttl_cap():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("expired", 2, ttl=-1)
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.get("expired") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_me_uses_cached_token_and_user(db_client, db_session_factory):
+    response = db_client.post("/users/register", json={"email": "cache@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    assert db_client.get("/users/me", headers=headers).json()["email"] == "cache@example.com"
+    assert db_client.get("/users/me", headers=headers).json()["email"] == "cache@example.com"
+
+    stats = db_client.get("/system/auth-cache").json()
+    assert stats["tokens"]["hits"] == 1
+    assert stats["users"]["hits"] == 1
+
+    # Changing the user through the ORM drops the cached snapshot
+    with db_session_factory() as db:
+        user = db.query(User).filter(User.email == "cache@example.com").first()
+        user.email = "renamed@example.com"
+        db.commit()
+
+    assert db_client.get("/users/me", headers=headers).json()["email"] == "renamed@example.com"
+
+    # ...and so does a Core statement, which skips the ORM flush events
+    with db_session_factory() as db:
+        db.execute(update(User).where(User.email == "renamed@example.com").values(email="core@example.com"))
+        db.commit()
+    assert db_client.get("/users/me", headers=headers).json()["email"] == "core@example.com"
+
+    with db_session_factory() as db:
+        db.execute(delete(User).where(User.email == "core@example.com"))
+        db.commit()
+    assert db_client.get("/users/me", headers=headers).status_code == 401
+
+
+def test_invalid_token_is_not_cached(db_client):
+    response = db_client.get("/users/me", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
+    assert auth_cache.token_cache.stats()["size"] == 0
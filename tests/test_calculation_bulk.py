@@ -0,0 +1,38 @@
+def test_bulk_create_update_delete(db_client):
+    response = db_client.post("/calculations/bulk", params={"chunk_size": 2}, json={"items": [
+        {"operation": "add", "number1": i, "number2": 1, "result": i + 1} for i in range(5)
+    ]})
+    assert response.status_code == 200
+    created = response.json()["items"]
+    assert [item["status"] for item in created] == ["created"] * 5
+    ids = [item["id"] for item in created]
+    assert ids == sorted(ids)
+    assert db_client.get(f"/calculations/{ids[3]}").json()["number1"] == 3
+
+    response = db_client.put("/calculations/bulk", params={"chunk_size": 2}, json={"items": [
+        {"id": ids[0], "result": 100},
+        {"id": ids[1], "operation": "multiply", "result": 1},
+        {"id": 999999, "result": 5},
+    ]})
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["items"]] == ["updated", "updated", "not_found"]
+    first = db_client.get(f"/calculations/{ids[0]}").json()
+    assert first["result"] == 100
+    assert first["operation"] == "add"
+    assert db_client.get(f"/calculations/{ids[1]}").json()["operation"] == "multiply"
+
+    response = db_client.request("DELETE", "/calculations/bulk", json={"ids": [ids[0], ids[4], 999999]})
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["items"]] == ["deleted", "deleted", "not_found"]
+    assert db_client.get(f"/calculations/{ids[0]}").status_code == 404
+    assert db_client.get(f"/calculations/{ids[1]}").status_code == 200
+
+
+def test_bulk_create_rejects_invalid_items(db_client):
+    before = db_client.get("/calculations/", params={"operation": "atomic"}).json()
+    response = db_client.post("/calculations/bulk", json={"items": [
+        {"operation": "atomic", "number1": 1, "number2": 1},
+        {"operation": "atomic", "number1": "x", "number2": 1},
+    ]})
+    assert response.status_code == 400
+    assert db_client.get("/calculations/", params={"operation": "atomic"}).json() == before
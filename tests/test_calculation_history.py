@@ -0,0 +1,45 @@
+def _register(client, email):
+    response = client.post("/users/register", json={"email": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_user_scoped_history(db_client):
+    alice = _register(db_client, "alice@example.com")
+    bob = _register(db_client, "bob@example.com")
+
+    alice_ids = [
+        db_client.post("/calculations/mine", headers=alice, json={
+            "operation": "add" if i % 2 else "multiply", "number1": i, "number2": 1
+        }).json()["id"]
+        for i in range(5)
+    ]
+    bob_id = db_client.post("/calculations/mine", headers=bob, json={
+        "operation": "add", "number1": 9, "number2": 9
+    }).json()["id"]
+
+    # newest first, keyset-paged
+    first = db_client.get("/calculations/mine", headers=alice, params={"limit": 3}).json()
+    assert [item["id"] for item in first["items"]] == alice_ids[::-1][:3]
+    assert first["has_more"] is True
+    second = db_client.get("/calculations/mine", headers=alice, params={
+        "limit": 3, "cursor": first["next_cursor"]
+    })
+    assert [item["id"] for item in second.json()["items"]] == alice_ids[::-1][3:]
+    assert second.json()["has_more"] is False
+    assert "X-Next-Cursor" not in second.headers
+
+    adds = db_client.get("/calculations/mine", headers=alice, params={"operation": "add"}).json()["items"]
+    assert [item["id"] for item in adds] == [alice_ids[3], alice_ids[1]]
+
+    assert db_client.get(f"/calculations/mine/{alice_ids[0]}", headers=alice).status_code == 200
+    assert db_client.get(f"/calculations/mine/{bob_id}", headers=alice).status_code == 404
+    assert [item["id"] for item in db_client.get("/calculations/mine", headers=bob).json()["items"]] == [bob_id]
+
+    alice_id = db_client.get("/users/me", headers=alice).json()["id"]
+    user_stats = db_client.get("/calculations/stats", params={"user_id": alice_id}).json()
+    assert sum(row["count"] for row in user_stats) == 5
+
+
+def test_user_scoped_history_requires_auth(db_client):
+    assert db_client.get("/calculations/mine").status_code == 401
+    assert db_client.post("/calculations/mine", json={"operation": "add", "number1": 1, "number2": 1}).status_code == 401
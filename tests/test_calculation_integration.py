@@ -1,35 +1,16 @@
-import pytest
-from fastapi.testclient import TestClient
-from main import app
-from app.db import get_db
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.models import Base
-
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test_calc.db"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-Base.metadata.create_all(bind=engine)
-
-
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
+import json
+import uuid
 
+import pytest
 
-app.dependency_overrides[get_db] = override_get_db
 
-client = TestClient(app)
+@pytest.fixture(scope="module")
+def client(db_client):
+    """TestClient bound to a fresh SQLite database under pytest's tmp_path."""
+    return db_client
 
 
-def test_create_calculation():
+def test_create_calculation(client):
     response = client.post("/calculations/", json={
         "operation": "add",
         "number1": 5,
@@ -42,19 +23,21 @@ def test_create_calculation():
     assert "id" in data
 
 
-def test_get_all_calculations():
+def test_get_all_calculations(client):
     response = client.get("/calculations/")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
+    page = response.json()
+    assert isinstance(page["items"], list)
+    assert page["has_more"] is (page["next_cursor"] is not None)
 
 
-def test_get_single_calculation():
+def test_get_single_calculation(client):
     response = client.get("/calculations/1")
     assert response.status_code == 200
     assert response.json()["id"] == 1
 
 
-def test_update_calculation():
+def test_update_calculation(client):
     response = client.put("/calculations/1", json={
         "operation": "subtract",
         "number1": 10,
@@ -65,9 +48,67 @@ def test_update_calculation():
     assert response.json()["result"] == 7
 
 
-def test_delete_calculation():
+def test_delete_calculation(client):
     response = client.delete("/calculations/1")
     assert response.status_code == 200
 
     response = client.get("/calculations/1")
     assert response.status_code == 404
+
+
+def test_get_all_calculations_keyset_pagination(client):
+    operation = f"page-{uuid.uuid4().hex}"
+    created = [
+        client.post("/calculations/", json={
+            "operation": operation, "number1": i, "number2": 1, "result": i + 1
+        }).json()["id"]
+        for i in range(5)
+    ]
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"operation": operation, "limit": 2}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = client.get("/calculations/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(item["id"] for item in page["items"])
+        pages += 1
+        assert response.headers.get("X-Next-Cursor") == (None if page["next_cursor"] is None else str(page["next_cursor"]))
+        if not page["has_more"]:
+            break
+        cursor = page["next_cursor"]
+
+    assert seen == created
+    assert pages == 3
+
+
+def test_get_all_calculations_rejects_oversized_limit(client):
+    response = client.get("/calculations/", params={"limit": 100000})
+    assert response.status_code == 400
+
+
+def test_export_calculations_ndjson_and_csv(client):
+    operation = f"export-{uuid.uuid4().hex}"
+    for i in range(3):
+        client.post("/calculations/", json={
+            "operation": operation, "number1": i, "number2": 2, "result": i * 2
+        })
+
+    response = client.get("/calculations/export", params={"operation": operation, "chunk_size": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["number1"] for row in rows] == [0, 1, 2]
+    assert all(row["operation"] == operation for row in rows)
+
+    response = client.get("/calculations/export", params={"operation": operation, "format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,operation,number1,number2,result,user_id"
+    assert len(lines) == 4
+    assert lines[1].split(",")[1:5] == [operation, "0.0", "2.0", "0.0"]
@@ -0,0 +1,103 @@
+from collections import defaultdict
+
+from app import stats
+from app.models import Calculation, CalculationStat, User
+
+
+def _by_operation(rows):
+    return {row["operation"]: row for row in rows}
+
+
+def test_stats_follow_single_and_bulk_writes(db_client, db_session_factory):
+    first = db_client.post("/calculations/", json={"operation": "add", "number1": 1, "number2": 2, "result": 3}).json()
+    db_client.post("/calculations/", json={"operation": "add", "number1": 2, "number2": 2, "result": 4})
+    db_client.post("/calculations/", json={"operation": "divide", "number1": 1, "number2": 0})
+    bulk = db_client.post("/calculations/bulk", json={"items": [
+        {"operation": "multiply", "number1": 2, "number2": 3, "result": 6},
+        {"operation": "multiply", "number1": 2, "number2": 4, "result": 8},
+    ]}).json()["items"]
+
+    rows = _by_operation(db_client.get("/calculations/stats").json())
+    assert rows["add"]["count"] == 2
+    assert rows["add"]["result_sum"] == 7
+    assert rows["add"]["result_avg"] == 3.5
+    assert rows["divide"]["count"] == 1
+    assert rows["divide"]["result_count"] == 0
+    assert rows["divide"]["result_avg"] is None
+    assert rows["multiply"]["result_sum"] == 14
+
+    db_client.put(f"/calculations/{first['id']}", json={"operation": "subtract", "result": -1})
+    db_client.put("/calculations/bulk", json={"items": [{"id": bulk[0]["id"], "result": 10}]})
+    db_client.request("DELETE", "/calculations/bulk", json={"ids": [bulk[1]["id"]]})
+
+    rows = _by_operation(db_client.get("/calculations/stats").json())
+    assert rows["add"]["count"] == 1
+    assert rows["add"]["result_sum"] == 4
+    assert rows["subtract"]["result_sum"] == -1
+    assert rows["multiply"]["count"] == 1
+    assert rows["multiply"]["result_sum"] == 10
+
+    # the incremental rollup matches a full recomputation
+    with db_session_factory() as db:
+        incremental = stats.get_stats(db)
+        stats.rebuild(db)
+        assert stats.get_stats(db) == incremental
+
+
+def test_rebuild_includes_per_user_rows(db_session_factory):
+    with db_session_factory() as db:
+        user = User(email="stats@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add_all([
+            Calculation(operation="add", number1=1, number2=1, result=2, user_id=user.id),
+            Calculation(operation="add", number1=1, number2=2, result=3, user_id=user.id),
+        ])
+        db.commit()
+
+        stats.rebuild(db)
+        rows = stats.get_stats(db, user.id)
+        assert rows == [{
+            "operation": "add", "user_id": user.id, "count": 2,
+            "result_count": 2, "result_sum": 5.0, "result_avg": 2.5,
+        }]
+        assert db.query(CalculationStat).filter(CalculationStat.user_id == stats.ALL_USERS).count() >= 1
+
+
+def test_per_user_deltas():
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    stats._accumulate(deltas, ("add", 7, 2.0), 1)
+    stats._accumulate(deltas, ("add", None, None), 1)
+    assert deltas[("add", stats.ALL_USERS)] == [2, 1, 2.0]
+    assert deltas[("add", 7)] == [1, 1, 2.0]
+
+
+def test_rebuild_command_usage():
+    assert stats.main(["unknown"]) == 2
+
+
+def test_ensure_table_creates_and_backfills_missing_table(tmp_path):
+    from sqlalchemy import create_engine, inspect
+    from sqlalchemy.orm import Session
+    from app.models import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'upgrade.db'}")
+    Base.metadata.create_all(bind=engine)
+    CalculationStat.__table__.drop(bind=engine)
+    with Session(engine) as db:
+        db.add_all([
+            Calculation(operation="add", number1=1, number2=1, result=2),
+            Calculation(operation="add", number1=1, number2=2, result=3),
+        ])
+        db.commit()
+
+    assert stats.ensure_table(engine) == "ok"
+    assert stats.table_status() == "ok"
+    assert inspect(engine).has_table("calculation_stats")
+    with Session(engine) as db:
+        rows = _by_operation(stats.get_stats(db))
+    assert rows["add"]["count"] == 2
+    assert rows["add"]["result_sum"] == 5
+    # already present: left alone
+    assert stats.ensure_table(engine) == "ok"
+    engine.dispose()
@@ -0,0 +1,81 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from app.compression import CompressionMiddleware
+
+
+def _app(body_chunks, content_type=b"application/json", extra_headers=()):
+    async def app(scope, receive, send):
+        headers = [(b"content-type", content_type), *extra_headers]
+        if len(body_chunks) == 1:
+            headers.append((b"content-length", str(len(body_chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for i, chunk in enumerate(body_chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(body_chunks) - 1})
+    return app
+
+
+def _call(app, accept=b"gzip", **options):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept)]}
+    middleware = CompressionMiddleware(app, codings=["gzip"], min_size=100, **options)
+    asyncio.run(middleware(scope, receive, send))
+    start = messages[0]
+    return dict((k.decode(), v.decode()) for k, v in start["headers"]), messages[1:]
+
+
+def test_compresses_large_single_body_and_weakens_etag():
+    body = b'{"value": 1}' * 100
+    headers, bodies = _call(_app([body], extra_headers=[(b"etag", b'"abc"')]))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["etag"] == 'W/"abc"'
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(bodies[0]["body"])
+    assert gzip.decompress(bodies[0]["body"]) == body
+
+
+@pytest.mark.parametrize("app, accept", [
+    (_app([b"{}" * 10]), b"gzip"),  # below min_size
+    (_app([b"x" * 500], content_type=b"image/png"), b"gzip"),  # not in allowlist
+    (_app([b"x" * 500], extra_headers=[(b"content-encoding", b"br")]), b"gzip"),  # already encoded
+    (_app([b"{}" * 500]), b"identity"),  # client does not accept it
+])
+def test_passthrough(app, accept):
+    headers, bodies = _call(app, accept=accept)
+    assert headers.get("content-encoding") in (None, "br")
+    assert "W/" not in headers.get("etag", "")
+
+
+def test_streaming_body_is_compressed_chunk_by_chunk():
+    chunks = [b'{"row": %d}\n' % i * 50 for i in range(3)]
+    headers, bodies = _call(_app(chunks, content_type=b"application/x-ndjson"))
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert [m["more_body"] for m in bodies] == [True, True, False]
+
+    # every chunk is flushed: decoding the prefix yields the data sent so far
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decoder.decompress(bodies[0]["body"]) == chunks[0]
+    assert decoder.decompress(bodies[1]["body"] + bodies[2]["body"]) == chunks[1] + chunks[2]
+
+
+def test_list_route_is_compressed(db_client):
+    db_client.post("/calculations/bulk", json={"items": [
+        {"operation": "gzip-list", "number1": i, "number2": 1, "result": i + 1} for i in range(100)
+    ]})
+    response = db_client.get("/calculations/", params={"operation": "gzip-list"}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["items"]) == 100
+
+    response = db_client.get("/calculations/", params={"operation": "gzip-list"}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
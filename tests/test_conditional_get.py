@@ -0,0 +1,77 @@
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+
+from app import conditional
+
+
+def _create(client, operation="etag", number1=1):
+    return client.post("/calculations/", json={"operation": operation, "number1": number1, "number2": 2})
+
+
+def test_single_calculation_validators_and_304(db_client):
+    created = _create(db_client)
+    calc_id = created.json()["id"]
+    etag = created.headers["etag"]
+    assert etag == f'"{calc_id}-1"'
+
+    response = db_client.get(f"/calculations/{calc_id}")
+    assert response.headers["etag"] == etag
+    last_modified = response.headers["last-modified"]
+
+    not_modified = db_client.get(f"/calculations/{calc_id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    # weak form, as sent back after a compressed response
+    assert db_client.get(f"/calculations/{calc_id}", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert db_client.get(f"/calculations/{calc_id}", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    # an update bumps the version, so the old validator no longer matches
+    updated = db_client.put(f"/calculations/{calc_id}", json={"result": 3})
+    assert updated.headers["etag"] == f'"{calc_id}-2"'
+    changed = db_client.get(f"/calculations/{calc_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["result"] == 3
+
+    assert db_client.get("/calculations/999999", headers={"If-None-Match": etag}).status_code == 404
+
+
+def test_bulk_update_bumps_version(db_client):
+    calc_id = _create(db_client).json()["id"]
+    db_client.put("/calculations/bulk", json={"items": [{"id": calc_id, "result": 7}]})
+    assert db_client.get(f"/calculations/{calc_id}").headers["etag"] == f'"{calc_id}-2"'
+
+
+def test_page_etag_tracks_changes(db_client):
+    ids = [_create(db_client, operation="etag-page", number1=i).json()["id"] for i in range(3)]
+    params = {"operation": "etag-page"}
+
+    first = db_client.get("/calculations/", params=params)
+    etag = first.headers["etag"]
+    assert db_client.get("/calculations/", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    # another page of the same query has its own validator
+    assert db_client.get("/calculations/", params={**params, "limit": 2}).headers["etag"] != etag
+
+    db_client.put(f"/calculations/{ids[1]}", json={"number1": 10})
+    response = db_client.get("/calculations/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    db_client.delete(f"/calculations/{ids[2]}")
+    response = db_client.get("/calculations/", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == ids[:2]
+
+
+def test_not_modified_rules():
+    modified = parsedate_to_datetime("Sat, 17 Oct 2026 19:36:31 GMT")
+    headers = {"if-modified-since": conditional.http_date(modified)}
+    assert conditional.not_modified(headers, {'"a"'}, modified)
+    assert not conditional.not_modified(headers, {'"a"'}, modified + timedelta(seconds=1))
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not conditional.not_modified({**headers, "if-none-match": '"b"'}, {'"a"'}, modified)
+    assert conditional.not_modified({"if-none-match": '"b", W/"a"'}, {'"a"'})
+    assert conditional.not_modified({"if-none-match": "*"}, {'"a"'})
+    assert not conditional.not_modified({"if-modified-since": "garbage"}, {'"a"'}, modified)
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import hmac
+import time
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.idempotency import IdempotencyMiddleware, IdempotencyStore, _fingerprint, idempotency_store
+from app.models import Calculation, IdempotencyKey
+from app.security import SECRET_KEY, decode_access_token
+
+
+@pytest.fixture
+def store(db_session_factory, monkeypatch):
+    monkeypatch.setattr(idempotency_store, "session_factory", db_session_factory)
+    idempotency_store.cache.clear()
+    return idempotency_store
+
+
+def test_create_is_replayed(db_client, db_session_factory, store):
+    payload = {"operation": "idem", "number1": 1, "number2": 2}
+    headers = {"Idempotency-Key": "create-1"}
+    first = db_client.post("/calculations/", json=payload, headers=headers)
+    second = db_client.post("/calculations/", json=payload, headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+    with db_session_factory() as db:
+        assert db.scalar(select(func.count()).where(Calculation.operation == "idem")) == 1
+
+    reused = db_client.post("/calculations/", json={**payload, "number1": 5}, headers=headers)
+    assert reused.status_code == 422
+    # requests without the header are not affected
+    assert db_client.post("/calculations/", json=payload).json()["id"] != first.json()["id"]
+
+
+def test_register_is_replayed_without_rehashing(db_client, store):
+    payload = {"email": "idem@example.com", "password": "password123"}
+    headers = {"Idempotency-Key": "register-1"}
+    first = db_client.post("/users/register", json=payload, headers=headers)
+    replays = store.replays
+    second = db_client.post("/users/register", json=payload, headers=headers)
+    assert second.status_code == 200
+    assert store.replays == replays + 1
+    # the replay carries a freshly minted token for the same user
+    first_claims = decode_access_token(first.json()["access_token"])
+    second_claims = decode_access_token(second.json()["access_token"])
+    assert second_claims["sub"] == first_claims["sub"]
+    assert second_claims["email"] == payload["email"]
+
+
+def test_stored_register_row_holds_no_password_or_token(db_client, db_session_factory, store):
+    payload = {"email": "idem-secret@example.com", "password": "s3cret-passw0rd"}
+    token = db_client.post("/users/register", json=payload, headers={"Idempotency-Key": "register-2"}).json()[
+        "access_token"
+    ]
+    with db_session_factory() as db:
+        row = db.execute(select(IdempotencyKey).where(IdempotencyKey.key.endswith(" register-2"))).scalars().one()
+        stored = [row.key, row.fingerprint, row.headers or "", (row.body or b"").decode("utf-8")]
+    for value in stored:
+        assert payload["password"] not in value
+        assert token not in value
+    # the fingerprint is keyed with SECRET_KEY, not a plain hash of the body
+    body = b'{"email": "x", "password": "y"}'
+    assert _fingerprint(body) == hmac.new(SECRET_KEY.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    assert _fingerprint(body) != hashlib.sha256(body).hexdigest()
+
+    store.cache.clear()  # replayed from the table alone
+    replay = db_client.post("/users/register", json=payload, headers={"Idempotency-Key": "register-2"})
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert decode_access_token(replay.json()["access_token"])["email"] == payload["email"]
+
+
+def test_response_survives_process_restart(db_client, db_session_factory, store):
+    payload = {"operation": "idem-db", "number1": 1, "number2": 2}
+    first = db_client.post("/calculations/", json=payload, headers={"Idempotency-Key": "db-1"})
+    store.cache.clear()  # as seen by another replica, from the table
+    second = db_client.post("/calculations/", json=payload, headers={"Idempotency-Key": "db-1"})
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+
+
+def _call(middleware, key: bytes, body: bytes = b"{}"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": [(b"idempotency-key", key)]}
+    return middleware(scope, receive, send), messages
+
+
+def test_concurrent_duplicates_wait_for_the_first(db_session_factory):
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append((await receive())["body"])
+        await asyncio.sleep(0.1)
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"created %d" % len(calls)})
+
+    middleware = IdempotencyMiddleware(
+        app, routes={("POST", "/")}, store=IdempotencyStore(session_factory=db_session_factory)
+    )
+
+    async def scenario():
+        (first, first_messages), (second, second_messages) = _call(middleware, b"k1"), _call(middleware, b"k1")
+        await asyncio.gather(first, second)
+        return first_messages, second_messages
+
+    first_messages, second_messages = asyncio.run(scenario())
+    assert calls == [b"{}"]
+    assert first_messages[1]["body"] == second_messages[1]["body"] == b"created 1"
+    assert second_messages[0]["status"] == 201
+
+
+def test_lease_held_elsewhere_times_out(db_session_factory):
+    with db_session_factory() as db:
+        db.execute(insert(IdempotencyKey).values(
+            key="POST / busy", fingerprint="x", expires_at=time.time() + 60
+        ))
+        db.commit()
+
+    async def app(scope, receive, send):
+        raise AssertionError("executed while another replica holds the key")
+
+    middleware = IdempotencyMiddleware(
+        app, routes={("POST", "/")}, store=IdempotencyStore(session_factory=db_session_factory, wait_timeout=0.1)
+    )
+    call, messages = _call(middleware, b"busy")
+    asyncio.run(call)
+    assert messages[0]["status"] == 409
@@ -0,0 +1,39 @@
+import asyncio
+import json
+
+import pytest
+
+from app import loadgen
+
+
+def test_percentile_nearest_rank():
+    values = sorted(range(1, 1001))
+    assert loadgen.percentile(values, 50) == 500
+    assert loadgen.percentile(values, 99) == 990
+    assert loadgen.percentile(values, 99.9) == 999
+    assert loadgen.percentile([7], 99.9) == 7
+    assert loadgen.percentile([], 50) is None
+
+
+def test_parse_mix():
+    assert loadgen.parse_mix("add=3, calc_get") == {"add": 3.0, "calc_get": 1.0}
+    with pytest.raises(ValueError):
+        loadgen.parse_mix("nope=1")
+    with pytest.raises(ValueError):
+        loadgen.parse_mix("add=0")
+
+
+@pytest.mark.parametrize("rate", [None, 100])
+def test_in_process_run_reports_every_scenario(db_client, rate):
+    mix = loadgen.parse_mix("add=2,calc_create=2,calc_get=1,calc_delete=1,me=1")
+    report = asyncio.run(loadgen.run(mix, duration=0.3, concurrency=4, rate=rate))
+
+    total = report["total"]
+    assert total["requests"] > 0
+    assert total["errors"] == 0
+    assert total["p50_ms"] <= total["p99_ms"] <= total["max_ms"]
+    assert set(report["scenarios"]) <= set(mix)
+    assert report["config"]["mode"] == ("open" if rate else "closed")
+    # the report is JSON-serialisable and renders as text
+    json.dumps(report)
+    assert "TOTAL" in loadgen.format_report(report)
@@ -0,0 +1,72 @@
+import threading
+import uuid
+
+from app import metrics
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics.reset()
+    for value in (0.0005, 0.003, 0.003, 20.0):
+        metrics.observe("test_seconds", (("case", "a"),), value)
+    text = metrics.render()
+    assert _sample(text, 'test_seconds_bucket{case="a",le="0.001"}') == 1
+    assert _sample(text, 'test_seconds_bucket{case="a",le="0.005"}') == 3
+    assert _sample(text, 'test_seconds_bucket{case="a",le="10.0"}') == 3
+    assert _sample(text, 'test_seconds_bucket{case="a",le="+Inf"}') == 4
+    assert _sample(text, 'test_seconds_count{case="a"}') == 4
+
+
+def test_counters_from_several_threads_are_merged():
+    metrics.reset()
+
+    def work():
+        for _ in range(1000):
+            metrics.inc("test_total")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _sample(metrics.render(), "test_total") == 4000
+
+
+def test_metrics_endpoint_reports_routes_by_template(db_client):
+    metrics.reset()
+    client = db_client
+    client.post("/add", json={"a": 1, "b": 2})
+    client.get("/calculations/999999999")
+    client.get("/no-such-page")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert _sample(text, 'http_requests_total{method="POST",route="/add",status="200"}') == 1
+    assert _sample(text, 'http_requests_total{method="GET",route="/calculations/{calc_id}",status="404"}') == 1
+    assert _sample(text, 'http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert _sample(text, 'http_request_duration_seconds_count{method="POST",route="/add"}') == 1
+    # the calculation lookup ran a query, attributed to its route
+    assert _sample(text, 'http_request_db_seconds_sum{method="GET",route="/calculations/{calc_id}"}') > 0
+    assert _sample(text, "db_query_duration_seconds_count") >= 1
+    assert "# TYPE http_requests_in_flight gauge" in text
+    assert "password_hash_completed" in text
+    assert 'auth_cache_hits{cache="tokens"}' in text
+
+
+def test_bcrypt_time_is_attributed_to_register(db_client):
+    metrics.reset()
+    client = db_client
+    email = f"metrics-{uuid.uuid4().hex[:8]}@example.com"
+    response = client.post("/users/register", json={"email": email, "password": "password123"})
+    assert response.status_code == 200
+    text = metrics.render()
+    assert _sample(text, 'bcrypt_duration_seconds_count{op="hash_password"}') == 1
+    assert _sample(text, 'http_request_bcrypt_seconds_sum{method="POST",route="/users/register"}') > 0
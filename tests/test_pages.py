@@ -0,0 +1,57 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from app import compression, pages
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["/", "/login", "/register"])
+def test_page_served_with_etag_and_cache_headers(path):
+    response = client.get(path, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == pages.PAGE_CACHE_CONTROL
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in response.headers
+
+    again = client.get(path, headers={"If-None-Match": response.headers["etag"], "Accept-Encoding": "identity"})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == response.headers["etag"]
+
+
+def test_gzip_variant_has_its_own_etag():
+    plain = client.get("/", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] != plain.headers["etag"]
+    # httpx decodes the body transparently
+    assert zipped.content == plain.content
+
+    # a cached variant's tag revalidates whichever variant is negotiated
+    response = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": f'W/{plain.headers["etag"]}'})
+    assert response.status_code == 304
+
+
+def test_build_page_skips_variants_that_do_not_shrink():
+    page = pages.build_page(b"x")
+    assert page.variants == {}
+    page = pages.build_page(b"<p>hello</p>" * 100)
+    assert gzip.decompress(page.variants["gzip"][0]) == b"<p>hello</p>" * 100
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", "br"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "br"),
+    ("identity", None),
+    (None, None),
+])
+def test_negotiate(header, expected):
+    assert compression.negotiate(header, ["br", "gzip"]) == expected
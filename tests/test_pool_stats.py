@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+
+from main import app
+from app.db import pool_kwargs
+from app.pool_stats import InstrumentedQueuePool, pool_status
+
+
+def test_pool_kwargs_for_file_and_memory_sqlite():
+    file_kwargs = pool_kwargs("sqlite:///./test.db")
+    assert file_kwargs["poolclass"] is InstrumentedQueuePool
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping"} <= set(file_kwargs)
+
+    memory_kwargs = pool_kwargs("sqlite://")
+    assert "poolclass" not in memory_kwargs
+    assert "pool_size" not in memory_kwargs
+
+
+def test_instrumented_pool_records_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    held = engine.connect()
+    held.execute(text("SELECT 1"))
+
+    status = pool_status(engine.pool)
+    assert status["checked_out"] == 1
+    assert status["checkouts"] == 1
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    held.close()
+    status = pool_status(engine.pool)
+    assert status["timeouts"] == 1
+    assert status["checked_out"] == 0
+    assert status["wait_seconds_histogram"]["+Inf"] == 1
+    engine.dispose()
+
+
+def test_db_pool_endpoint():
+    response = TestClient(app).get("/system/db-pool")
+    assert response.status_code == 200
+    sync = response.json()["sync"]
+    assert {"size", "checked_out", "overflow", "checkouts", "timeouts", "wait_seconds_histogram"} <= set(sync)
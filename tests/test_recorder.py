@@ -0,0 +1,190 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.models import Calculation
+from app.recorder import ResultRecorder, result_recorder
+
+
+def _count(session_factory, operation):
+    with session_factory() as db:
+        return db.scalar(select(func.count()).where(Calculation.operation == operation))
+
+
+def _gated(session_factory, gate: threading.Event):
+    # a session factory whose flushes wait until the gate opens
+    def factory():
+        gate.wait(5)
+        return session_factory()
+    return factory
+
+
+def test_batches_are_flushed_on_size_and_on_stop(db_session_factory):
+    recorder = ResultRecorder(enabled=True, batch_size=10, flush_interval=10, session_factory=db_session_factory)
+
+    async def scenario():
+        for i in range(25):
+            await recorder.record("wb-size", i, 1, i + 1)
+        # two full batches go out without waiting for the interval
+        for _ in range(100):
+            if recorder.flushed >= 20:
+                break
+            await asyncio.sleep(0.01)
+        assert recorder.flushed == 20
+        await recorder.stop()
+
+    asyncio.run(scenario())
+    assert _count(db_session_factory, "wb-size") == 25
+    stats = recorder.stats()
+    assert stats["enqueued"] == 25 and stats["flushed"] == 25 and stats["queue_depth"] == 0
+    assert stats["flushes"] == 3
+
+
+def test_drop_policy_counts_overflow(db_session_factory):
+    gate = threading.Event()
+    recorder = ResultRecorder(
+        enabled=True, max_queue=2, batch_size=1, flush_interval=0.01, overflow="drop",
+        session_factory=_gated(db_session_factory, gate),
+    )
+
+    async def scenario():
+        await recorder.record("wb-drop", 0, 0, 0)
+        await asyncio.sleep(0.05)  # the flusher takes the first row and blocks
+        for i in range(5):
+            await recorder.record("wb-drop", i, 0, i)
+        gate.set()
+        await recorder.stop()
+
+    asyncio.run(scenario())
+    assert recorder.dropped == 3
+    assert _count(db_session_factory, "wb-drop") == 3
+
+
+def test_block_policy_gives_up_after_timeout(db_session_factory):
+    gate = threading.Event()
+    recorder = ResultRecorder(
+        enabled=True, max_queue=1, batch_size=1, flush_interval=0.05, overflow="block",
+        session_factory=_gated(db_session_factory, gate),
+    )
+
+    async def scenario():
+        await recorder.record("wb-block", 0, 0, 0)
+        await asyncio.sleep(0.05)  # the flusher takes the first row and blocks
+        await recorder.record("wb-block", 1, 0, 1)  # fills the queue
+        started = asyncio.get_running_loop().time()
+        await recorder.record("wb-block", 2, 0, 2)  # no room: waits, then drops
+        assert asyncio.get_running_loop().time() - started < 1
+        gate.set()
+        await recorder.stop()
+
+    asyncio.run(scenario())
+    assert recorder.block_timeouts == 1 and recorder.dropped == 1
+    assert _count(db_session_factory, "wb-block") == 2
+
+
+def test_spill_policy_persists_everything(db_session_factory, tmp_path):
+    gate = threading.Event()
+    spill_path = str(tmp_path / "spill.ndjson")
+    recorder = ResultRecorder(
+        enabled=True, max_queue=2, batch_size=1, flush_interval=0.01, overflow="spill",
+        spill_path=spill_path, session_factory=_gated(db_session_factory, gate),
+    )
+
+    async def scenario():
+        await recorder.record("wb-spill", 0, 0, 0)
+        await asyncio.sleep(0.05)
+        for i in range(5):
+            await recorder.record("wb-spill", i, 0, i)
+        assert recorder.spilled == 3
+        gate.set()
+        await recorder.stop()
+
+    asyncio.run(scenario())
+    assert _count(db_session_factory, "wb-spill") == 6
+    assert not (tmp_path / "spill.ndjson").exists()
+    assert not (tmp_path / "spill.ndjson.replay").exists()
+
+
+def test_arithmetic_routes_are_recorded(db_session_factory, monkeypatch):
+    from main import app
+
+    monkeypatch.setattr(result_recorder, "enabled", True)
+    monkeypatch.setattr(result_recorder, "session_factory", db_session_factory)
+    with TestClient(app) as client:
+        assert client.post("/add", json={"a": 2, "b": 3}).json() == {"result": 5}
+        assert client.post("/divide", json={"a": 1, "b": 0}).status_code == 400
+        assert client.get("/system/recorder").json()["enqueued"] == 1
+    # the lifespan flushed the queue on shutdown
+    with db_session_factory() as db:
+        row = db.execute(select(Calculation.number1, Calculation.number2, Calculation.result)
+                         .where(Calculation.operation == "add")).all()
+    assert [tuple(r) for r in row] == [(2.0, 3.0, 5.0)]
+
+
+def test_recorder_failure_does_not_change_route_response(monkeypatch):
+    from main import app
+
+    async def broken_record(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(result_recorder, "record", broken_record)
+    client = TestClient(app)
+    assert client.post("/add", json={"a": 2, "b": 3}).json() == {"result": 5}
+    response = client.post("/divide", json={"a": 6, "b": 3})
+    assert response.status_code == 200 and response.json() == {"result": 2}
+
+
+def test_unreadable_spill_lines_are_quarantined(db_session_factory, tmp_path):
+    spill_path = tmp_path / "spill.ndjson"
+    spill_path.write_text('["wb-bad", 1, 2, 3, 0]\n["wb-bad", 4, 5,\n7\n["wb-bad", 6, 7, 13, 0]\n')
+    recorder = ResultRecorder(
+        enabled=True, overflow="spill", flush_interval=0.01, spill_path=str(spill_path),
+        session_factory=db_session_factory,
+    )
+
+    async def scenario():
+        recorder.start()
+        await recorder.stop()
+
+    asyncio.run(scenario())
+    assert _count(db_session_factory, "wb-bad") == 2
+    assert recorder.quarantined == 2
+    assert (tmp_path / "spill.ndjson.bad").read_text() == '["wb-bad", 4, 5,\n7\n'
+    assert not (tmp_path / "spill.ndjson.replay").exists()
+
+
+def test_flusher_survives_errors_and_restarts(db_session_factory, monkeypatch):
+    recorder = ResultRecorder(enabled=True, batch_size=1, flush_interval=0.01, session_factory=db_session_factory)
+    flush = recorder._flush
+    failures = []
+
+    async def flaky_flush(rows, spill_on_error=True):
+        if not failures:
+            failures.append(rows)
+            raise RuntimeError("boom")
+        return await flush(rows, spill_on_error)
+
+    monkeypatch.setattr(recorder, "_flush", flaky_flush)
+
+    async def scenario():
+        await recorder.record("wb-flaky", 1, 1, 2)
+        await recorder.record("wb-flaky", 2, 1, 3)
+        for _ in range(100):
+            if recorder.flushed:
+                break
+            await asyncio.sleep(0.01)
+        assert recorder.stats()["loop_errors"] == 1 and recorder.healthy
+
+        # a flusher that dies anyway is reported, then restarted by record()
+        recorder._task.cancel()
+        await asyncio.wait([recorder._task])
+        assert recorder.stats()["last_error"] == "flusher cancelled"
+        assert not recorder.healthy and not recorder.stats()["running"]
+        await recorder.record("wb-flaky", 3, 1, 4)
+        assert recorder.healthy and recorder.restarts == 1
+        await recorder.stop()
+
+    asyncio.run(scenario())
+    assert _count(db_session_factory, "wb-flaky") == 2
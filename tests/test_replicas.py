@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app import crud
+from app.models import Base, Calculation
+from app.replicas import ReplicaSet, RoutingSession
+from app.schemas import CalculationCreate, CalculationUpdate
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """A primary and two replicas; row 1 says which database served it."""
+    engines = {}
+    for name in ("primary", "replica0", "replica1"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        with RoutingSession(bind=engine) as db:
+            db.add(Calculation(id=1, operation=name, number1=1, number2=2, result=3))
+            db.commit()
+        engines[name] = engine
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+def _session(databases, replicas, **kwargs):
+    return RoutingSession(bind=databases["primary"], replicas=replicas, **kwargs)
+
+
+def _served_by(db):
+    return crud.get_calculation(db, 1).operation
+
+
+def test_round_robin_per_session(databases):
+    replicas = ReplicaSet([databases["replica0"], databases["replica1"]])
+    served = []
+    for _ in range(4):
+        with _session(databases, replicas) as db:
+            # a session stays on the replica it picked
+            served.append((_served_by(db), crud.get_all_calculations(db)[0].operation))
+    assert served == [("replica0", "replica0"), ("replica1", "replica1")] * 2
+
+
+def test_writes_and_primary_only_sessions_use_the_primary(databases):
+    replicas = ReplicaSet([databases["replica0"]])
+    with _session(databases, replicas) as db:
+        assert _served_by(db) == "replica0"
+        created = crud.create_calculation(db, CalculationCreate(operation="new", number1=1, number2=1))
+        # read-your-writes: after the write the session reads the primary
+        assert crud.get_calculation(db, created.id).operation == "new"
+        assert _served_by(db) == "primary"
+
+    with _session(databases, replicas) as db:
+        crud.update_calculation(db, 1, CalculationUpdate(result=9))
+    with _session(databases, replicas, primary_only=True) as db:
+        assert _served_by(db) == "primary"
+        assert crud.get_calculation(db, 1).result == 9
+
+
+def test_least_connections(databases):
+    replicas = ReplicaSet([databases["replica0"], databases["replica1"]], balance="least_connections")
+    with databases["replica0"].connect():
+        with _session(databases, replicas) as db:
+            assert _served_by(db) == "replica1"
+
+
+def test_failing_replica_is_ejected(databases, tmp_path):
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    # least_connections prefers the first replica on a tie, i.e. the broken one
+    replicas = ReplicaSet(
+        [broken, databases["replica1"]], balance="least_connections", max_failures=2, eject_seconds=60
+    )
+
+    # reads on the broken replica are retried elsewhere instead of failing
+    for _ in range(2):
+        with _session(databases, replicas) as db:
+            assert _served_by(db) == "replica1"
+    assert replicas.stats()["replicas"]["replica0"]["healthy"] is False
+    with _session(databases, replicas) as db:
+        assert _served_by(db) == "replica1"
+
+    # with every replica out, reads fall back to the primary
+    replicas.replicas[1].ejected_until = float("inf")
+    with _session(databases, replicas) as db:
+        assert _served_by(db) == "primary"
+    assert replicas.stats()["fallbacks"] == 1
+
+
+def test_failed_read_falls_back_to_the_primary(databases, tmp_path):
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replicas = ReplicaSet([broken], max_failures=5)
+    with _session(databases, replicas) as db:
+        assert _served_by(db) == "primary"
+        assert crud.get_calculations_page(db, limit=1)[0][0].operation == "primary"
+    stats = replicas.stats()
+    assert stats["replicas"]["replica0"]["consecutive_failures"] == 1
+    assert stats["fallbacks"] == 2
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from app import responses
+from app.routers import calculations
+
+
+def test_response_mode_is_configurable_per_router(monkeypatch):
+    monkeypatch.setattr(responses, "JSON_RESPONSE_MODE", "fast")
+    monkeypatch.setenv("JSON_RESPONSE_MODE_CALCULATIONS", "default")
+    assert responses.response_class("calculations") is not responses.FastJSONResponse
+    assert responses.response_class("users") is responses.FastJSONResponse
+
+    monkeypatch.setenv("JSON_RESPONSE_MODE_USERS", "bogus")
+    with pytest.raises(ValueError):
+        responses.response_mode("users")
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_matches_stdlib_encoding(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+    elif responses.orjson is None:
+        pytest.skip("orjson is not installed")
+    payload = [{"id": 1, "operation": "add", "number1": 1.5, "number2": 2.0, "result": None}]
+    assert json.loads(responses.dumps(payload)) == payload
+    assert json.loads(responses.dumps({"values": [1.0, float("inf"), float("nan")]})) == {"values": [1.0, None, None]}
+
+
+def test_default_mode_unless_opted_in(monkeypatch):
+    monkeypatch.delenv("JSON_RESPONSE_MODE_USERS", raising=False)
+    assert responses.JSON_RESPONSE_MODE == "default"
+    assert responses.response_class("users") is not responses.FastJSONResponse
+    monkeypatch.setenv("JSON_RESPONSE_MODE_USERS", "fast")
+    assert responses.response_class("users") is responses.FastJSONResponse
+
+
+def test_rows_response():
+    response = responses.rows_response(("id", "result"), [(1, 2.0), (2, None)], headers={"X-Next-Cursor": "2"})
+    assert json.loads(response.body) == [{"id": 1, "result": 2.0}, {"id": 2, "result": None}]
+    assert response.headers["X-Next-Cursor"] == "2"
+
+
+def test_fast_and_default_list_responses_are_identical(db_client, monkeypatch):
+    body = {"items": [
+        {"operation": "fastjson", "number1": i, "number2": 0.5, "result": None if i % 3 == 0 else i + 0.5}
+        for i in range(25)
+    ]}
+    assert db_client.post("/calculations/bulk", json=body).status_code == 200
+    params = {"operation": "fastjson", "limit": 10}
+
+    monkeypatch.setattr(calculations, "FAST_JSON", True)
+    fast = db_client.get("/calculations/", params=params)
+    monkeypatch.setattr(calculations, "FAST_JSON", False)
+    default = db_client.get("/calculations/", params=params)
+
+    assert fast.status_code == default.status_code == 200
+    assert fast.json() == default.json()
+    assert len(fast.json()["items"]) == 10
+    assert fast.json()["has_more"] is True
+    assert fast.headers["X-Next-Cursor"] == default.headers["X-Next-Cursor"]
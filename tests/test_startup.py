@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_ready_after_lifespan_warmup():
+    with TestClient(app) as client:
+        response = client.get("/ready")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["ready"] is True
+        assert {"db_pool", "first_query", "bcrypt", "jwt"} <= set(body["steps"])
+        assert body["import_seconds"] > 0
+        assert body["calculation_stats"] == "ok"
+
+
+def test_api_only_import_skips_html_and_lazy_pieces():
+    code = (
+        "import json, sys, main, app.db;"
+        "print(json.dumps({"
+        "'paths': [getattr(r, 'path', None) for r in main.app.routes],"
+        "'jinja2': 'jinja2' in sys.modules,"
+        "'uvicorn': 'uvicorn' in sys.modules,"
+        "'async_ext': 'sqlalchemy.ext.asyncio' in sys.modules,"
+        "'engine': 'engine' in vars(app.db)}))"
+    )
+    env = {**os.environ, "API_ONLY": "1", "USE_ASYNC_DB": "0"}
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    assert "/login" not in result["paths"] and "/" not in result["paths"]
+    assert "/add" in result["paths"] and "/ready" in result["paths"]
+    assert not result["jinja2"]
+    assert not result["uvicorn"]
+    assert not result["async_ext"]
+    assert not result["engine"]
@@ -1,48 +1,13 @@
 import pytest
-from fastapi.testclient import TestClient
-import os
-from main import app
-from app.db import get_db
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.models import Base
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test_user.db"
 
-# Ensure we start with a fresh sqlite file for the integration tests.
-# Some CI runners or local runs may leave the file behind between runs,
-# causing a pre-existing user to make the first registration fail.
-db_file = "./test_user.db"
-if os.path.exists(db_file):
-    try:
-        os.remove(db_file)
-    except OSError:
-        # If removal fails, continue; create_all will still work but tests
-        # might fail. We don't want to crash the test import.
-        pass
+@pytest.fixture(scope="module")
+def client(db_client):
+    """TestClient bound to a fresh SQLite database under pytest's tmp_path."""
+    return db_client
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base.metadata.create_all(bind=engine)
-
-
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
-
-app.dependency_overrides[get_db] = override_get_db
-
-client = TestClient(app)
-
-
-def test_user_register():
+def test_user_register(client):
     response = client.post("/users/register", json={
         "email": "test@example.com",
         "password": "password123"
@@ -53,7 +18,7 @@ def test_user_register():
     assert data.get("token_type") == "bearer" or data.get("token_type") == "Bearer"
 
 
-def test_user_duplicate_register():
+def test_user_duplicate_register(client):
     response = client.post("/users/register", json={
         "email": "test@example.com",
         "password": "password123"
@@ -61,7 +26,7 @@ def test_user_duplicate_register():
     assert response.status_code == 400
 
 
-def test_user_login_success():
+def test_user_login_success(client):
     response = client.post("/users/login", json={
         "email": "test@example.com",
         "password": "password123"
@@ -72,7 +37,7 @@ def test_user_login_success():
     assert data.get("token_type") == "bearer" or data.get("token_type") == "Bearer"
 
 
-def test_user_login_invalid_password():
+def test_user_login_invalid_password(client):
     response = client.post("/users/login", json={
         "email": "test@example.com",
         "password": "wrongpass"
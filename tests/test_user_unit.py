@@ -1,4 +1,8 @@
+import asyncio
+import time
+
 from app.security import hash_password, verify_password
+from app.security import PasswordHasherPool, PasswordHashingOverloaded
 from app.schemas import UserCreate
 import pytest
 from app.security import _prepare_password_bytes
@@ -29,3 +33,47 @@ def test_hash_and_verify_short_and_long():
 
     hl = hash_password(long)
     assert verify_password(long, hl)
+
+
+def test_password_pool_hash_and_verify_in_worker_process():
+    pool = PasswordHasherPool(workers=1, queue_limit=4, timeout=30)
+    try:
+        hashed = asyncio.run(pool.run(hash_password, "pooledpassword"))
+        assert asyncio.run(pool.run(verify_password, "pooledpassword", hashed))
+        assert not asyncio.run(pool.run(verify_password, "wrongpassword", hashed))
+    finally:
+        pool.shutdown()
+    stats = pool.stats()
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["hash_seconds_total"] > 0
+
+
+def test_password_pool_thread_mode_and_queue_limit():
+    pool = PasswordHasherPool(workers=0, queue_limit=1, timeout=30)
+
+    async def burst():
+        return await asyncio.gather(
+            pool.run(hash_password, "firstpassword"),
+            pool.run(hash_password, "secondpassword"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(burst())
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], PasswordHashingOverloaded)
+    assert pool.stats()["rejected"] == 1
+
+
+def test_password_pool_timeout():
+    pool = PasswordHasherPool(workers=0, queue_limit=1, timeout=0.001)
+    with pytest.raises(PasswordHashingOverloaded):
+        asyncio.run(pool.run(time.sleep, 0.2))
+    assert pool.stats()["timeouts"] == 1
+    # the abandoned job still occupies its slot until it actually finishes
+    assert pool.stats()["in_flight"] == 1
+    with pytest.raises(PasswordHashingOverloaded, match="full"):
+        asyncio.run(pool.run(time.sleep, 0))
+    pool.shutdown()
+    time.sleep(0.3)
+    assert pool.stats()["in_flight"] == 0
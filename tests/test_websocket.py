@@ -0,0 +1,89 @@
+from fastapi.testclient import TestClient
+
+from main import app
+from app.routers import ws
+
+client = TestClient(app)
+
+
+def test_single_message_round_trip():
+    with client.websocket_connect("/ws/calculate") as conn:
+        conn.send_json({"id": "a1", "op": "add", "a": 1, "b": 2})
+        assert conn.receive_json() == {"id": "a1", "result": 3.0}
+        conn.send_json({"id": 2, "op": "divide", "a": 1, "b": 0})
+        assert conn.receive_json() == {"id": 2, "error": "Cannot divide by zero!"}
+
+
+def test_batch_frame_reports_per_message_errors():
+    with client.websocket_connect("/ws/calculate") as conn:
+        conn.send_json([
+            {"id": 1, "op": "multiply", "a": 3, "b": 4},
+            {"id": 2, "op": "power", "a": 1, "b": 1},
+            {"id": 3, "op": "add", "a": "1", "b": 1},
+            "nope",
+        ])
+        assert conn.receive_json() == [
+            {"id": 1, "result": 12.0},
+            {"id": 2, "error": "Unknown operation: power"},
+            {"id": 3, "error": "Both a and b must be numbers."},
+            {"id": None, "error": "Message must be an object"},
+        ]
+        conn.send_text("{not json")
+        assert conn.receive_json() == {"id": None, "error": "Invalid JSON"}
+
+
+def test_malformed_messages_do_not_close_the_connection():
+    with client.websocket_connect("/ws/calculate") as conn:
+        conn.send_json([
+            {"id": 1, "op": ["x"], "a": 1, "b": 2},
+            {"id": 2, "op": "add", "a": int("9" * 400), "b": 1},
+            {"id": 3, "op": "add", "a": 1, "b": 2},
+        ])
+        assert conn.receive_json() == [
+            {"id": 1, "error": "Unknown operation: ['x']"},
+            {"id": 2, "error": "Both a and b must be finite numbers."},
+            {"id": 3, "result": 3.0},
+        ]
+        conn.send_json({"id": 4, "op": {"nested": 1}, "a": 1, "b": 2})
+        assert "Unknown operation" in conn.receive_json()["error"]
+        conn.send_json({"id": 5, "op": "multiply", "a": 2, "b": 3})
+        assert conn.receive_json() == {"id": 5, "result": 6.0}
+
+
+def test_overflowing_result_is_a_per_message_error():
+    with client.websocket_connect("/ws/calculate") as conn:
+        conn.send_json([
+            {"id": 1, "op": "multiply", "a": 1e308, "b": 10},
+            {"id": 2, "op": "add", "a": 1e308, "b": 1e308},
+            {"id": 3, "op": "divide", "a": 1e308, "b": 1e-308},
+            {"id": 4, "op": "add", "a": 1, "b": 2},
+        ])
+        assert conn.receive_json() == [
+            {"id": 1, "error": "Result is not finite"},
+            {"id": 2, "error": "Result is not finite"},
+            {"id": 3, "error": "Result is not finite"},
+            {"id": 4, "result": 3.0},
+        ]
+        conn.send_json({"id": 5, "op": "stats"})
+        assert conn.receive_json()["stats"]["errors"] == 3
+
+
+def test_pipelined_frames_are_answered_in_order_under_backpressure(monkeypatch):
+    monkeypatch.setattr(ws, "WS_MAX_PENDING", 2)
+    with client.websocket_connect("/ws/calculate") as conn:
+        for i in range(50):
+            conn.send_json({"id": i, "op": "subtract", "a": i, "b": 1})
+        assert [conn.receive_json()["id"] for _ in range(50)] == list(range(50))
+
+        conn.send_json({"id": "s", "op": "stats"})
+        stats = conn.receive_json()["stats"]
+        assert stats["messages"] == 50
+        assert stats["max_pending_frames"] <= 2
+        assert client.get("/system/websockets").json()["active_connections"] >= 1
+
+
+def test_frame_size_limit(monkeypatch):
+    monkeypatch.setattr(ws, "WS_MAX_BATCH", 3)
+    with client.websocket_connect("/ws/calculate") as conn:
+        conn.send_json([{"id": i, "op": "add", "a": 1, "b": 1} for i in range(4)])
+        assert "at most 3 messages" in conn.receive_json()["error"]
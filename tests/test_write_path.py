@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import event
+
+from app import crud
+from app.schemas import CalculationCreate, CalculationUpdate, UserCreate
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement.split()[0].upper())
+
+
+@pytest.fixture
+def counted_session(db_session_factory):
+    db = db_session_factory()
+    counter = StatementCounter(db.get_bind())
+    yield db, counter
+    event.remove(db.get_bind(), "before_cursor_execute", counter._record)
+    db.close()
+
+
+def test_create_is_a_single_insert_without_refresh(counted_session):
+    db, counter = counted_session
+    calc = crud.create_calculation(db, CalculationCreate(operation="rt", number1=1, number2=2, result=3))
+    # one INSERT ... RETURNING for the row plus the rollup upkeep; no SELECT
+    assert counter.statements[0] == "INSERT"
+    assert "SELECT" not in counter.statements
+    # values stay readable after commit without a refresh round trip
+    before = len(counter.statements)
+    assert (calc.id, calc.operation, calc.result) == (calc.id, "rt", 3)
+    assert len(counter.statements) == before
+
+
+def test_update_and_delete_skip_the_preceding_select(counted_session):
+    db, counter = counted_session
+    calc = crud.create_calculation(db, CalculationCreate(operation="rt", number1=1, number2=2, result=3))
+
+    counter.statements.clear()
+    updated = crud.update_calculation(db, calc.id, CalculationUpdate(number1=5))
+    assert updated.number1 == 5
+    assert counter.statements == ["UPDATE"]
+
+    counter.statements.clear()
+    assert crud.delete_calculation(db, calc.id)
+    assert counter.statements[0] == "DELETE"
+    assert "SELECT" not in counter.statements
+
+    assert crud.update_calculation(db, calc.id, CalculationUpdate(result=1)) is None
+    assert not crud.delete_calculation(db, calc.id)
+
+
+def test_fallback_without_returning(db_session_factory, monkeypatch):
+    monkeypatch.setattr(crud, "_supports", lambda db, feature: False)
+    with db_session_factory() as db:
+        user = crud.create_user(db, UserCreate(email="fallback@example.com", password="password123"), "hashed")
+        assert user.id is not None
+        calc = crud.create_calculation(db, CalculationCreate(operation="fb", number1=1, number2=2, result=3))
+        assert crud.update_calculation(db, calc.id, CalculationUpdate(result=4)).result == 4
+        assert crud.update_calculation(db, calc.id, CalculationUpdate()).result == 4
+        assert crud.delete_calculation(db, calc.id)
+        assert crud.update_calculation(db, calc.id, CalculationUpdate(result=1)) is None
+        assert not crud.delete_calculation(db, calc.id)
@@ -0,0 +1,64 @@
+import json
+
+from benchmarks import suite
+
+
+def _doc(**medians):
+    return {"results": {name: {"median_ns": value} for name, value in medians.items()}}
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = _doc(fast=100.0, same=100.0, slow=100.0, gone=100.0)
+    current = _doc(fast=50.0, same=120.0, slow=130.0, new=1.0)
+
+    report = suite.compare(current, baseline, threshold=0.25)
+
+    assert report["regressed"] == ["slow"]
+    assert report["improved"] == ["fast"]
+    assert report["added"] == ["new"]
+    assert report["missing"] == ["gone"]
+    statuses = {row["name"]: row["status"] for row in report["rows"]}
+    assert statuses["same"] == "ok"
+
+
+def test_measure_calibrates_and_runs_prepare_untimed():
+    prepared = []
+    calls = []
+    case = suite.Case(lambda: calls.append(1), prepare=prepared.append)
+
+    result = suite.measure(case, min_time=0.001, repeats=3)
+
+    assert result["number"] >= 1
+    assert result["repeats"] == 3
+    assert result["min_ns"] <= result["median_ns"]
+    # every timed loop (calibration and repeats) was prepared for its size
+    assert sum(prepared) == len(calls)
+
+
+def test_compare_command_exit_status(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    baseline.write_text(json.dumps(_doc(op=100.0)))
+    current.write_text(json.dumps(_doc(op=200.0)))
+
+    assert suite.main(["compare", str(current), str(baseline), "--threshold", "0.5"]) == 1
+    assert "1 regressed" in capsys.readouterr().out
+    assert suite.main(["compare", str(current), str(baseline), "--threshold", "1.5"]) == 0
+
+
+def test_stored_baseline_covers_every_benchmark():
+    with open(suite.DEFAULT_BASELINE) as f:
+        baseline = json.load(f)
+    assert set(suite.BENCHMARKS) <= set(baseline["results"])
+
+
+def test_compare_is_relative_to_machine_speed():
+    baseline = {"meta": {"calibration_ns": 100.0}, **_doc(op=100.0, slow=100.0)}
+    # everything runs twice as slow on this machine; only "slow" got worse
+    current = {"meta": {"calibration_ns": 200.0}, **_doc(op=200.0, slow=300.0)}
+
+    report = suite.compare(current, baseline, threshold=0.25)
+    assert report["machine_factor"] == 2.0
+    assert report["regressed"] == ["slow"]
+
+    assert suite.compare(current, baseline, threshold=0.25, relative=False)["regressed"] == ["op", "slow"]
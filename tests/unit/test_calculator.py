@@ -3,6 +3,7 @@
 import pytest  # Import the pytest framework for writing and running tests
 from typing import Union  # Import Union for type hinting multiple possible types
 from app.operations import add, subtract, multiply, divide  # Import the calculator functions from the operations module
+from app.operations import evaluate_batch, evaluate_columns
 
 # Define a type alias for numbers that can be either int or float
 Number = Union[int, float]
@@ -232,3 +233,64 @@ def test_divide_by_zero() -> None:
     # Assert that the exception message contains the expected error message
     assert "Cannot divide by zero!" in str(excinfo.value), \
         f"Expected error message 'Cannot divide by zero!', but got '{excinfo.value}'"
+
+
+# ---------------------------------------------
+# Unit Tests for the Column-wise Kernels
+# ---------------------------------------------
+
+@pytest.mark.parametrize(
+    "op, a, b, expected",
+    [
+        ("add", [1, 2.5], [3, 3.5], [4, 6.0]),
+        ("subtract", [5, -5], [3, -3], [2, -2]),
+        ("multiply", [2, 2.5], [3, 4], [6, 10.0]),
+        ("divide", [6, 0], [3, 5], [2.0, 0.0]),
+    ],
+    ids=["add_many", "subtract_many", "multiply_many", "divide_many"]
+)
+def test_evaluate_columns(op: str, a: list, b: list, expected: list) -> None:
+    """
+    Test that 'evaluate_columns' applies each kernel element by element and
+    reports no errors for valid inputs.
+    """
+    results, errors = evaluate_columns(op, a, b)
+
+    assert results == expected, f"Expected {op} over columns to be {expected}, but got {results}"
+    assert errors == [None] * len(expected)
+
+
+def test_evaluate_columns_division_by_zero_is_per_item() -> None:
+    """
+    Test that a zero divisor only fails its own item and leaves the rest of the
+    column intact.
+    """
+    results, errors = evaluate_columns("divide", [6, 1, 9], [3, 0, 3])
+
+    assert results == [2.0, None, 3.0]
+    assert errors == [None, "Cannot divide by zero!", None]
+
+
+def test_evaluate_columns_rejects_bad_input() -> None:
+    """
+    Test that unknown operations and mismatched column lengths raise ValueError.
+    """
+    with pytest.raises(ValueError):
+        evaluate_columns("power", [1], [2])
+    with pytest.raises(ValueError):
+        evaluate_columns("add", [1, 2], [2])
+
+
+def test_evaluate_batch_preserves_item_order() -> None:
+    """
+    Test that a mixed batch is scattered back into the original item order and
+    that unknown operations are reported per item.
+    """
+    results, errors = evaluate_batch(
+        ["divide", "add", "divide", "multiply", "modulo"],
+        [8, 1, 1, 3, 1],
+        [2, 2, 0, 3, 1],
+    )
+
+    assert results == [4.0, 3, None, 9, None]
+    assert errors == [None, None, "Cannot divide by zero!", None, "Unknown operation: modulo"]
@@ -0,0 +1,109 @@
+# tests/unit/test_expressions.py
+
+import pytest  # Import the pytest framework for writing and running tests
+from app.expressions import ExpressionError, compile_expression, evaluate
+
+
+@pytest.mark.parametrize(
+    "expression, columns, expected",
+    [
+        ("(a + b) * c / d", {"a": [1, 2], "b": [3, 4], "c": [2, 2], "d": [4, 3]}, [2.0, 4.0]),
+        ("-a + 2 * 3", {"a": [1, -1]}, [5, 7]),
+        ("a - -b", {"a": [1], "b": [2]}, [3]),
+        ("+a * 1.5", {"a": [2]}, [3.0]),
+        ("10 / 4", {}, [2.5]),
+    ],
+    ids=["mixed_operators", "unary_minus_and_folding", "double_negative", "unary_plus", "constants_only"],
+)
+def test_evaluate_expression(expression, columns, expected):
+    """
+    Test that compiled plans evaluate correctly over columns of bindings.
+    """
+    plan = compile_expression(expression)
+    rows = len(next(iter(columns.values()))) if columns else 1
+
+    results, errors = evaluate(plan, columns, rows)
+
+    assert results == expected
+    assert errors == [None] * rows
+
+
+def test_division_by_zero_is_reported_per_row():
+    """
+    Test that a zero divisor anywhere in the expression only fails its own row.
+    """
+    plan = compile_expression("a / b + 1 / c")
+    results, errors = evaluate(plan, {"a": [4, 4, 4], "b": [2, 0, 2], "c": [1, 1, 0]}, 3)
+
+    assert results == [3.0, None, None]
+    assert errors == [None, "Cannot divide by zero!", "Cannot divide by zero!"]
+
+
+def test_overflow_is_reported_per_row():
+    """
+    Test that a row overflowing to infinity fails only that row.
+    """
+    results, errors = evaluate(compile_expression("x * 10"), {"x": [1e308, 2]}, 2)
+    assert results == [None, 20]
+    assert errors == ["Result is not finite", None]
+
+    results, errors = evaluate(compile_expression("-x"), {"x": [float("inf")]}, 1)
+    assert results == [None] and errors == ["Result is not finite"]
+
+
+def test_constant_folding_and_cache():
+    """
+    Test that constant sub-expressions are folded and plans are reused by text.
+    """
+    plan = compile_expression("x * (2 + 3)")
+    assert plan.instructions == (("var", "x"), ("const", 5), ("multiply", None))
+    assert compile_expression("x * (2 + 3)") is plan
+    # a constant division by zero is left for evaluation time
+    assert ("divide", None) in compile_expression("1 / 0").instructions
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "",
+        "__import__('os').system('id')",
+        "a ** 2",
+        "a if b else c",
+        "x.real",
+        "[1, 2]",
+        "True + 1",
+        "'a' * 3",
+        "1 +",
+        "1+" * 600 + "1",
+        "9" * 400 + " * x",
+        "1e308 * 10 + x",
+        "-" * 60 + "x",
+        "x + (" * 60 + "x" + ")" * 60,
+    ],
+)
+def test_unsafe_or_invalid_expressions_are_rejected(expression):
+    """
+    Test that anything outside plain arithmetic is rejected at compile time.
+    """
+    with pytest.raises(ExpressionError):
+        compile_expression(expression)
+
+
+def test_flat_operator_chains_are_not_nesting():
+    """
+    Test that a long left-associative chain is not rejected as too deep.
+    """
+    names = [f"x{i}" for i in range(60)]
+    plan = compile_expression(" + ".join(names))
+    results, errors = evaluate(plan, {name: [1] for name in names}, 1)
+    assert results == [60]
+
+
+def test_missing_variable():
+    """
+    Test that evaluating without a value for every variable raises ExpressionError.
+    """
+    with pytest.raises(ExpressionError):
+        evaluate(compile_expression("a + b"), {"a": [1]}, 1)
+    with pytest.raises(ExpressionError):
+        evaluate(compile_expression("a + b"), {"a": [1], "b": [1, 2]}, 1)